@@ -0,0 +1,90 @@
+"""
+Runs the benchmarks, or compares the results of two runs.
+
+    python -m benchmarks -o results.json
+    python -m benchmarks compare old.json new.json
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.suite import (
+    SIZES,
+    compare_results,
+    load_results,
+    run_benchmarks,
+)
+
+
+def run(args: argparse.Namespace) -> int:
+    results = run_benchmarks(
+        args.sizes, args.repeat, args.filter, lambda line: print(line, file=sys.stderr)
+    )
+    contents = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(contents)
+    else:
+        with open(args.output, "w") as f:
+            f.write(contents + "\n")
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    changes = compare_results(load_results(args.old), load_results(args.new))
+    regressions = 0
+    for change in changes:
+        marker = ""
+        if change.ratio > 1 + args.threshold:
+            marker = "  REGRESSION"
+            regressions += 1
+        elif change.ratio < 1 - args.threshold:
+            marker = "  improvement"
+        print(
+            f"{change.name:<50} {change.old * 1e3:12.4f} ms {change.new * 1e3:12.4f} ms "
+            f"{change.ratio:8.2f}x{marker}"
+        )
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    arg_parser.add_argument(
+        "-o", "--output", help="file to write the JSON results to, default stdout"
+    )
+    arg_parser.add_argument(
+        "--repeat", type=int, default=10, help="number of timed runs per benchmark"
+    )
+    arg_parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=SIZES,
+        help="input sizes of the compile and execution benchmarks",
+    )
+    arg_parser.add_argument(
+        "--filter", help="only run the benchmarks whose name matches this regex"
+    )
+    arg_parser.set_defaults(func=run)
+
+    subparsers = arg_parser.add_subparsers()
+    compare_parser = subparsers.add_parser(
+        "compare",
+        help="compare the median times of two runs, failing if any regressed",
+    )
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown reported as a regression",
+    )
+    compare_parser.set_defaults(func=compare)
+
+    args = arg_parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
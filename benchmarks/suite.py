@@ -0,0 +1,324 @@
+"""
+Benchmarks of each stage of the compiler, from parsing to executing the compiled
+program, for a matrix of kernels and input sizes.
+"""
+
+import json
+import platform
+import re
+import statistics
+import time
+from collections.abc import Callable, Iterator, Sequence
+from datetime import datetime, timezone
+from functools import cache
+from typing import Any, NamedTuple
+
+import jax
+import numpy as np
+from xdsl.backend.jax_executable import JaxExecutable
+from xdsl.dialects.builtin import ModuleOp
+from xdsl.passes import ModulePass
+
+from xuiua.compile import (
+    SHAPED_PIPELINE,
+    CompiledProgram,
+    lower_source,
+)
+from xuiua.context import get_ctx
+from xuiua.disk_cache import package_versions
+from xuiua.frontend.incremental import IncrementalModule, TextEdit
+from xuiua.frontend.ir_gen import build_module
+from xuiua.frontend.parser import Parser
+from xuiua.passes import AVAILABLE_PASSES
+from xuiua.passes.add_shapes import AddShapesPass
+from xuiua.passes.batch import BatchPass
+from xuiua.passes.dynamic_dims import MaterializeDynamicDimsPass
+from xuiua.passes.fuse_pervasive import FusePervasivePass
+from xuiua.passes.inline_calls import InlineCallsPass
+
+
+class Kernel(NamedTuple):
+    expr: str
+    "The benchmarked expression."
+    shapes: Callable[[int], tuple[tuple[int, ...], ...]]
+    "Returns the shapes of the inputs for the given size."
+
+    @property
+    def source(self) -> str:
+        return "main ← " + self.expr
+
+
+KERNELS: dict[str, Kernel] = {
+    "add": Kernel("+", lambda n: ((n,), (n,))),
+    "scale": Kernel("×2", lambda n: ((n,),)),
+    "broadcast": Kernel("+", lambda n: ((n,), (n, 8))),
+    "sum": Kernel("/+", lambda n: ((n,),)),
+    "product": Kernel("/×", lambda n: ((n, 8),)),
+}
+
+SIZES = (1_000, 1_000_000)
+
+PARSE_LINES = (1_000, 4_000, 16_000)
+"""
+The numbers of lines of the generated sources parsed to check that parsing scales
+linearly.
+"""
+
+INCREMENTAL_LINES = (1_000, 4_000)
+"""
+The numbers of lines of the generated sources edited to check that re-lowering an
+edit does not depend on the size of the source.
+"""
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[], Any]
+    "Returns the argument of `run`, called before each repetition and not timed."
+    run: Callable[[Any], object]
+    "The timed function."
+    setup_once: bool = False
+    "Whether `run` can be repeated with the same argument, only calling `setup` once."
+
+
+def built_module(kernel: Kernel) -> ModuleOp:
+    return build_module(Parser(kernel.source).parse_items())
+
+
+def pass_input(
+    kernel: Kernel, size: int, pass_name: str
+) -> tuple[ModuleOp, ModulePass]:
+    """
+    Returns the module as it is before the pass in the compilation pipeline, and the
+    pass as configured in the pipeline.
+    """
+    shapes = kernel.shapes(size)
+    if pass_name == AddShapesPass.name:
+        encoding = "_".join("x".join(map(str, shape)) for shape in shapes)
+        return built_module(kernel), AddShapesPass(f"main={encoding}")
+    if pass_name == InlineCallsPass.name:
+        return built_module(kernel), InlineCallsPass()
+    if pass_name == FusePervasivePass.name:
+        return built_module(kernel), FusePervasivePass()
+    if pass_name == BatchPass.name:
+        return lower_source(kernel.source, "main", shapes), BatchPass(8)
+    if pass_name == MaterializeDynamicDimsPass.name:
+        dynamic_shapes = tuple((-1, *shape[1:]) for shape in shapes)
+        module = lower_source(kernel.source, "main", dynamic_shapes)
+        return module, MaterializeDynamicDimsPass((size,))
+
+    for i, p in enumerate(SHAPED_PIPELINE):
+        if p.name == pass_name:
+            return lower_source(kernel.source, "main", shapes, SHAPED_PIPELINE[:i]), p
+    raise ValueError(f"No benchmark for pass {pass_name}")
+
+
+def generated_source(lines: int) -> str:
+    """
+    Returns a source of the given number of lines, alternating bindings, arrays and
+    comments.
+    """
+    source_lines: list[str] = []
+    for i in range(lines):
+        match i % 3:
+            case 0:
+                source_lines.append(f"f{i} ← +1 ×2 /+ [1 2.5 3] # binding {i}")
+            case 1:
+                source_lines.append(f"(+ {i}) [{i} {i + 1}]")
+            case _:
+                source_lines.append(f"# comment {i}")
+    return "\n".join(source_lines)
+
+
+def generated_bindings(lines: int) -> str:
+    "Returns a source of the given number of lowerable bindings."
+    return "".join(f"f{i} ← +{i} ×2 (+ 1)\n" for i in range(lines))
+
+
+def setup_incremental(lines: int) -> tuple[IncrementalModule, TextEdit]:
+    """
+    Returns the incremental module of the source, and an edit of a number in the
+    middle of it.
+    """
+    source = generated_bindings(lines)
+    pos = source.index(f"f{lines // 2} ← +") + len(f"f{lines // 2} ← +")
+    return IncrementalModule(source), TextEdit(pos, pos + 1, "7")
+
+
+def random_inputs(shapes: Sequence[Sequence[int]]) -> tuple[jax.Array, ...]:
+    rng = np.random.default_rng(0)
+    return tuple(jax.numpy.asarray(rng.random(shape)) for shape in shapes)
+
+
+def benchmarks(sizes: Sequence[int] = SIZES) -> Iterator[Benchmark]:
+    """
+    The benchmarks for each kernel and size.
+    The inputs of the benchmarks are only prepared when they are run.
+    """
+    ctx = get_ctx()
+    for lines in PARSE_LINES:
+        yield Benchmark(
+            f"parse_scaling/{lines}",
+            lambda lines=lines: generated_source(lines),
+            lambda source: Parser(source).parse_items(),
+            setup_once=True,
+        )
+
+    for lines in INCREMENTAL_LINES:
+        yield Benchmark(
+            f"incremental/{lines}",
+            lambda lines=lines: setup_incremental(lines),
+            lambda args: args[0].apply_edit(args[1]),
+            setup_once=True,
+        )
+
+    for kernel_name, kernel in KERNELS.items():
+        yield Benchmark(
+            f"parse/{kernel_name}",
+            lambda kernel=kernel: kernel.source,
+            lambda source: Parser(source).parse_items(),
+            setup_once=True,
+        )
+        yield Benchmark(
+            f"ir_gen/{kernel_name}",
+            lambda kernel=kernel: Parser(kernel.source).parse_items(),
+            build_module,
+            setup_once=True,
+        )
+
+        for pass_name in sorted(AVAILABLE_PASSES):
+            prepare = cache(
+                lambda kernel=kernel, pass_name=pass_name: pass_input(
+                    kernel, sizes[0], pass_name
+                )
+            )
+            yield Benchmark(
+                f"pass/{pass_name}/{kernel_name}",
+                lambda prepare=prepare: (prepare()[0].clone(), prepare()[1]),
+                lambda args: args[1].apply(ctx, args[0]),
+            )
+
+        for size in sizes:
+            shapes = kernel.shapes(size)
+            lower = cache(
+                lambda kernel=kernel, shapes=shapes: lower_source(
+                    kernel.source, "main", shapes
+                )
+            )
+            yield Benchmark(
+                f"jax_compile/{kernel_name}/{size}",
+                lower,
+                JaxExecutable.compile,
+                setup_once=True,
+            )
+
+            def setup_execute(
+                lower: Callable[[], ModuleOp] = lower,
+                shapes: tuple[tuple[int, ...], ...] = shapes,
+            ) -> tuple[CompiledProgram, tuple[jax.Array, ...]]:
+                program = CompiledProgram(lower(), JaxExecutable.compile(lower()))
+                inputs = random_inputs(shapes)
+                # Warm up, so that only the steady state is measured
+                jax.block_until_ready(program(*inputs))
+                return program, inputs
+
+            yield Benchmark(
+                f"execute/{kernel_name}/{size}",
+                setup_execute,
+                lambda args: jax.block_until_ready(args[0](*args[1])),
+                setup_once=True,
+            )
+
+
+def time_benchmark(benchmark: Benchmark, repeat: int) -> dict[str, float | int]:
+    times: list[float] = []
+    arg = benchmark.setup()
+    for i in range(repeat):
+        if i and not benchmark.setup_once:
+            arg = benchmark.setup()
+        start = time.perf_counter()
+        benchmark.run(arg)
+        times.append(time.perf_counter() - start)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "repeat": repeat,
+    }
+
+
+def run_benchmarks(
+    sizes: Sequence[int] = SIZES,
+    repeat: int = 10,
+    filter: str | None = None,
+    log: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    """
+    Runs the benchmarks whose name matches the filter, and returns the results with
+    the metadata needed to compare them across releases.
+
+    Benchmarks that raise an exception are reported with the error rather than times.
+    """
+    pattern = re.compile(filter) if filter is not None else None
+    results: dict[str, dict[str, Any]] = {}
+    for benchmark in benchmarks(sizes):
+        if pattern is not None and not pattern.search(benchmark.name):
+            continue
+        try:
+            results[benchmark.name] = time_benchmark(benchmark, repeat)
+        except Exception as e:
+            message = str(e).splitlines()[0] if str(e) else ""
+            results[benchmark.name] = {"error": f"{type(e).__name__}: {message}"}
+        if log is not None:
+            log(format_result(benchmark.name, results[benchmark.name]))
+
+    return {
+        "metadata": {
+            "versions": package_versions(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "date": datetime.now(timezone.utc).isoformat(),
+        },
+        "benchmarks": results,
+    }
+
+
+def format_result(name: str, result: dict[str, Any]) -> str:
+    if "error" in result:
+        return f"{name:<50} {result['error']}"
+    return f"{name:<50} {result['median'] * 1e3:12.4f} ms"
+
+
+class Change(NamedTuple):
+    name: str
+    old: float
+    "The median time of the old results, in seconds."
+    new: float
+    "The median time of the new results, in seconds."
+
+    @property
+    def ratio(self) -> float:
+        return self.new / self.old
+
+
+def compare_results(old: dict[str, Any], new: dict[str, Any]) -> list[Change]:
+    """
+    Returns the changes in median time of the benchmarks that succeeded in both
+    results.
+    """
+    old_benchmarks = old["benchmarks"]
+    new_benchmarks = new["benchmarks"]
+    return [
+        Change(name, old_benchmarks[name]["median"], result["median"])
+        for name, result in new_benchmarks.items()
+        if name in old_benchmarks
+        and "median" in result
+        and "median" in old_benchmarks[name]
+    ]
+
+
+def load_results(path: str) -> dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
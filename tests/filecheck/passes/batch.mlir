@@ -0,0 +1,19 @@
+// RUN: xuiua lower %s 'batch{size=4 func="Scale"}' | filecheck %s
+
+func.func @Scale(%0 : tensor<3xf64>) -> tensor<3xf64> {
+  %1 = arith.constant dense<2.000000e+00> : tensor<f64>
+  %2 = "stablehlo.broadcast_in_dim"(%1) {"broadcast_dimensions" = array<i64>} : (tensor<f64>) -> tensor<3xf64>
+  %3 = "stablehlo.multiply"(%0, %2) : (tensor<3xf64>, tensor<3xf64>) -> tensor<3xf64>
+  %4 = "stablehlo.broadcast_in_dim"(%3) {"broadcast_dimensions" = array<i64: 0>} : (tensor<3xf64>) -> tensor<3x2xf64>
+  func.return %4, %1 : tensor<3x2xf64>, tensor<f64>
+}
+
+// CHECK:       func.func @Scale(%0 : tensor<4x3xf64>) -> (tensor<4x3x2xf64>, tensor<4xf64>) {
+// CHECK-NEXT:    %1 = arith.constant dense<2.000000e+00> : tensor<f64>
+// CHECK-NEXT:    %2 = "stablehlo.broadcast_in_dim"(%1) {"broadcast_dimensions" = array<i64>} : (tensor<f64>) -> tensor<3xf64>
+// CHECK-NEXT:    %3 = "stablehlo.broadcast_in_dim"(%2) {"broadcast_dimensions" = array<i64: 1>} : (tensor<3xf64>) -> tensor<4x3xf64>
+// CHECK-NEXT:    %4 = "stablehlo.multiply"(%0, %3) : (tensor<4x3xf64>, tensor<4x3xf64>) -> tensor<4x3xf64>
+// CHECK-NEXT:    %5 = "stablehlo.broadcast_in_dim"(%4) {"broadcast_dimensions" = array<i64: 0, 1>} : (tensor<4x3xf64>) -> tensor<4x3x2xf64>
+// CHECK-NEXT:    %6 = "stablehlo.broadcast_in_dim"(%1) {"broadcast_dimensions" = array<i64>} : (tensor<f64>) -> tensor<4xf64>
+// CHECK-NEXT:    func.return %5, %6 : tensor<4x3x2xf64>, tensor<4xf64>
+// CHECK-NEXT:  }
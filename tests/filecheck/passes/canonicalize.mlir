@@ -0,0 +1,27 @@
+// RUN: xuiua lower %s 'canonicalize' | filecheck %s
+
+func.func @main(%0 : tensor<2x3xf64>) -> tensor<2x3xf64> {
+  %1 = arith.constant dense<[1.000000e+00, 2.000000e+00]> : tensor<2xf64>
+  %2 = arith.constant dense<3.000000e+00> : tensor<f64>
+  %3 = "uiua.multiply"(%1, %2) : (tensor<2xf64>, tensor<f64>) -> tensor<2xf64>
+  %4 = arith.constant dense<[[1.000000e+00, 2.000000e+00, 3.000000e+00], [4.000000e+00, 5.000000e+00, 6.000000e+00]]> : tensor<2x3xf64>
+  %5 = "uiua.add"(%3, %4) : (tensor<2xf64>, tensor<2x3xf64>) -> tensor<2x3xf64>
+  %6 = arith.constant dense<3.000000e+00> : tensor<f64>
+  %7 = "uiua.multiply"(%0, %6) : (tensor<2x3xf64>, tensor<f64>) -> tensor<2x3xf64>
+  %8 = "uiua.multiply"(%0, %2) : (tensor<2x3xf64>, tensor<f64>) -> tensor<2x3xf64>
+  %9 = "uiua.add"(%7, %8) : (tensor<2x3xf64>, tensor<2x3xf64>) -> tensor<2x3xf64>
+  %10 = "uiua.add"(%9, %5) : (tensor<2x3xf64>, tensor<2x3xf64>) -> tensor<2x3xf64>
+  %11 = "uiua.add"(%0, %0) : (tensor<2x3xf64>, tensor<2x3xf64>) -> tensor<2x3xf64>
+  func.return %10 : tensor<2x3xf64>
+}
+
+// CHECK:       builtin.module {
+// CHECK-NEXT:    func.func @main(%0 : tensor<2x3xf64>) -> tensor<2x3xf64> {
+// CHECK-NEXT:      %1 = arith.constant dense<3.000000e+00> : tensor<f64>
+// CHECK-NEXT:      %2 = arith.constant dense<[[4.000000e+00, 5.000000e+00, 6.000000e+00], [1.000000e+01, 1.100000e+01, 1.200000e+01]]> : tensor<2x3xf64>
+// CHECK-NEXT:      %3 = "uiua.multiply"(%0, %1) : (tensor<2x3xf64>, tensor<f64>) -> tensor<2x3xf64>
+// CHECK-NEXT:      %4 = "uiua.add"(%3, %3) : (tensor<2x3xf64>, tensor<2x3xf64>) -> tensor<2x3xf64>
+// CHECK-NEXT:      %5 = "uiua.add"(%4, %2) : (tensor<2x3xf64>, tensor<2x3xf64>) -> tensor<2x3xf64>
+// CHECK-NEXT:      func.return %5 : tensor<2x3xf64>
+// CHECK-NEXT:    }
+// CHECK-NEXT:  }
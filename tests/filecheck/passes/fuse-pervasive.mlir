@@ -0,0 +1,33 @@
+// RUN: xuiua lower %s 'fuse-pervasive' | filecheck %s
+
+func.func @main(%0 : tensor<*xf64>, %1 : tensor<*xf64>) -> (tensor<*xf64>, tensor<*xf64>) {
+  %2 = arith.constant dense<2.000000e+00> : tensor<f64>
+  %3 = "uiua.multiply"(%0, %2) : (tensor<*xf64>, tensor<f64>) -> tensor<*xf64>
+  %4 = "uiua.add"(%3, %1) : (tensor<*xf64>, tensor<*xf64>) -> tensor<*xf64>
+  %5 = "uiua.reduce"(%4) ({
+  ^0(%6 : tensor<*xf64>, %7 : tensor<*xf64>):
+    %8 = "uiua.add"(%6, %7) : (tensor<*xf64>, tensor<*xf64>) -> tensor<*xf64>
+    "uiua.yield"(%8) : (tensor<*xf64>) -> ()
+  }) : (tensor<*xf64>) -> tensor<*xf64>
+  %9 = "uiua.add"(%5, %3) : (tensor<*xf64>, tensor<*xf64>) -> tensor<*xf64>
+  func.return %9, %3 : tensor<*xf64>, tensor<*xf64>
+}
+
+// CHECK:       builtin.module {
+// CHECK-NEXT:    func.func @main(%0 : tensor<*xf64>, %1 : tensor<*xf64>) -> (tensor<*xf64>, tensor<*xf64>) {
+// CHECK-NEXT:      %2 = arith.constant dense<2.000000e+00> : tensor<f64>
+// CHECK-NEXT:      %3, %4 = "uiua.fused"(%0, %2, %1) ({
+// CHECK-NEXT:      ^0(%5 : tensor<*xf64>, %6 : tensor<f64>, %7 : tensor<*xf64>):
+// CHECK-NEXT:        %8 = "uiua.multiply"(%5, %6) : (tensor<*xf64>, tensor<f64>) -> tensor<*xf64>
+// CHECK-NEXT:        %9 = "uiua.add"(%8, %7) : (tensor<*xf64>, tensor<*xf64>) -> tensor<*xf64>
+// CHECK-NEXT:        %10 = "uiua.reduce"(%9) ({
+// CHECK-NEXT:        ^1(%11 : tensor<*xf64>, %12 : tensor<*xf64>):
+// CHECK-NEXT:          %13 = "uiua.add"(%11, %12) : (tensor<*xf64>, tensor<*xf64>) -> tensor<*xf64>
+// CHECK-NEXT:          "uiua.yield"(%13) : (tensor<*xf64>) -> ()
+// CHECK-NEXT:        }) : (tensor<*xf64>) -> tensor<*xf64>
+// CHECK-NEXT:        "uiua.yield"(%8, %10) : (tensor<*xf64>, tensor<*xf64>) -> ()
+// CHECK-NEXT:      }) : (tensor<*xf64>, tensor<f64>, tensor<*xf64>) -> (tensor<*xf64>, tensor<*xf64>)
+// CHECK-NEXT:      %14 = "uiua.add"(%4, %3) : (tensor<*xf64>, tensor<*xf64>) -> tensor<*xf64>
+// CHECK-NEXT:      func.return %14, %3 : tensor<*xf64>, tensor<*xf64>
+// CHECK-NEXT:    }
+// CHECK-NEXT:  }
@@ -0,0 +1,23 @@
+// RUN: xuiua lower %s 'inline-calls' | filecheck %s
+
+func.func @Double(%0 : tensor<*xf64>) -> tensor<*xf64> {
+  %1 = "uiua.add"(%0, %0) : (tensor<*xf64>, tensor<*xf64>) -> tensor<*xf64>
+  func.return %1 : tensor<*xf64>
+}
+func.func @Quad(%0 : tensor<*xf64>) -> tensor<*xf64> {
+  %1 = func.call @Double(%0) : (tensor<*xf64>) -> tensor<*xf64>
+  %2 = func.call @Double(%1) : (tensor<*xf64>) -> tensor<*xf64>
+  func.return %2 : tensor<*xf64>
+}
+
+// CHECK:       builtin.module {
+// CHECK-NEXT:    func.func @Double(%0 : tensor<*xf64>) -> tensor<*xf64> {
+// CHECK-NEXT:      %1 = "uiua.add"(%0, %0) : (tensor<*xf64>, tensor<*xf64>) -> tensor<*xf64>
+// CHECK-NEXT:      func.return %1 : tensor<*xf64>
+// CHECK-NEXT:    }
+// CHECK-NEXT:    func.func @Quad(%0 : tensor<*xf64>) -> tensor<*xf64> {
+// CHECK-NEXT:      %1 = "uiua.add"(%0, %0) : (tensor<*xf64>, tensor<*xf64>) -> tensor<*xf64>
+// CHECK-NEXT:      %2 = "uiua.add"(%1, %1) : (tensor<*xf64>, tensor<*xf64>) -> tensor<*xf64>
+// CHECK-NEXT:      func.return %2 : tensor<*xf64>
+// CHECK-NEXT:    }
+// CHECK-NEXT:  }
@@ -0,0 +1,13 @@
+// RUN: xuiua lower %s 'materialize-dynamic-dims{sizes=8}' | filecheck %s
+
+func.func @main(%0 : tensor<?xf64>, %1 : tensor<?x3xf64>) -> (tensor<?x3xf64>) {
+  %2 = "stablehlo.broadcast_in_dim"(%0) {"broadcast_dimensions" = array<i64: 0>} : (tensor<?xf64>) -> tensor<?x3xf64>
+  %3 = "stablehlo.add"(%2, %1) : (tensor<?x3xf64>, tensor<?x3xf64>) -> tensor<?x3xf64>
+  func.return %3 : tensor<?x3xf64>
+}
+
+// CHECK:       func.func @main(%0 : tensor<8xf64>, %1 : tensor<8x3xf64>, %2 : tensor<i64>) -> tensor<8x3xf64> {
+// CHECK-NEXT:    %3 = "stablehlo.broadcast_in_dim"(%0) {"broadcast_dimensions" = array<i64: 0>} : (tensor<8xf64>) -> tensor<8x3xf64>
+// CHECK-NEXT:    %4 = "stablehlo.add"(%3, %1) : (tensor<8x3xf64>, tensor<8x3xf64>) -> tensor<8x3xf64>
+// CHECK-NEXT:    func.return %4 : tensor<8x3xf64>
+// CHECK-NEXT:  }
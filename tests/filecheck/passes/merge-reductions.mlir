@@ -0,0 +1,64 @@
+// RUN: xuiua lower %s 'merge-reductions' | filecheck %s
+
+// The sum and the sum of squares are merged, but not the reduction using the sum, the
+// reduction of a value of another shape, or the reduction without a known identity
+
+func.func @Moments(%0 : tensor<4xf64>, %1 : tensor<3xf64>) -> (tensor<f64>, tensor<f64>, tensor<f64>, tensor<f64>, tensor<f64>) {
+  %2 = "uiua.reduce"(%0) ({
+  ^0(%3 : tensor<f64>, %4 : tensor<f64>):
+    %5 = "uiua.add"(%3, %4) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+    "uiua.yield"(%5) : (tensor<f64>) -> ()
+  }) : (tensor<4xf64>) -> tensor<f64>
+  %6 = "uiua.multiply"(%0, %0) : (tensor<4xf64>, tensor<4xf64>) -> tensor<4xf64>
+  %7 = "uiua.reduce"(%6) ({
+  ^1(%8 : tensor<f64>, %9 : tensor<f64>):
+    %10 = "uiua.add"(%8, %9) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+    "uiua.yield"(%10) : (tensor<f64>) -> ()
+  }) : (tensor<4xf64>) -> tensor<f64>
+  %11 = "uiua.subtract"(%0, %2) : (tensor<4xf64>, tensor<f64>) -> tensor<4xf64>
+  %12 = "uiua.reduce"(%11) ({
+  ^2(%13 : tensor<f64>, %14 : tensor<f64>):
+    %15 = "uiua.maximum"(%13, %14) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+    "uiua.yield"(%15) : (tensor<f64>) -> ()
+  }) : (tensor<4xf64>) -> tensor<f64>
+  %16 = "uiua.reduce"(%1) ({
+  ^3(%17 : tensor<f64>, %18 : tensor<f64>):
+    %19 = "uiua.add"(%17, %18) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+    "uiua.yield"(%19) : (tensor<f64>) -> ()
+  }) : (tensor<3xf64>) -> tensor<f64>
+  %20 = "uiua.reduce"(%0) ({
+  ^4(%21 : tensor<f64>, %22 : tensor<f64>):
+    %23 = "uiua.subtract"(%21, %22) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+    "uiua.yield"(%23) : (tensor<f64>) -> ()
+  }) : (tensor<4xf64>) -> tensor<f64>
+  func.return %2, %7, %12, %16, %20 : tensor<f64>, tensor<f64>, tensor<f64>, tensor<f64>, tensor<f64>
+}
+
+// CHECK:       builtin.module {
+// CHECK-NEXT:    func.func @Moments(%0 : tensor<4xf64>, %1 : tensor<3xf64>) -> (tensor<f64>, tensor<f64>, tensor<f64>, tensor<f64>, tensor<f64>) {
+// CHECK-NEXT:      %2 = "uiua.multiply"(%0, %0) : (tensor<4xf64>, tensor<4xf64>) -> tensor<4xf64>
+// CHECK-NEXT:      %3, %4 = "uiua.reduce"(%0, %2) ({
+// CHECK-NEXT:      ^0(%5 : tensor<f64>, %6 : tensor<f64>, %7 : tensor<f64>, %8 : tensor<f64>):
+// CHECK-NEXT:        %9 = "uiua.add"(%5, %7) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+// CHECK-NEXT:        %10 = "uiua.add"(%6, %8) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+// CHECK-NEXT:        "uiua.yield"(%9, %10) : (tensor<f64>, tensor<f64>) -> ()
+// CHECK-NEXT:      }) : (tensor<4xf64>, tensor<4xf64>) -> (tensor<f64>, tensor<f64>)
+// CHECK-NEXT:      %11 = "uiua.subtract"(%0, %3) : (tensor<4xf64>, tensor<f64>) -> tensor<4xf64>
+// CHECK-NEXT:      %12 = "uiua.reduce"(%11) ({
+// CHECK-NEXT:      ^1(%13 : tensor<f64>, %14 : tensor<f64>):
+// CHECK-NEXT:        %15 = "uiua.maximum"(%13, %14) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+// CHECK-NEXT:        "uiua.yield"(%15) : (tensor<f64>) -> ()
+// CHECK-NEXT:      }) : (tensor<4xf64>) -> tensor<f64>
+// CHECK-NEXT:      %16 = "uiua.reduce"(%1) ({
+// CHECK-NEXT:      ^2(%17 : tensor<f64>, %18 : tensor<f64>):
+// CHECK-NEXT:        %19 = "uiua.add"(%17, %18) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+// CHECK-NEXT:        "uiua.yield"(%19) : (tensor<f64>) -> ()
+// CHECK-NEXT:      }) : (tensor<3xf64>) -> tensor<f64>
+// CHECK-NEXT:      %20 = "uiua.reduce"(%0) ({
+// CHECK-NEXT:      ^3(%21 : tensor<f64>, %22 : tensor<f64>):
+// CHECK-NEXT:        %23 = "uiua.subtract"(%21, %22) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+// CHECK-NEXT:        "uiua.yield"(%23) : (tensor<f64>) -> ()
+// CHECK-NEXT:      }) : (tensor<4xf64>) -> tensor<f64>
+// CHECK-NEXT:      func.return %3, %4, %12, %16, %20 : tensor<f64>, tensor<f64>, tensor<f64>, tensor<f64>, tensor<f64>
+// CHECK-NEXT:    }
+// CHECK-NEXT:  }
@@ -9,3 +9,20 @@
 // CHECK-NEXT:  %cast = "uiua.cast"(%t) : (tensor<2x3xf64>) -> tensor<*xf64>
 %cast = "uiua.cast"(%t) : (tensor<2x3xf64>) -> tensor<*xf64>
 
+// CHECK-NEXT:    %row = "test.op"() : () -> tensor<2xf64>
+%row = "test.op"() : () -> tensor<2xf64>
+
+// CHECK-NEXT:    %scalar = "test.op"() : () -> tensor<f64>
+%scalar = "test.op"() : () -> tensor<f64>
+
+// CHECK-NEXT:    %add_row = "uiua.add"(%row, %t) : (tensor<2xf64>, tensor<2x3xf64>) -> tensor<2x3xf64>
+%add_row = "uiua.add"(%row, %t) : (tensor<2xf64>, tensor<2x3xf64>) -> tensor<*xf64>
+
+// CHECK-NEXT:    %multiply_scalar = "uiua.multiply"(%t, %scalar) : (tensor<2x3xf64>, tensor<f64>) -> tensor<2x3xf64>
+%multiply_scalar = "uiua.multiply"(%t, %scalar) : (tensor<2x3xf64>, tensor<f64>) -> tensor<*xf64>
+
+// CHECK-NEXT:    %dynamic = "test.op"() : () -> tensor<?xf64>
+%dynamic = "test.op"() : () -> tensor<?xf64>
+
+// CHECK-NEXT:    %add_dynamic = "uiua.add"(%dynamic, %t) : (tensor<?xf64>, tensor<2x3xf64>) -> tensor<2x3xf64>
+%add_dynamic = "uiua.add"(%dynamic, %t) : (tensor<?xf64>, tensor<2x3xf64>) -> tensor<*xf64>
@@ -20,3 +20,4 @@ def test_shapes_encoding():
         "bla": (),
         "blo": ((1,),),
     }
+    assert parse_shapes_encoding("Add=?x3_?") == {"Add": ((-1, 3), (-1,))}
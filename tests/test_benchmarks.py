@@ -0,0 +1,39 @@
+from benchmarks.suite import KERNELS, compare_results, pass_input, run_benchmarks
+from xuiua.passes import AVAILABLE_PASSES
+
+
+def test_run_benchmarks():
+    results = run_benchmarks(sizes=(4,), repeat=2, filter="^(parse|execute)/add")
+
+    assert set(results["benchmarks"]) == {"parse/add", "execute/add/4"}
+    for result in results["benchmarks"].values():
+        assert result["repeat"] == 2
+        assert result["min"] <= result["median"]
+    assert "xdsl" in results["metadata"]["versions"]
+
+
+def test_all_passes_benchmarked():
+    for pass_name in AVAILABLE_PASSES:
+        _, p = pass_input(KERNELS["add"], 4, pass_name)
+        assert p.name == pass_name
+
+
+def test_compare_results():
+    old = {
+        "benchmarks": {
+            "a": {"median": 1.0},
+            "b": {"median": 2.0},
+            "c": {"error": "NotImplementedError"},
+            "d": {"median": 1.0},
+        }
+    }
+    new = {
+        "benchmarks": {
+            "a": {"median": 1.5},
+            "b": {"median": 1.0},
+            "c": {"median": 1.0},
+            "e": {"median": 1.0},
+        }
+    }
+    changes = compare_results(old, new)
+    assert [(c.name, c.ratio) for c in changes] == [("a", 1.5), ("b", 0.5)]
@@ -1,7 +1,21 @@
 import jax.numpy as jnp
+import pytest
+from xdsl.dialects.builtin import TensorType, f64
+from xdsl.traits import SymbolTable
 
 
-from xuiua.compile import a, run
+from xuiua.compile import (
+    PROGRAM_CACHE,
+    CacheKey,
+    ProgramCache,
+    a,
+    compile,
+    compile_dynamic,
+    compile_source,
+    next_power_of_two,
+    run,
+    run_batched,
+)
 import numpy as np
 
 
@@ -16,6 +30,26 @@ def test_compile_add():
     assert (res == C).all()
 
 
+def test_compile_multiply():
+    A = a((2, 3, 4.5))
+    B = a((4, 5, 6.0))
+
+    (res,) = run("×", (A, B))
+
+    assert (res == A * B).all()
+
+
+def test_compile_broadcast():
+    A = a((1, 2, 3, 4)).reshape((2, 2))
+
+    (res,) = run("×2", (A,))
+    assert (res == A * 2).all()
+
+    # The values of the smaller array are repeated along the trailing dimensions
+    (res,) = run("+", (a((1, 2)), A))
+    assert (res == a((2, 3, 5, 6)).reshape((2, 2))).all()
+
+
 def test_dtype():
     my_np_array = np.array((1.0,), dtype=np.float64)
     assert my_np_array.dtype == np.float64
@@ -34,3 +68,186 @@ def test_compile_sum():
     (res,) = run("/+", (A,))
 
     assert (res == B).all()
+
+
+def test_compile_product():
+    A = a((2, 3, 4, 4.5, 5.5, 6.5)).reshape((2, 3))
+
+    (res,) = run("/×", (A,))
+
+    assert (res == A.prod(axis=0)).all()
+
+
+def test_compile_maximum_minimum():
+    A = a((2, 3, 4, 4.5, 5.5, 1.5)).reshape((2, 3))
+
+    (res,) = run("/↥", (A,))
+    assert (res == A.max(axis=0)).all()
+
+    (res,) = run("/↧", (A,))
+    assert (res == A.min(axis=0)).all()
+
+
+def test_compile_reduce_without_identity():
+    A = a((2, 3, 4, 4.5, 5.5, 6.5)).reshape((2, 3))
+
+    (res,) = run("/(+×2)", (A,))
+
+    assert (res == A[0] + 2 * A[1]).all()
+
+    with pytest.raises(ValueError, match="Cannot reduce an empty array"):
+        compile("/-", ((0, 3),))
+    with pytest.raises(NotImplementedError, match="of a dynamic dimension"):
+        compile_dynamic("/-", ((-1,),))
+
+
+def test_executable_cache():
+    PROGRAM_CACHE.clear()
+    A = a((1, 2))
+    B = a((3, 4))
+
+    run("+", (A, B))
+    assert (PROGRAM_CACHE.hits, PROGRAM_CACHE.misses) == (0, 1)
+
+    (res,) = run("+", (B, A))
+    assert (res == a((4, 6))).all()
+    assert (PROGRAM_CACHE.hits, PROGRAM_CACHE.misses) == (1, 1)
+
+    run("+", (a((1, 2, 3)), a((4, 5, 6))))
+    assert (PROGRAM_CACHE.hits, PROGRAM_CACHE.misses) == (1, 2)
+    assert len(PROGRAM_CACHE) == 2
+
+    PROGRAM_CACHE.clear()
+    assert len(PROGRAM_CACHE) == 0
+    assert (PROGRAM_CACHE.hits, PROGRAM_CACHE.misses) == (0, 0)
+
+
+def test_executable_cache_eviction():
+    cache = ProgramCache(maxsize=2)
+    keys = tuple(
+        CacheKey("main ← +", "main", ((i,), (i,)), ("float64",) * 2) for i in range(3)
+    )
+    programs = tuple(object() for _ in keys)
+
+    cache.put(keys[0], programs[0])  # pyright: ignore[reportArgumentType]
+    cache.put(keys[1], programs[1])  # pyright: ignore[reportArgumentType]
+    # Touch the first entry so that the second one is evicted
+    assert cache.get(keys[0]) is programs[0]
+    cache.put(keys[2], programs[2])  # pyright: ignore[reportArgumentType]
+
+    assert keys[0] in cache
+    assert keys[1] not in cache
+    assert keys[2] in cache
+
+
+def test_compile_program():
+    program = compile("+", ((3,), (3,)))
+    assert program.input_types == (TensorType(f64, (3,)),) * 2
+    assert program.output_types == (TensorType(f64, (3,)),)
+    assert SymbolTable.lookup_symbol(program.module, "main") is not None
+
+    (res,) = program(a((2, 3, 4.5)), a((4, 5, 6.0)))
+    assert (res == a((6, 8, 10.5))).all()
+
+    with pytest.raises(ValueError, match="Expected 2 inputs, got 1"):
+        program(a((2, 3, 4.5)))
+
+    with pytest.raises(ValueError, match="Unsupported dtype int8"):
+        compile("+", ((3,), (3,)), ("int8", "int8"))
+
+
+def test_compile_source_entry():
+    source = "Add ← +\nMul ← ×\n"
+    program = compile_source(source, "Add", ((2,), (2,)))
+    (res,) = program(a((1, 2)), a((3, 4)))
+    assert (res == a((4, 6))).all()
+
+    with pytest.raises(ValueError, match="No function named Sub"):
+        compile_source(source, "Sub", ((2,), (2,)))
+
+
+def test_compile_calls():
+    source = "Double ← +.\nQuad ← Double Double\nMain ← Quad +1\n"
+    program = compile_source(source, "Main", ((3,),))
+
+    (main_op,) = program.module.body.ops
+    assert not any(op.name == "func.call" for op in main_op.walk())
+    (res,) = program(a((0, 1, 2)))
+    assert (res == a((4, 8, 12))).all()
+
+
+def test_compile_canonicalized():
+    source = "Main ← ×+1 2 +2 ×2\n"
+    program = compile_source(source, "Main", ((3,),))
+
+    # 1 + 2 is folded, and the constant 2 is only defined once
+    (main_op,) = program.module.body.ops
+    assert sum(op.name == "stablehlo.multiply" for op in main_op.walk()) == 2
+    assert sum(op.name == "arith.constant" for op in main_op.walk()) == 2
+    (res,) = program(a((0, 1, 2)))
+    assert (res == (a((0, 1, 2)) * 2 + 2) * 3).all()
+
+
+def test_compile_array_constants():
+    (res,) = run("×[[1 2] [3 4]] +[1 2]", (a((0, 1)),))
+    assert (res == a((1, 2, 9, 12)).reshape((2, 2))).all()
+
+    with pytest.raises(ValueError, match="different shapes"):
+        run("[1 [2 3]]", ())
+
+    with pytest.raises(NotImplementedError, match="computed values"):
+        run("[+1 2]", ())
+
+
+def test_run_batched():
+    A = a(tuple(range(12))).reshape((4, 3))
+    B = a(tuple(range(12, 24))).reshape((4, 3))
+
+    (res,) = run_batched("+", (A, B))
+    assert (res == A + B).all()
+
+    # Constants are broadcast along the batch dimension
+    (res,) = run_batched("×2", (A,))
+    assert (res == A * 2).all()
+
+    program = compile("×2", ((3,),), batch_size=4)
+    assert program.input_types == (TensorType(f64, (4, 3)),)
+    assert program.output_types == (TensorType(f64, (4, 3)),)
+
+    with pytest.raises(ValueError, match="leading dimension of size 4"):
+        run_batched("+", (A, a((1, 2, 3))))
+
+
+def test_compile_dynamic():
+    program = compile_dynamic("+", ((-1,), (-1, 3)), bucket=next_power_of_two)
+
+    for n in (3, 4, 5):
+        A = a(tuple(range(n)))
+        B = a(tuple(range(3 * n))).reshape((n, 3))
+        (res,) = program(A, B)
+        assert res.shape == (n, 3)
+        assert (res == A[:, None] + B).all()
+
+    # 3 and 4 share a bucket
+    assert sorted(program.programs) == [(4,), (8,)]
+
+    with pytest.raises(ValueError, match="to have size 3"):
+        program(a((1, 2, 3)), a(tuple(range(12))).reshape((4, 3)))
+
+
+def test_compile_dynamic_sum():
+    program = compile_dynamic("/+", ((-1, 2),), bucket=next_power_of_two)
+
+    for n in (1, 3, 5):
+        A = a(tuple(range(2 * n))).reshape((n, 2))
+        (res,) = program(A)
+        assert (res == A.sum(axis=0)).all()
+
+
+@pytest.mark.parametrize("expr", ["\\+", "\\(+×2)"])
+def test_compile_dynamic_scan(expr: str):
+    # Scans are only lowered for static lengths, rather than returning the input
+    with pytest.raises(NotImplementedError, match="uiua.scan of a dynamic dimension"):
+        compile_dynamic(expr, ((-1,),))
+    with pytest.raises(NotImplementedError, match="uiua.scan of a dynamic dimension"):
+        compile_dynamic(expr, ((-1, 2),), bucket=next_power_of_two)
@@ -0,0 +1,73 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import xuiua.compile
+from xuiua.compile import a, compile_uncached
+from xuiua.disk_cache import DiskCache, DiskCacheEntry
+
+
+def test_make_key():
+    key = DiskCache.make_key(
+        "+", "main", ((2,), (2,)), ("float64",) * 2, "remove-casts"
+    )
+    assert key == DiskCache.make_key(
+        "+", "main", ((2,), (2,)), ("float64",) * 2, "remove-casts"
+    )
+    assert key != DiskCache.make_key(
+        "+", "main", ((3,), (3,)), ("float64",) * 2, "remove-casts"
+    )
+    assert key != DiskCache.make_key(
+        "+", "Add", ((2,), (2,)), ("float64",) * 2, "remove-casts"
+    )
+    assert key != DiskCache.make_key("+", "main", ((2,), (2,)), ("float64",) * 2, "")
+    assert key != DiskCache.make_key("×", "main", ((2,), (2,)), ("float64",) * 2, "")
+
+
+def test_get_put(tmp_path: Path):
+    cache = DiskCache(tmp_path)
+    assert cache.get("key") is None
+
+    cache.put("key", DiskCacheEntry("builtin.module {}", None))
+    assert cache.get("key") == DiskCacheEntry("builtin.module {}", None)
+
+    cache.put("key", DiskCacheEntry("builtin.module {}", b"executable"))
+    assert cache.get("key") == DiskCacheEntry("builtin.module {}", b"executable")
+
+    # No temporary files are left behind
+    assert sorted(f.name for f in tmp_path.iterdir()) == ["key.mlir", "key.xla"]
+
+    cache.clear()
+    assert cache.get("key") is None
+
+
+def test_eviction(tmp_path: Path):
+    cache = DiskCache(tmp_path, max_bytes=10)
+    cache.put("second", DiskCacheEntry("12345", None))
+    cache.put("first", DiskCacheEntry("12345", None))
+    # Make the access order explicit, independent of the file system's resolution
+    os.utime(tmp_path / "first.mlir", (1, 1))
+    os.utime(tmp_path / "second.mlir", (2, 2))
+
+    cache.put("third", DiskCacheEntry("12345", None))
+    assert cache.get("first") is None
+    assert cache.get("second") is not None
+    assert cache.get("third") is not None
+
+
+def test_compile_with_disk_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(xuiua.compile, "DISK_CACHE", DiskCache(tmp_path))
+
+    shapes = ((2,), (2,))
+    dtypes = ("float64",) * 2
+    first = compile_uncached("main ← +", "main", shapes, dtypes)
+    assert len(tuple(tmp_path.glob("*.mlir"))) == 1
+
+    # Loaded from disk, as if by another process
+    second = compile_uncached("main ← +", "main", shapes, dtypes)
+    assert second.input_types == first.input_types
+    assert second.output_types == first.output_types
+
+    (res,) = second(a((1, 2)), a((3, 4)))
+    assert (res == a((4, 6))).all()
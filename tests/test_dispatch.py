@@ -0,0 +1,101 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from xuiua import dispatch
+from xuiua.compile import PROGRAM_CACHE
+from xuiua.dispatch import (
+    DEFAULT_THRESHOLD,
+    THRESHOLD_ENV,
+    DispatchConfig,
+    Dispatcher,
+    Route,
+    calibrate,
+    calibrated_threshold,
+    estimate_work,
+)
+from xuiua.frontend.ir_gen import build_module
+from xuiua.frontend.parser import Parser
+
+SOURCE = "main ← ×2"
+A = np.arange(6.0).reshape((2, 3))
+
+
+def test_estimate_work():
+    module = build_module(Parser(SOURCE).parse_items())
+    # The constant, the multiplication and the return
+    assert estimate_work(module, "main", (A,)) == 6 * 3
+
+    with pytest.raises(ValueError, match="No function named other"):
+        estimate_work(module, "other", (A,))
+
+
+def test_dispatch_routes():
+    PROGRAM_CACHE.clear()
+    module = build_module(Parser(SOURCE).parse_items())
+
+    interpreting = Dispatcher(DispatchConfig(threshold=100))
+    assert interpreting.route(module, SOURCE, "main", (A,)) == Route.INTERPRET
+    (res,) = interpreting.run("×2", (A,))
+    assert (res == A * 2).all()
+
+    compiling = Dispatcher(DispatchConfig(threshold=0))
+    assert compiling.route(module, SOURCE, "main", (A,)) == Route.COMPILE
+    (res,) = compiling.run("×2", (A,))
+    assert (np.asarray(res) == A * 2).all()
+
+    # Compiled programs are reused, even for small inputs
+    assert interpreting.route(module, SOURCE, "main", (A,)) == Route.CACHED
+
+
+def test_dispatch_unsupported():
+    # The length of the range is only known at runtime, so the program is only
+    # supported by the interpreter, even for inputs worth compiling
+    n = 100_000
+    inputs = (np.arange(float(n)), np.array(float(n)))
+    dispatcher = Dispatcher(DispatchConfig(threshold=1000))
+    module = build_module(Parser("main ← +⇡").parse_items())
+    assert dispatcher.route(module, "main ← +⇡", "main", inputs) == Route.COMPILE
+
+    (res,) = dispatcher.run("+⇡", inputs)
+    assert (res == 2 * np.arange(float(n))).all()
+
+
+def test_dispatch_integer_inputs():
+    # Converted to float64 before compiling, as when interpreting
+    inputs = (np.arange(6).reshape((2, 3)),)
+    for threshold in (0, 100):
+        (res,) = Dispatcher(DispatchConfig(threshold=threshold)).run("×2", inputs)
+        assert (np.asarray(res) == A * 2).all()
+
+
+def test_threshold_env(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv(THRESHOLD_ENV, raising=False)
+    # Not calibrated unless asked to
+    monkeypatch.setattr(dispatch, "calibrated_threshold", lambda: 12.5)
+    assert DispatchConfig().get_threshold() == DEFAULT_THRESHOLD
+    assert DispatchConfig(calibrate=True).get_threshold() == 12.5
+
+    monkeypatch.setenv(THRESHOLD_ENV, "7.5")
+    assert DispatchConfig().get_threshold() == 7.5
+    assert DispatchConfig(threshold=3).get_threshold() == 3
+
+
+def test_calibrate():
+    assert calibrate(size=1024, repeat=1) > 0
+
+
+def test_calibration_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("XUIUA_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(dispatch, "calibrate", lambda: 12.5)
+    calibrated_threshold.cache_clear()
+    try:
+        assert calibrated_threshold() == 12.5
+    finally:
+        calibrated_threshold.cache_clear()
+
+    # Written through a temporary file, which does not remain
+    assert [path.name for path in tmp_path.iterdir()] == ["dispatch.json"]
+    assert json.loads((tmp_path / "dispatch.json").read_text())["threshold"] == 12.5
@@ -0,0 +1,103 @@
+import pytest
+from xdsl.parser import Input
+
+from xuiua.frontend.ast import BindingItem
+from xuiua.frontend.incremental import (
+    IncrementalModule,
+    IncrementalParser,
+    TextEdit,
+    shift_spans,
+)
+from xuiua.frontend.ir_gen import build_module
+from xuiua.frontend.parser import ParseError, Parser
+
+SOURCE = """\
+ff ← +1 2
+gg ← ×3
++ 1
+# comment
+hh ← (+ 2)
+"""
+
+
+def check_edit(edit: TextEdit):
+    incremental = IncrementalModule(Input(SOURCE, "test.ua"))
+    module = incremental.apply_edit(edit)
+
+    input = Input(edit.apply(SOURCE), "test.ua")
+    items = Parser(input).parse_items()
+    assert shift_spans(incremental.parser.items, 0, input) == items
+    assert str(module) == str(build_module(items))
+    item = incremental.parser.items.items[0]
+    assert isinstance(item, BindingItem)
+    for line in item.words:
+        assert line.span.text == input.content[line.span.start : line.span.end]
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        # Same length
+        TextEdit(8, 9, "7"),
+        # Longer
+        TextEdit(8, 9, "1234"),
+        # New binding
+        TextEdit(10, 10, "ii ← 5\n"),
+        # Removed binding
+        TextEdit(10, 18, ""),
+        # Binding turned into words, merged with the next words
+        TextEdit(10, 15, ""),
+        # Words turned into a binding
+        TextEdit(18, 18, "jj ←"),
+        # Edit at the end
+        TextEdit(len(SOURCE), len(SOURCE), "×2"),
+        # Multiline
+        TextEdit(5, 32, "4\n+ 3\n"),
+    ],
+)
+def test_incremental_edit(edit: TextEdit):
+    check_edit(edit)
+
+
+def test_unchanged_items_reused():
+    parser = IncrementalParser(SOURCE)
+    before = parser.source_items[0].item
+
+    items_edit = parser.apply_edit(TextEdit(20, 21, "5"))
+
+    assert items_edit.first == 2
+    assert len(items_edit.removed) == len(items_edit.inserted) == 1
+    assert parser.source_items[0].item is before
+
+
+def test_unchanged_funcs_reused():
+    incremental = IncrementalModule(SOURCE)
+    ff, gg, hh = (op for op in incremental.func_ops if op is not None)
+
+    incremental.apply_edit(TextEdit(16, 17, "4"))
+
+    assert incremental.func_ops[0] is ff
+    assert incremental.func_ops[1] is not gg
+    assert incremental.func_ops[3] is hh
+
+
+def test_incremental_parse_error():
+    parser = IncrementalParser(SOURCE)
+
+    with pytest.raises(ParseError):
+        parser.apply_edit(TextEdit(8, 8, ")"))
+
+    assert parser.input.content == SOURCE
+
+
+def test_callers_rebuilt():
+    source = "ff ← +\ngg ← ff 1\nhh ← ×2\n"
+    incremental = IncrementalModule(source)
+    hh_op = incremental.func_ops[2]
+
+    # ff now takes a single argument, so gg does too
+    edit = TextEdit(5, 6, "×2")
+    module = incremental.apply_edit(edit)
+
+    assert str(module) == str(build_module(Parser(edit.apply(source)).parse_items()))
+    assert incremental.func_ops[2] is hh_op
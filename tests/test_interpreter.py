@@ -0,0 +1,299 @@
+from typing import Any
+
+import numpy as np
+import pytest
+from xdsl.ir import Block
+from xdsl.parser import Parser as XDSLParser
+
+from xuiua.compile import get_ctx, run
+from xuiua import interpreter
+from xuiua.dialect import FusedOp, ReduceOp
+from xuiua.frontend.ir_gen import build_module
+from xuiua.frontend.parser import Parser
+from xuiua.interpreter import interpret, interpret_module
+from xuiua.passes.merge_reductions import MergeReductionsPass
+
+A = np.arange(6.0).reshape((2, 3))
+
+
+def test_interpret_pervasive():
+    (res,) = interpret("+", (A, A))
+    assert (res == A + A).all()
+
+    (res,) = interpret("×2", (A,))
+    assert (res == A * 2).all()
+
+    # The values of the smaller array are repeated along the trailing dimensions
+    (res,) = interpret("+", (np.array((1.0, 2.0)), A))
+    assert (res == A + np.array(((1.0,), (2.0,)))).all()
+
+    with pytest.raises(ValueError, match="do not match"):
+        interpret("+", (np.array((1.0, 2.0, 3.0)), A))
+
+
+def test_interpret_reduce():
+    (res,) = interpret("/+", (A,))
+    assert (res == A.sum(axis=0)).all()
+
+    (res,) = interpret("/×", (A,))
+    assert (res == A.prod(axis=0)).all()
+
+    # Bodies without a known ufunc are evaluated row by row
+    (res,) = interpret("/(+×2)", (A,))
+    assert (res == A[0] + 2 * A[1]).all()
+
+
+def test_interpret_call():
+    module = XDSLParser(
+        get_ctx(),
+        """
+        func.func @Double(%0 : tensor<*xf64>) -> tensor<*xf64> {
+          %1 = "uiua.add"(%0, %0) : (tensor<*xf64>, tensor<*xf64>) -> tensor<*xf64>
+          func.return %1 : tensor<*xf64>
+        }
+        func.func @main(%0 : tensor<*xf64>) -> tensor<*xf64> {
+          %1 = func.call @Double(%0) : (tensor<*xf64>) -> tensor<*xf64>
+          func.return %1 : tensor<*xf64>
+        }
+        """,
+    ).parse_module()
+
+    (res,) = interpret_module(module, "main", (A,))
+    assert (res == A * 2).all()
+
+
+@pytest.mark.parametrize("expr", ["+1×2+3", "/+×2", "/×+1×2", "+1/+×2 ×3"])
+def test_interpret_fused(expr: str, monkeypatch: pytest.MonkeyPatch):
+    # Two rows per chunk
+    monkeypatch.setattr(interpreter, "CHUNK_ELEMENTS", 6)
+    inputs = (np.arange(24.0).reshape((8, 3)) / 8,)
+
+    # The blocks fused in the copy of the module that is evaluated
+    fused_blocks: list[Block] = []
+    fuse_block = interpreter.fuse_block
+    monkeypatch.setattr(
+        interpreter,
+        "fuse_block",
+        lambda block: (fuse_block(block), fused_blocks.append(block)),
+    )
+    module = build_module(Parser("main ← " + expr).parse_items())
+    (res,) = interpret_module(module, "main", inputs)
+    assert any(isinstance(op, FusedOp) for block in fused_blocks for op in block.ops)
+    assert not any(isinstance(op, FusedOp) for op in module.walk())
+
+    # Evaluated whole, without fusing
+    monkeypatch.setattr(interpreter, "fuse_block", lambda block: None)
+    module = build_module(Parser("main ← " + expr).parse_items())
+    (expected,) = interpret_module(module, "main", inputs)
+    assert np.allclose(res, expected)
+
+
+@pytest.mark.parametrize("expr", ["+", "×", "×2", "+1", "/+", "/×", "/-", "/(+×2)"])
+def test_interpreter_matches_compiled(expr: str):
+    inputs = (A, A) if expr in ("+", "×") else (A,)
+    expected = run(expr, inputs)
+    res = interpret(expr, inputs)
+    assert all((r == np.asarray(e)).all() for r, e in zip(res, expected, strict=True))
+
+
+B = np.array(((0.5, 2.0, -1.0), (3.0, 0.0, 4.5)))
+
+MONADIC = {
+    "¬": lambda x: 1 - x,
+    "±": np.sign,
+    "¯": np.negative,
+    "⌵": np.abs,
+    "√": np.sqrt,
+    "∿": np.sin,
+    "⌊": np.floor,
+    "⌈": np.ceil,
+    "⁅": lambda x: np.copysign(np.floor(np.abs(x) + 0.5), x),
+}
+
+DYADIC = {
+    "=": np.equal,
+    "≠": np.not_equal,
+    "<": np.less,
+    "≤": np.less_equal,
+    ">": np.greater,
+    "≥": np.greater_equal,
+    "-": np.subtract,
+    "÷": np.divide,
+    "◿": np.mod,
+    "ⁿ": np.power,
+    # The logarithm of the first argument in the base of the second
+    "ₙ": lambda x, y: np.log(x) / np.log(y),
+    "↧": np.minimum,
+    "↥": np.maximum,
+    # The first argument is the x coordinate
+    "∠": lambda x, y: np.arctan2(y, x),
+}
+
+
+@pytest.mark.parametrize("expr", MONADIC)
+def test_interpret_monadic_pervasive(expr: str):
+    inputs = (np.abs(B),) if expr == "√" else (B - 0.5,)
+    expected = MONADIC[expr](*inputs)
+    for res in (interpret(expr, inputs), run(expr, inputs)):
+        assert np.allclose(res[0], expected)
+
+
+@pytest.mark.parametrize("expr", DYADIC)
+def test_interpret_dyadic_pervasive(expr: str):
+    match expr:
+        case "ⁿ" | "ₙ":
+            inputs = (A + 2, np.abs(B) + 2)
+        case "÷" | "◿":
+            inputs = (A, B + 5)
+        case _:
+            inputs = (A - 2, B)
+    expected = DYADIC[expr](*inputs)
+    for res in (interpret(expr, inputs), run(expr, inputs)):
+        assert np.allclose(res[0], expected)
+
+
+ARRAY = {
+    "⇌": lambda x: x[::-1],
+    "⍉": lambda x: x.T,
+    "↯[3 2]": lambda x: x.reshape((3, 2)),
+    "↯[¯1 1]": lambda x: x.reshape((6, 1)),
+    "↯2": lambda x: np.stack((x, x)),
+    "⊂[9 9 9]": lambda x: np.vstack(((9, 9, 9), x)),
+    "↙1": lambda x: x[:1],
+    "↙¯1": lambda x: x[-1:],
+    "↘1": lambda x: x[1:],
+    "↘¯3": lambda x: x[:0],
+    "⊂⇡3 ↘1": lambda x: np.vstack(((0, 1, 2), x[1:])),
+}
+
+
+@pytest.mark.parametrize("expr", ARRAY)
+def test_interpret_array(expr: str):
+    inputs = (A,)
+    expected = ARRAY[expr](A)
+    for res in (interpret(expr, inputs), run(expr, inputs)):
+        assert np.asarray(res[0]).shape == expected.shape
+        assert (np.asarray(res[0]) == expected).all()
+
+
+def test_interpret_array_errors():
+    with pytest.raises(ValueError, match="Cannot take 3 rows"):
+        interpret("↙3", (A,))
+
+    with pytest.raises(ValueError, match="Cannot join"):
+        interpret("⊂", (A, np.arange(2.0)))
+
+    # The shape of the result must be known when compiling
+    with pytest.raises(NotImplementedError, match="computed at runtime"):
+        run("⇡", (np.array(3.0),))
+    (res,) = interpret("⇡", (np.array(3.0),))
+    assert (res == np.arange(3.0)).all()
+
+
+@pytest.mark.parametrize("length", [0, 1, 2, 5, 8, 13])
+@pytest.mark.parametrize(
+    "expr, expected",
+    [
+        ("\\+", lambda x: np.cumsum(x, axis=0)),
+        ("\\↥", lambda x: np.maximum.accumulate(x, axis=0)),
+        # Not associative, so evaluated row by row
+        ("\\(+×2)", lambda x: np.cumsum(x * 2, axis=0) - (x[:1] if len(x) else 0)),
+    ],
+)
+def test_interpret_scan(expr: str, expected: Any, length: int):
+    inputs = (np.arange(length * 3.0).reshape((length, 3)),)
+    for res in (interpret(expr, inputs), run(expr, inputs)):
+        assert np.allclose(res[0], expected(inputs[0]))
+        assert np.asarray(res[0]).shape == (length, 3)
+
+
+@pytest.mark.parametrize("length", [0, 1, 5])
+def test_interpret_fold(length: int):
+    rows = np.arange(length * 3.0).reshape((length, 3))
+    inputs = (np.ones(3), rows)
+    for res in (interpret("∧(+×2)", inputs), run("∧(+×2)", inputs)):
+        assert np.allclose(res[0], 1 + 2 * rows.sum(axis=0))
+
+    # The top of the stack is the array, and the initial accumulator is below it
+    (res,) = interpret("∧-", (np.array(10.0), np.arange(4.0)))
+    assert res == 10 - 0 - 1 - 2 - 3
+
+
+ITERATING: dict[str, Any] = {
+    "≡⇌": lambda x: x[:, ::-1],
+    "≡(↙2)": lambda x: x[:, :2],
+    "≡(⊂9)": lambda x: np.hstack((np.full((2, 1), 9), x)),
+    "≡(+⇡3)": lambda x: x + np.arange(3),
+    "≡≡(+1)": lambda x: x + 1,
+    # Loops over the elements of each row, batched into a single loop
+    "≡(\\(+×2))": lambda x: np.cumsum(x * 2, axis=1) - x[:, :1],
+    "∵(+1 ×2)": lambda x: x * 2 + 1,
+    "≡(×⇌)": lambda x, y: x * y[:, ::-1],
+    "≡∧+": lambda x, y: x + y.sum(axis=1, keepdims=True),
+    "∵-": lambda x, y: x - y,
+}
+
+
+@pytest.mark.parametrize("expr", ITERATING)
+def test_interpret_iterating(expr: str):
+    expected = ITERATING[expr]
+    inputs = (B, A)[: expected.__code__.co_argcount]
+    for res in (interpret(expr, inputs), run(expr, inputs)):
+        assert np.asarray(res[0]).shape == expected(*inputs).shape
+        assert np.allclose(res[0], expected(*inputs))
+
+
+def test_interpret_iterating_errors():
+    with pytest.raises(ValueError, match="Cannot apply uiua.rows to arrays of shapes"):
+        interpret("≡+", (A, A[:1]))
+
+    with pytest.raises(ValueError, match="Cannot apply uiua.each to arrays of shapes"):
+        run("∵+", (A, A[0]))
+
+    # The shapes of the results are known without any row
+    (res,) = interpret("≡(↙2)", (np.zeros((0, 3)),))
+    assert res.shape == (0, 2)
+
+
+def test_interpret_merged_reduce():
+    module = XDSLParser(
+        get_ctx(),
+        """
+        func.func @main(%0 : tensor<4xf64>) -> (tensor<f64>, tensor<f64>, tensor<f64>, tensor<f64>) {
+          %1 = "uiua.reduce"(%0) ({
+          ^0(%2 : tensor<f64>, %3 : tensor<f64>):
+            %4 = "uiua.add"(%2, %3) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+            "uiua.yield"(%4) : (tensor<f64>) -> ()
+          }) : (tensor<4xf64>) -> tensor<f64>
+          %5 = "uiua.multiply"(%0, %0) : (tensor<4xf64>, tensor<4xf64>) -> tensor<4xf64>
+          %6 = "uiua.reduce"(%5) ({
+          ^1(%7 : tensor<f64>, %8 : tensor<f64>):
+            %9 = "uiua.add"(%7, %8) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+            "uiua.yield"(%9) : (tensor<f64>) -> ()
+          }) : (tensor<4xf64>) -> tensor<f64>
+          %10 = "uiua.reduce"(%0) ({
+          ^2(%11 : tensor<f64>, %12 : tensor<f64>):
+            %13 = "uiua.multiply"(%11, %12) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+            %14 = "uiua.add"(%13, %12) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+            "uiua.yield"(%14) : (tensor<f64>) -> ()
+          }) : (tensor<4xf64>) -> tensor<f64>
+          %15 = "uiua.reduce"(%0) ({
+          ^3(%16 : tensor<f64>, %17 : tensor<f64>):
+            %18 = "uiua.subtract"(%16, %17) : (tensor<f64>, tensor<f64>) -> tensor<f64>
+            "uiua.yield"(%18) : (tensor<f64>) -> ()
+          }) : (tensor<4xf64>) -> tensor<f64>
+          func.return %1, %6, %10, %15 : tensor<f64>, tensor<f64>, tensor<f64>, tensor<f64>
+        }
+        """,
+    ).parse_module()
+    MergeReductionsPass().apply(get_ctx(), module)
+    # The reductions without a known identity are merged separately
+    assert sum(isinstance(op, ReduceOp) for op in module.walk()) == 2
+
+    x = np.array([1.0, 2.0, 3.0, 4.0])
+    total, squares, horner, difference = interpret_module(module, "main", (x,))
+    assert total == x.sum()
+    assert squares == (x * x).sum()
+    # Bodies without a known ufunc are evaluated row by row
+    assert horner == ((1.0 * 2.0 + 2.0) * 3.0 + 3.0) * 4.0 + 4.0
+    assert difference == 1.0 - 2.0 - 3.0 - 4.0
@@ -5,14 +5,17 @@ import pytest
 from xdsl.parser import Span
 from xuiua.frontend.ast import (
     Array,
+    BindingItem,
     Number,
     Primitive,
     PrimitiveSpelling,
+    Ref,
     Spaces,
     Spanned,
     WordsItem,
     Items,
 )
+from xuiua.frontend.lexer import TokenKind, Tokens
 from xuiua.frontend.parser import ParseError, Parser
 
 
@@ -21,6 +24,10 @@ def test_parse_number():
 
     assert parser.parse_optional_number() == Number("1.1", 1.1)
 
+    parser = Parser("¯2.5")
+
+    assert parser.parse_optional_number() == Number("¯2.5", -2.5)
+
 
 def test_parse_array():
     parser = Parser(" [1.0 2.3]", pos=1)
@@ -108,7 +115,7 @@ def test_empty_words_item():
 
 
 def test_fail():
-    parser = Parser("- [1.0 2.3] [5 6]")
+    parser = Parser("$ [1.0 2.3] [5 6]")
 
     with pytest.raises(ParseError, match="Could not parse remaining string"):
         parser.parse_items()
@@ -118,3 +125,88 @@ def test_parse_primitive():
     parser = Parser("+")
 
     assert parser.parse_optional_primitive() == Primitive(PrimitiveSpelling.ADD)
+
+
+def test_tokens():
+    tokens = Tokens("f ← [1.5 +]# c\n(×)x")
+
+    assert list(tokens.kinds) == [
+        TokenKind.UNKNOWN,
+        TokenKind.SPACE,
+        TokenKind.ARROW,
+        TokenKind.SPACE,
+        TokenKind.OPEN_BRACKET,
+        TokenKind.NUMBER,
+        TokenKind.SPACE,
+        TokenKind.PRIMITIVE,
+        TokenKind.CLOSE_BRACKET,
+        TokenKind.COMMENT,
+        TokenKind.NEWLINE,
+        TokenKind.OPEN_PAREN,
+        TokenKind.PRIMITIVE,
+        TokenKind.CLOSE_PAREN,
+        TokenKind.UNKNOWN,
+        TokenKind.END,
+    ]
+    assert [tokens.text(i) for i in range(len(tokens))] == [
+        "f",
+        " ",
+        "←",
+        " ",
+        "[",
+        "1.5",
+        " ",
+        "+",
+        "]",
+        "# c",
+        "\n",
+        "(",
+        "×",
+        ")",
+        "x",
+        "",
+    ]
+
+
+def test_parse_binding_item():
+    parser = Parser("main ← +\n+")
+
+    assert parser.parse_binding_item() == BindingItem(
+        "main",
+        Span(5, 6, parser.input),
+        True,
+        False,
+        None,
+        (
+            Spanned(Spaces(), Span(6, 7, parser.input)),
+            Spanned(Primitive(PrimitiveSpelling.ADD), Span(7, 8, parser.input)),
+        ),
+    )
+    assert parser.pos == 9
+
+
+def test_parse_not_binding_item():
+    parser = Parser("main +")
+
+    assert parser.parse_binding_item() is None
+    assert parser.pos == 0
+
+
+def test_parse_ref():
+    parser = Parser("Double +")
+
+    assert parser.parse_word_line() == (
+        Spanned(Ref("Double"), Span(0, 6, parser.input)),
+        Spanned(Spaces(), Span(6, 7, parser.input)),
+        Spanned(Primitive(PrimitiveSpelling.ADD), Span(7, 8, parser.input)),
+    )
+
+
+def test_parse_words_before_binding():
+    parser = Parser("+ Double\nQuad ← Double Double")
+
+    items = parser.parse_items().items
+
+    assert isinstance(items[0], WordsItem)
+    assert isinstance(items[1], BindingItem)
+    assert items[1].name == "Quad"
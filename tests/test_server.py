@@ -0,0 +1,154 @@
+import io
+import json
+import socket
+import threading
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from xuiua.frontend.incremental import TextEdit
+from xuiua.server import (
+    INVALID_PARAMS,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    SERVER_ERROR,
+    Server,
+    serve_socket,
+    serve_stream,
+)
+
+
+def request(method: str, request_id: int = 1, **params: Any) -> dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+
+
+def test_lower():
+    server = Server()
+
+    response = server.handle(request("lower", source="ff ← +1\n"))
+
+    assert response is not None
+    assert response["id"] == 1
+    assert "func.func @ff" in response["result"]["ir"]
+
+
+def test_lower_passes():
+    server = Server()
+
+    response = server.handle(
+        request("lower", source="ff ← +1\n", passes='add-shapes{shapes="ff=3"}')
+    )
+
+    assert response is not None
+    assert "tensor<3xf64>" in response["result"]["ir"]
+
+
+def test_parse_file(tmp_path: Path):
+    src = tmp_path / "add.ua"
+    src.write_text("ff ← +1\n")
+    server = Server()
+
+    response = server.handle(request("parse", path=str(src)))
+
+    assert response is not None
+    assert "name: ff" in response["result"]["ast"]
+
+
+def test_edited_source_reparsed_incrementally():
+    server = Server()
+    server.handle(request("lower", source="ff ← +1\ngg ← ×2\n", name="a.ua"))
+    document = server.documents["a.ua"]
+    ff_op = document.module.func_ops[0]
+
+    response = server.handle(request("lower", source="ff ← +1\ngg ← ×3\n", name="a.ua"))
+
+    assert response is not None
+    assert "3.000000e+00" in response["result"]["ir"]
+    assert server.documents["a.ua"] is document
+    assert document.module.func_ops[0] is ff_op
+
+
+def test_run():
+    server = Server()
+
+    response = server.handle(
+        request("run", source="ff ← +1\n", entry="ff", inputs=[[1.0, 2.0]])
+    )
+
+    assert response is not None
+    assert response["result"]["outputs"] == [[2.0, 3.0]]
+
+
+@pytest.mark.parametrize(
+    "message, code",
+    [
+        (request("unknown"), METHOD_NOT_FOUND),
+        (request("lower"), INVALID_PARAMS),
+        (request("parse", source=")"), SERVER_ERROR),
+    ],
+)
+def test_errors(message: dict[str, Any], code: int):
+    server = Server()
+
+    response = server.handle(message)
+
+    assert response is not None
+    assert response["error"]["code"] == code
+
+
+def test_notification():
+    server = Server()
+    message = request("parse", source="+")
+    del message["id"]
+
+    assert server.handle(message) is None
+
+
+def test_serve_stream():
+    lines = [
+        "not json",
+        json.dumps(request("parse", 1, source="+")),
+        json.dumps(request("shutdown", 2)),
+        json.dumps(request("parse", 3, source="+")),
+    ]
+    output = io.StringIO()
+
+    serve_stream(Server(), io.StringIO("\n".join(lines)), output)
+
+    responses = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [response["id"] for response in responses] == [None, 1, 2]
+    assert responses[0]["error"]["code"] == PARSE_ERROR
+
+
+def test_serve_socket(tmp_path: Path):
+    path = tmp_path / "xuiua.sock"
+    server = Server()
+    thread = threading.Thread(target=serve_socket, args=(server, path))
+    thread.start()
+    try:
+        while not path.exists():
+            pass
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(path))
+            client.sendall(
+                (
+                    json.dumps(request("parse", source="+"))
+                    + "\n"
+                    + json.dumps(request("shutdown", 2))
+                    + "\n"
+                ).encode()
+            )
+            responses = client.makefile().read().splitlines()
+    finally:
+        server.stopped = True
+        thread.join()
+
+    assert [json.loads(line)["id"] for line in responses] == [1, 2]
+    assert not path.exists()
+
+
+def test_text_edit_between():
+    assert TextEdit.between("ab cd", "ab xd") == TextEdit(3, 4, "x")
+    assert TextEdit.between("aaa", "aaaa") == TextEdit(3, 3, "a")
+    assert TextEdit.between("abc", "") == TextEdit(0, 3, "")
@@ -0,0 +1,66 @@
+import pytest
+
+from xuiua.shape_inference_patterns import (
+    broadcast_shapes,
+    dropped_rows,
+    joined_shape,
+    reshaped_shape,
+    taken_rows,
+)
+
+
+def test_broadcast_shapes():
+    assert broadcast_shapes((2, 3), (2, 3)) == (2, 3)
+    assert broadcast_shapes((), (2, 3)) == (2, 3)
+    assert broadcast_shapes((2, 3), (2,)) == (2, 3)
+
+    # Dynamic dimensions
+    assert broadcast_shapes((-1,), (-1, 3)) == (-1, 3)
+    assert broadcast_shapes((-1, 3), (2,)) == (2, 3)
+    assert broadcast_shapes((2, -1), (-1, 3)) == (2, 3)
+
+    with pytest.raises(ValueError, match="do not match"):
+        broadcast_shapes((3,), (2, 3))
+
+    with pytest.raises(ValueError, match="do not match"):
+        broadcast_shapes((-1, 2), (2, 3))
+
+
+def test_reshaped_shape():
+    assert reshaped_shape((6,), (2,), (2, 3)) == (2, 3)
+    assert reshaped_shape((2, 3), (2,), (-1, 2)) == (3, 2)
+    # A scalar shape repeats the array
+    assert reshaped_shape((2, 3), (), (4,)) == (4, 2, 3)
+
+    with pytest.raises(NotImplementedError, match="different number of elements"):
+        reshaped_shape((6,), (2,), (4, 2))
+
+    with pytest.raises(ValueError, match="Cannot reshape"):
+        reshaped_shape((6,), (2,), (-1, -1))
+
+
+def test_joined_shape():
+    assert joined_shape((), ()) == (2,)
+    assert joined_shape((2, 3), (4, 3)) == (6, 3)
+    assert joined_shape((2, 3), (3,)) == (3, 3)
+    assert joined_shape((3,), (2, 3)) == (3, 3)
+    assert joined_shape((-1, 3), (2, 3)) == (-1, 3)
+
+    with pytest.raises(ValueError, match="Cannot join"):
+        joined_shape((2, 3), (2, 4))
+
+    with pytest.raises(ValueError, match="Cannot join"):
+        joined_shape((2, 3), ())
+
+
+def test_sliced_rows():
+    assert taken_rows(5, 2) == (0, 2)
+    assert taken_rows(5, -2) == (3, 5)
+    assert dropped_rows(5, 2) == (2, 5)
+    assert dropped_rows(5, -2) == (0, 3)
+    # Dropping more rows than there are leaves none
+    assert dropped_rows(5, 7) == (5, 5)
+    assert dropped_rows(5, -7) == (0, 0)
+
+    with pytest.raises(ValueError, match="Cannot take"):
+        taken_rows(5, 6)
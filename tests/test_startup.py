@@ -0,0 +1,65 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+SOURCE = "uiua_main ← +\n"
+
+STARTUP_BUDGET = 2.0
+"""
+The maximum time in seconds to import the modules of the commands that do not run
+programs, generous to avoid flakiness on slow machines.
+"""
+
+
+def import_times(args: list[str]) -> dict[str, int]:
+    """
+    Runs the command with `-X importtime`, and returns the cumulative import time of
+    each imported module, in microseconds.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "from xuiua.main import main; main()",
+            *args,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("command", ["parse", "lower"])
+def test_startup_without_jax(command: str, tmp_path: Path):
+    src = tmp_path / "add.ua"
+    src.write_text(SOURCE)
+
+    times = import_times([command, str(src)])
+
+    assert "xuiua.main" in times
+    assert "jax" not in times
+    assert "numpy" not in times
+    assert times["xuiua.main"] < STARTUP_BUDGET * 1e6
+
+
+def test_startup_run(tmp_path: Path):
+    src = tmp_path / "add.ua"
+    src.write_text(SOURCE)
+    x = tmp_path / "x.npy"
+    np.save(x, np.arange(3.0))
+
+    times = import_times(["run", str(src), str(x), str(x)])
+
+    assert "jax" in times
@@ -0,0 +1,44 @@
+from xuiua.compile import PROGRAM_CACHE, compile
+from xuiua.timings import StageTiming, Timings, stage
+
+
+def test_compile_timings():
+    PROGRAM_CACHE.clear()
+    reported: list[StageTiming] = []
+    with Timings(trace_memory=True, callback=reported.append) as timings:
+        compile("×2", ((3,),))
+
+    names = [s.name for s in timings.stages]
+    assert names == [
+        "parse",
+        "ir-gen",
+        "inline-calls",
+        "add-shapes",
+        "shape-inference",
+        "remove-casts",
+        "canonicalize",
+        "merge-reductions",
+        "convert-uiua-to-stablehlo",
+        "jax-compile",
+    ]
+    assert reported == timings.stages
+    for s in timings.stages:
+        assert s.duration >= 0
+        assert s.peak_memory is not None
+
+    add_shapes = timings.stages[3]
+    # The cast of the result is added
+    assert add_shapes.ops_before is not None
+    assert add_shapes.ops_after == add_shapes.ops_before + 1
+
+    trace = timings.chrome_trace()
+    assert [e["name"] for e in trace["traceEvents"]] == names
+    assert all(e["ph"] == "X" for e in trace["traceEvents"])
+
+
+def test_inactive_stage():
+    with Timings() as timings:
+        pass
+    with stage("ignored"):
+        pass
+    assert timings.stages == []
@@ -1,38 +1,42 @@
-from xdsl.context import MLContext
+import os
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from threading import Lock
+from typing import Any, NamedTuple
 
-from xdsl.dialects.builtin import Builtin
-from xdsl.dialects.func import Func
-from xdsl.dialects import test
-
-from xuiua.dialect import UIUA
+from xuiua.context import get_ctx
 
 import jax
 import jax.numpy as jnp
 from jax import config
 
 
+from jax._src import xla_bridge
 from xdsl.backend.jax_executable import JaxExecutable
-from xdsl.dialects.builtin import ModuleOp
+from xdsl.dialects.builtin import ModuleOp, StringAttr
 from xdsl.dialects.func import FuncOp
+from xdsl.ir import Attribute
+from xdsl.parser import Parser as XDSLParser
+from xdsl.passes import ModulePass
 from xdsl.traits import SymbolTable
 from xdsl.transforms import shape_inference
 
+from xuiua.disk_cache import DiskCache, DiskCacheEntry
 from xuiua.frontend.ir_gen import build_module
 from xuiua.frontend.parser import Parser
-from xuiua.passes import remove_casts, convert_uiua_to_stablehlo
+from xuiua.passes import (
+    canonicalize,
+    remove_casts,
+    convert_uiua_to_stablehlo,
+    merge_reductions,
+)
+from xuiua.passes.batch import BatchPass
+from xuiua.passes.inline_calls import inline_calls
+from xuiua.passes.dynamic_dims import DynamicDims, MaterializeDynamicDimsPass
 from xuiua.passes.add_shapes import add_shapes
+from xuiua.timings import stage
 import numpy as np
-
-import time
-
-
-def get_ctx() -> MLContext:
-    ctx = MLContext()
-    ctx.register_dialect("builtin", lambda: Builtin)
-    ctx.register_dialect("func", lambda: Func)
-    ctx.register_dialect("uiua", lambda: UIUA)
-    ctx.register_dialect("test", lambda: test.Test)
-    return ctx
+import numpy.typing as npt
 
 
 config.update("jax_enable_x64", True)
@@ -50,31 +54,433 @@ def build_expr_module(expr: str) -> ModuleOp:
     return module
 
 
-# shape-inference,remove-casts,convert-uiua-to-stablehlo
-SHAPED_PIPELINE = [
+def build_entry_module(source: str, entry: str) -> ModuleOp:
+    """
+    Returns a module with a single `main` function, built from the function named
+    `entry` in the source, with the bindings it calls inlined.
+    """
+    with stage("parse"):
+        items = Parser(source).parse_items()
+    with stage("ir-gen"):
+        module = build_module(items)
+    entry_op = SymbolTable.lookup_symbol(module, entry)
+    if not isinstance(entry_op, FuncOp):
+        names = ", ".join(
+            func_op.sym_name.data
+            for func_op in module.body.ops
+            if isinstance(func_op, FuncOp)
+        )
+        raise ValueError(f"No function named {entry}, available functions: {names}")
+    main_op = entry_op.clone()
+    main_op.sym_name = StringAttr("main")
+    with stage("inline-calls", main_op):
+        inline_calls(main_op, module)
+    return ModuleOp([main_op])
+
+
+# shape-inference,remove-casts,canonicalize,merge-reductions,convert-uiua-to-stablehlo
+SHAPED_PIPELINE: list[ModulePass] = [
     shape_inference.ShapeInferencePass(),
     remove_casts.RemoveCastsPass(),
+    canonicalize.CanonicalizePass(),
+    merge_reductions.MergeReductionsPass(),
     convert_uiua_to_stablehlo.ConvertUiuaToStableHLOPass(),
 ]
 
 
-def run(expr: str, inputs: tuple[jax.Array, ...]) -> tuple[jax.Array, ...]:
-    module = build_expr_module(expr)
-    shapes = tuple(i.shape for i in inputs)
+def compile_pipeline(batch_size: int | None = None) -> list[ModulePass]:
+    """
+    The passes applied to the shaped entry function before compiling it.
+    """
+    if batch_size is None:
+        return SHAPED_PIPELINE
+    return [*SHAPED_PIPELINE, BatchPass(batch_size)]
+
+
+def pipeline_spec(passes: Sequence[ModulePass]) -> str:
+    return ",".join(str(p.pipeline_pass_spec()) for p in passes)
+
+
+def compile_executable(module: ModuleOp) -> JaxExecutable:
+    with stage("jax-compile", module):
+        return JaxExecutable.compile(module)
+
+
+class CompiledProgram:
+    """
+    A Uiua program compiled ahead of time for inputs of fixed shapes and dtypes.
+
+    Compilation happens when the program is created, calling it only executes.
+    """
+
+    module: ModuleOp
+    "The lowered module, with a `main` function."
+    executable: JaxExecutable
+
+    def __init__(self, module: ModuleOp, executable: JaxExecutable):
+        self.module = module
+        self.executable = executable
+
+    @property
+    def input_types(self) -> tuple[Attribute, ...]:
+        return self.executable.main_type.inputs.data
+
+    @property
+    def output_types(self) -> tuple[Attribute, ...]:
+        return self.executable.main_type.outputs.data
+
+    def __call__(self, *inputs: jax.Array | npt.NDArray[Any]) -> tuple[jax.Array, ...]:
+        if len(inputs) != len(self.input_types):
+            raise ValueError(
+                f"Expected {len(self.input_types)} inputs, got {len(inputs)}"
+            )
+        with stage("execute"):
+            return tuple(self.executable.execute(tuple(jnp.asarray(i) for i in inputs)))
+
+
+class CacheKey(NamedTuple):
+    source: str
+    "The Uiua source of the compiled program."
+    entry: str
+    "The name of the compiled function in the source."
+    shapes: tuple[tuple[int, ...], ...]
+    "The shapes of the inputs."
+    dtypes: tuple[str, ...]
+    "The names of the dtypes of the inputs."
+    batch_size: int | None = None
+    "The size of the leading batch dimension added to the inputs and outputs, if any."
+
+
+class ProgramCache:
+    """
+    A bounded cache of compiled programs, evicting the least recently used entry when
+    full.
+    """
+
+    maxsize: int
+    hits: int
+    misses: int
+    _entries: OrderedDict[CacheKey, CompiledProgram]
+    _lock: Lock
+
+    def __init__(self, maxsize: int = 128):
+        if maxsize < 1:
+            raise ValueError(f"Cache size must be positive, got {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: CacheKey) -> bool:
+        return key in self._entries
+
+    def get(self, key: CacheKey) -> CompiledProgram | None:
+        with self._lock:
+            program = self._entries.get(key)
+            if program is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return program
+
+    def put(self, key: CacheKey, program: CompiledProgram) -> None:
+        with self._lock:
+            self._entries[key] = program
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Removes all entries and resets the hit and miss counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+PROGRAM_CACHE = ProgramCache()
+
+
+DISK_CACHE: DiskCache | None = (
+    DiskCache(cache_dir) if (cache_dir := os.environ.get("XUIUA_CACHE_DIR")) else None
+)
+"""
+The persistent cache shared between processes, enabled by setting `XUIUA_CACHE_DIR`.
+"""
+
+
+def lower_source(
+    source: str,
+    entry: str,
+    shapes: tuple[tuple[int, ...], ...],
+    passes: Sequence[ModulePass] = SHAPED_PIPELINE,
+) -> ModuleOp:
+    module = build_entry_module(source, entry)
     main_op = SymbolTable.lookup_symbol(module, "main")
     assert isinstance(main_op, FuncOp)
-    add_shapes(main_op, shapes)
+    with stage("add-shapes", module):
+        add_shapes(main_op, shapes)
     ctx = get_ctx()
-    for p in SHAPED_PIPELINE:
-        p.apply(ctx, module)
+    for p in passes:
+        with stage(p.name, module):
+            p.apply(ctx, module)
+    return module
+
+
+def serialize_executable(executable: JaxExecutable) -> bytes | None:
+    client = xla_bridge.backends()["cpu"]
+    try:
+        return client.serialize_executable(executable.loaded_executable)
+    except Exception:
+        # Not all backends support serialization, fall back to recompiling
+        return None
+
+
+def load_program(entry: DiskCacheEntry) -> CompiledProgram:
+    module = XDSLParser(get_ctx(), entry.stablehlo).parse_module()
+
+    if entry.executable is None:
+        return CompiledProgram(module, compile_executable(module))
+
+    main_op = SymbolTable.lookup_symbol(module, "main")
+    assert isinstance(main_op, FuncOp)
+    client = xla_bridge.backends()["cpu"]
+    with stage("deserialize"):
+        loaded = client.deserialize_executable(entry.executable, None)
+    return CompiledProgram(module, JaxExecutable(main_op.function_type, loaded))
+
+
+SUPPORTED_DTYPES = ("float64",)
+
+
+def compile_uncached(
+    source: str,
+    entry: str,
+    shapes: tuple[tuple[int, ...], ...],
+    dtypes: tuple[str, ...],
+    batch_size: int | None = None,
+) -> CompiledProgram:
+    """
+    Compiles the function for inputs of the given shapes and dtypes, reusing the
+    results of other processes if the disk cache is enabled.
+    """
+    passes = compile_pipeline(batch_size)
+    disk_cache = DISK_CACHE
+    if disk_cache is None:
+        module = lower_source(source, entry, shapes, passes)
+        return CompiledProgram(module, compile_executable(module))
+
+    key = DiskCache.make_key(source, entry, shapes, dtypes, pipeline_spec(passes))
+    if (cache_entry := disk_cache.get(key)) is not None:
+        return load_program(cache_entry)
+
+    module = lower_source(source, entry, shapes, passes)
+    executable = compile_executable(module)
+    disk_cache.put(key, DiskCacheEntry(str(module), serialize_executable(executable)))
+    return CompiledProgram(module, executable)
+
+
+def compile_source(
+    source: str,
+    entry: str,
+    shapes: Sequence[Sequence[int]],
+    dtypes: Sequence[str] | None = None,
+    batch_size: int | None = None,
+) -> CompiledProgram:
+    """
+    Compiles the function named `entry` in the source for inputs of the given shapes
+    and dtypes, which default to `float64`.
+
+    If `batch_size` is specified, the shapes are those of a single item, and the
+    compiled program takes and returns arrays stacked along a leading dimension of that
+    size.
+    """
+    if dtypes is None:
+        dtypes = ("float64",) * len(shapes)
+    if len(dtypes) != len(shapes):
+        raise ValueError(f"Got {len(shapes)} shapes but {len(dtypes)} dtypes")
+    for dtype in dtypes:
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype}")
+
+    key = CacheKey(
+        source,
+        entry,
+        tuple(tuple(shape) for shape in shapes),
+        tuple(dtypes),
+        batch_size,
+    )
+    program = PROGRAM_CACHE.get(key)
+    if program is None:
+        program = compile_uncached(
+            source, entry, key.shapes, key.dtypes, key.batch_size
+        )
+        PROGRAM_CACHE.put(key, program)
+    return program
+
+
+def next_power_of_two(size: int) -> int:
+    """
+    A bucketing policy, rounding sizes up to the next power of two.
+    """
+    return 1 << max(size - 1, 0).bit_length()
+
+
+class DynamicProgram:
+    """
+    A Uiua program lowered once for inputs with dynamic dimensions, and compiled for
+    each distinct size of these dimensions when called.
+
+    With a bucketing policy, the dynamic dimensions of the inputs are padded to the
+    size returned by the policy, so that a bounded set of executables serves all
+    sizes. Reductions ignore the padding, and the outputs are sliced back to the
+    actual sizes.
+    """
+
+    module: ModuleOp
+    "The lowered module, with a `main` function with dynamic dimensions."
+    dynamic_dims: DynamicDims
+    bucket: Callable[[int], int] | None
+    "Returns the padded size of a dynamic dimension, or `None` to not pad."
+    programs: dict[tuple[int, ...], CompiledProgram]
+    "The compiled programs, indexed by the padded sizes of the dynamic dimensions."
+
+    def __init__(self, module: ModuleOp, bucket: Callable[[int], int] | None = None):
+        self.module = module
+        main_op = SymbolTable.lookup_symbol(module, "main")
+        assert isinstance(main_op, FuncOp)
+        self.dynamic_dims = DynamicDims(main_op)
+        self.bucket = bucket
+        self.programs = {}
+
+    def program(self, sizes: tuple[int, ...]) -> CompiledProgram:
+        """
+        Returns the program compiled for the given sizes of the dynamic dimensions.
+        """
+        program = self.programs.get(sizes)
+        if program is None:
+            module = self.module.clone()
+            with stage(MaterializeDynamicDimsPass.name, module):
+                MaterializeDynamicDimsPass(sizes).apply(get_ctx(), module)
+            program = CompiledProgram(module, compile_executable(module))
+            self.programs[sizes] = program
+        return program
+
+    def __call__(self, *inputs: jax.Array | npt.NDArray[Any]) -> tuple[jax.Array, ...]:
+        func_op = self.dynamic_dims.func_op
+        sizes = self.dynamic_dims.resolve(tuple(i.shape for i in inputs))
+        padded_sizes = (
+            sizes if self.bucket is None else tuple(self.bucket(s) for s in sizes)
+        )
+        program = self.program(padded_sizes)
+
+        padded_inputs = tuple(
+            jnp.pad(
+                input,
+                tuple(
+                    (0, padded - size)
+                    for size, padded in zip(
+                        input.shape, self.dynamic_dims.shape(arg, padded_sizes)
+                    )
+                ),
+            )
+            for input, arg in zip(inputs, func_op.body.block.args)
+        )
+        lengths = tuple(jnp.asarray(size, dtype=jnp.int64) for size in sizes)
+        outputs = program(*padded_inputs, *lengths)
+
+        return_op = func_op.body.block.last_op
+        assert return_op is not None
+        return tuple(
+            output[tuple(slice(size) for size in self.dynamic_dims.shape(value, sizes))]
+            for output, value in zip(outputs, return_op.operands)
+        )
+
+
+def compile_dynamic_source(
+    source: str,
+    entry: str,
+    shapes: Sequence[Sequence[int]],
+    dtypes: Sequence[str] | None = None,
+    bucket: Callable[[int], int] | None = None,
+) -> DynamicProgram:
+    """
+    Lowers the function named `entry` in the source for inputs of the given shapes
+    and dtypes, where dimensions of size `-1` are only known when the program is
+    called.
+    """
+    if dtypes is None:
+        dtypes = ("float64",) * len(shapes)
+    if len(dtypes) != len(shapes):
+        raise ValueError(f"Got {len(shapes)} shapes but {len(dtypes)} dtypes")
+    for dtype in dtypes:
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype}")
+
+    module = lower_source(source, entry, tuple(tuple(shape) for shape in shapes))
+    return DynamicProgram(module, bucket)
+
+
+def compile_dynamic(
+    expr: str,
+    shapes: Sequence[Sequence[int]],
+    dtypes: Sequence[str] | None = None,
+    bucket: Callable[[int], int] | None = None,
+) -> DynamicProgram:
+    """
+    Lowers the expression for inputs of the given shapes and dtypes, see
+    `compile_dynamic_source`.
+    """
+    return compile_dynamic_source("main ← " + expr, "main", shapes, dtypes, bucket)
+
+
+def compile(
+    expr: str,
+    shapes: Sequence[Sequence[int]],
+    dtypes: Sequence[str] | None = None,
+    batch_size: int | None = None,
+) -> CompiledProgram:
+    """
+    Compiles the expression for inputs of the given shapes and dtypes, which default
+    to `float64`, see `compile_source`.
+    """
+    return compile_source("main ← " + expr, "main", shapes, dtypes, batch_size)
 
-    jax_executable = JaxExecutable.compile(module)
 
-    start_time = time.time()
-    result = jax_executable.execute(inputs)
-    end_time = time.time()
+def run(
+    expr: str, inputs: Sequence[jax.Array | npt.NDArray[Any]]
+) -> tuple[jax.Array, ...]:
+    program = compile(
+        expr, tuple(i.shape for i in inputs), tuple(str(i.dtype) for i in inputs)
+    )
+    return program(*inputs)
 
-    execution_time = end_time - start_time
-    print(execution_time)
 
-    return tuple(result)
+def run_batched(expr: str, inputs: tuple[jax.Array, ...]) -> tuple[jax.Array, ...]:
+    """
+    Evaluates the expression independently for each index along the leading dimension
+    of the inputs, in a single call to a program compiled for the item shapes.
+    """
+    if not inputs:
+        raise ValueError("Cannot infer the batch size without inputs")
+    batch_size = inputs[0].shape[0]
+    for i in inputs:
+        if not i.shape or i.shape[0] != batch_size:
+            raise ValueError(
+                f"Inputs must have a leading dimension of size {batch_size}, got shape "
+                f"{i.shape}"
+            )
+    program = compile(
+        expr,
+        tuple(i.shape[1:] for i in inputs),
+        tuple(str(i.dtype) for i in inputs),
+        batch_size,
+    )
+    return program(*inputs)
@@ -0,0 +1,47 @@
+from xdsl.context import MLContext
+
+
+def get_ctx() -> MLContext:
+    """
+    Returns a context in which the dialects used by the compiler are registered, and
+    loaded when first used.
+    """
+    ctx = MLContext()
+
+    def get_arith():
+        from xdsl.dialects.arith import Arith
+
+        return Arith
+
+    def get_builtin():
+        from xdsl.dialects.builtin import Builtin
+
+        return Builtin
+
+    def get_func():
+        from xdsl.dialects.func import Func
+
+        return Func
+
+    def get_stablehlo():
+        from xuiua.stablehlo_ext import STABLEHLO
+
+        return STABLEHLO
+
+    def get_uiua():
+        from xuiua.dialect import UIUA
+
+        return UIUA
+
+    def get_test():
+        from xdsl.dialects.test import Test
+
+        return Test
+
+    ctx.register_dialect("arith", get_arith)
+    ctx.register_dialect("builtin", get_builtin)
+    ctx.register_dialect("func", get_func)
+    ctx.register_dialect("stablehlo", get_stablehlo)
+    ctx.register_dialect("uiua", get_uiua)
+    ctx.register_dialect("test", get_test)
+    return ctx
@@ -6,7 +6,10 @@ from xdsl.dialects.builtin import (
     UnrankedTensorType,
     f64,
 )
-from xdsl.ir import Attribute, Dialect, Region, SSAValue, VerifyException
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+
+from xdsl.ir import Attribute, Dialect, Operation, Region, SSAValue, VerifyException
 from xdsl.irdl import (
     base,
     irdl_op_definition,
@@ -14,9 +17,17 @@ from xdsl.irdl import (
     operand_def,
     region_def,
     result_def,
+    traits_def,
     var_operand_def,
+    var_result_def,
+)
+from xdsl.traits import (
+    HasParent,
+    HasShapeInferencePatternsTrait,
+    IsTerminator,
+    OpTrait,
+    Pure,
 )
-from xdsl.traits import HasParent, HasShapeInferencePatternsTrait, Pure
 from xdsl.utils.isattr import isattr
 
 TI32 = TensorType[I32]
@@ -42,25 +53,71 @@ def t64(*shape: int) -> TF64:
     return TensorType(f64, shape)
 
 
-class AddOpHasShapeInferencePatternsTrait(HasShapeInferencePatternsTrait):
+class Pervasive(OpTrait):
+    """
+    An operation applied to each element of its operands, the values of the operands
+    of lower rank being repeated along the trailing dimensions of the others.
+
+    https://www.uiua.org/docs/pervasive
+    """
+
+    def verify(self, op: Operation) -> None:
+        if len(op.results) != 1:
+            raise VerifyException(
+                f"Pervasive operation {op.name} should have a single result"
+            )
+
+
+class MonadicPervasiveHasShapeInferencePatternsTrait(HasShapeInferencePatternsTrait):
     @classmethod
     def get_shape_inference_patterns(cls):
         from xuiua.shape_inference_patterns import (
-            AddOpShapeInferencePattern,
+            MonadicPervasiveShapeInferencePattern,
         )
 
-        return (AddOpShapeInferencePattern(),)
+        return (MonadicPervasiveShapeInferencePattern(),)
 
 
-@irdl_op_definition
-class AddOp(IRDLOperation):
+class MonadicPervasiveOperation(IRDLOperation, ABC):
+    """
+    An operation applied to each element of its argument.
     """
-    Add values.
 
-    https://www.uiua.org/docs/add
+    arg = operand_def(UIUATensorConstr)
+    res = result_def(UIUATensorConstr)
+
+    traits = frozenset(
+        (
+            Pure(),
+            Pervasive(),
+            MonadicPervasiveHasShapeInferencePatternsTrait(),
+        )
+    )
+
+    def __init__(self, arg: SSAValue, result_type: Attribute | None = None):
+        if result_type is None:
+            result_type = arg.type
+
+        super().__init__(operands=(arg,), result_types=(result_type,))
+
+
+class DyadicPervasiveHasShapeInferencePatternsTrait(HasShapeInferencePatternsTrait):
+    @classmethod
+    def get_shape_inference_patterns(cls):
+        from xuiua.shape_inference_patterns import (
+            DyadicPervasiveShapeInferencePattern,
+        )
+
+        return (DyadicPervasiveShapeInferencePattern(),)
+
+
+class DyadicPervasiveOperation(IRDLOperation, ABC):
     """
+    An operation applied to the corresponding elements of its operands.
 
-    name = "uiua.add"
+    `rhs` is the top of the stack and `lhs` the value below it, so that `-1` subtracts
+    1 from `lhs`.
+    """
 
     lhs = operand_def(UIUATensorConstr)
     rhs = operand_def(UIUATensorConstr)
@@ -69,7 +126,8 @@ class AddOp(IRDLOperation):
     traits = frozenset(
         (
             Pure(),
-            AddOpHasShapeInferencePatternsTrait(),
+            Pervasive(),
+            DyadicPervasiveHasShapeInferencePatternsTrait(),
         )
     )
 
@@ -82,36 +140,202 @@ class AddOp(IRDLOperation):
         super().__init__(operands=(lhs, rhs), result_types=(result_type,))
 
 
+# region Monadic pervasive
+
+
 @irdl_op_definition
-class CastOp(IRDLOperation):
-    name = "uiua.cast"
-    arg = operand_def(UIUATensorConstr)
-    res = result_def(UIUATensorConstr)
+class NotOp(MonadicPervasiveOperation):
+    """
+    Logical not, computed as one minus the value.
 
-    traits = frozenset((Pure(),))
+    https://www.uiua.org/docs/not
+    """
 
-    def __init__(self, arg: SSAValue, res: UIUATensorType | None = None):
-        if res is None:
-            res = utf64
+    name = "uiua.not"
 
-        return super().__init__(
-            operands=[arg],
-            result_types=[res],
-        )
 
+@irdl_op_definition
+class SignOp(MonadicPervasiveOperation):
+    """
+    Get the sign of values, as -1, 0 or 1.
 
-class MultiplyOpHasShapeInferencePatternsTrait(HasShapeInferencePatternsTrait):
-    @classmethod
-    def get_shape_inference_patterns(cls):
-        from xuiua.shape_inference_patterns import (
-            MultiplyOpShapeInferencePattern,
-        )
+    https://www.uiua.org/docs/sign
+    """
+
+    name = "uiua.sign"
+
+
+@irdl_op_definition
+class NegateOp(MonadicPervasiveOperation):
+    """
+    Negate values.
+
+    https://www.uiua.org/docs/negate
+    """
+
+    name = "uiua.negate"
+
+
+@irdl_op_definition
+class AbsoluteValueOp(MonadicPervasiveOperation):
+    """
+    Get the absolute value of values.
+
+    https://www.uiua.org/docs/absolutevalue
+    """
+
+    name = "uiua.absolute_value"
+
+
+@irdl_op_definition
+class SqrtOp(MonadicPervasiveOperation):
+    """
+    Take the square root of values.
+
+    https://www.uiua.org/docs/sqrt
+    """
+
+    name = "uiua.sqrt"
+
+
+@irdl_op_definition
+class SineOp(MonadicPervasiveOperation):
+    """
+    Get the sine of values.
+
+    https://www.uiua.org/docs/sine
+    """
+
+    name = "uiua.sine"
+
+
+@irdl_op_definition
+class FloorOp(MonadicPervasiveOperation):
+    """
+    Round values down.
+
+    https://www.uiua.org/docs/floor
+    """
+
+    name = "uiua.floor"
+
+
+@irdl_op_definition
+class CeilingOp(MonadicPervasiveOperation):
+    """
+    Round values up.
+
+    https://www.uiua.org/docs/ceiling
+    """
+
+    name = "uiua.ceiling"
+
+
+@irdl_op_definition
+class RoundOp(MonadicPervasiveOperation):
+    """
+    Round values to the nearest integer, halves away from zero.
+
+    https://www.uiua.org/docs/round
+    """
+
+    name = "uiua.round"
+
+
+# endregion
+# region Dyadic pervasive
+
+
+@irdl_op_definition
+class EqualsOp(DyadicPervasiveOperation):
+    """
+    Compare values for equality, as 1 or 0.
+
+    https://www.uiua.org/docs/equals
+    """
+
+    name = "uiua.equals"
+
+
+@irdl_op_definition
+class NotEqualsOp(DyadicPervasiveOperation):
+    """
+    Compare values for inequality, as 1 or 0.
+
+    https://www.uiua.org/docs/notequals
+    """
 
-        return (MultiplyOpShapeInferencePattern(),)
+    name = "uiua.not_equals"
 
 
 @irdl_op_definition
-class MultiplyOp(IRDLOperation):
+class LessThanOp(DyadicPervasiveOperation):
+    """
+    Check whether `lhs` is less than `rhs`, as 1 or 0.
+
+    https://www.uiua.org/docs/lessthan
+    """
+
+    name = "uiua.less_than"
+
+
+@irdl_op_definition
+class LessOrEqualOp(DyadicPervasiveOperation):
+    """
+    Check whether `lhs` is less than or equal to `rhs`, as 1 or 0.
+
+    https://www.uiua.org/docs/lessorequal
+    """
+
+    name = "uiua.less_or_equal"
+
+
+@irdl_op_definition
+class GreaterThanOp(DyadicPervasiveOperation):
+    """
+    Check whether `lhs` is greater than `rhs`, as 1 or 0.
+
+    https://www.uiua.org/docs/greaterthan
+    """
+
+    name = "uiua.greater_than"
+
+
+@irdl_op_definition
+class GreaterOrEqualOp(DyadicPervasiveOperation):
+    """
+    Check whether `lhs` is greater than or equal to `rhs`, as 1 or 0.
+
+    https://www.uiua.org/docs/greaterorequal
+    """
+
+    name = "uiua.greater_or_equal"
+
+
+@irdl_op_definition
+class AddOp(DyadicPervasiveOperation):
+    """
+    Add values.
+
+    https://www.uiua.org/docs/add
+    """
+
+    name = "uiua.add"
+
+
+@irdl_op_definition
+class SubtractOp(DyadicPervasiveOperation):
+    """
+    Subtract `rhs` from `lhs`.
+
+    https://www.uiua.org/docs/subtract
+    """
+
+    name = "uiua.subtract"
+
+
+@irdl_op_definition
+class MultiplyOp(DyadicPervasiveOperation):
     """
     Multiply values.
 
@@ -120,26 +344,273 @@ class MultiplyOp(IRDLOperation):
 
     name = "uiua.multiply"
 
+
+@irdl_op_definition
+class DivideOp(DyadicPervasiveOperation):
+    """
+    Divide `lhs` by `rhs`.
+
+    https://www.uiua.org/docs/divide
+    """
+
+    name = "uiua.divide"
+
+
+@irdl_op_definition
+class ModulusOp(DyadicPervasiveOperation):
+    """
+    Get the remainder of the division of `lhs` by `rhs`, with the sign of `rhs`.
+
+    https://www.uiua.org/docs/modulus
+    """
+
+    name = "uiua.modulus"
+
+
+@irdl_op_definition
+class PowerOp(DyadicPervasiveOperation):
+    """
+    Raise `lhs` to the power of `rhs`.
+
+    https://www.uiua.org/docs/power
+    """
+
+    name = "uiua.power"
+
+
+@irdl_op_definition
+class LogarithmOp(DyadicPervasiveOperation):
+    """
+    Get the logarithm of `lhs` in the base `rhs`.
+
+    https://www.uiua.org/docs/logarithm
+    """
+
+    name = "uiua.logarithm"
+
+
+@irdl_op_definition
+class MinimumOp(DyadicPervasiveOperation):
+    """
+    Take the minimum of values.
+
+    https://www.uiua.org/docs/minimum
+    """
+
+    name = "uiua.minimum"
+
+
+@irdl_op_definition
+class MaximumOp(DyadicPervasiveOperation):
+    """
+    Take the maximum of values.
+
+    https://www.uiua.org/docs/maximum
+    """
+
+    name = "uiua.maximum"
+
+
+@irdl_op_definition
+class AtangentOp(DyadicPervasiveOperation):
+    """
+    Take the arctangent of `rhs` over `lhs`, the angle of the point `(lhs, rhs)`.
+
+    https://www.uiua.org/docs/atangent
+    """
+
+    name = "uiua.atangent"
+
+
+# endregion
+
+
+class ArrayHasShapeInferencePatternsTrait(HasShapeInferencePatternsTrait):
+    @classmethod
+    def get_shape_inference_patterns(cls):
+        from xuiua.shape_inference_patterns import ARRAY_SHAPE_INFERENCE_PATTERNS
+
+        return ARRAY_SHAPE_INFERENCE_PATTERNS
+
+
+class MonadicArrayOperation(IRDLOperation, ABC):
+    """
+    An operation on the structure of its argument.
+    """
+
+    arg = operand_def(UIUATensorConstr)
+    res = result_def(UIUATensorConstr)
+
+    traits = frozenset((Pure(), ArrayHasShapeInferencePatternsTrait()))
+
+    def __init__(self, arg: SSAValue, result_type: Attribute | None = None):
+        if result_type is None:
+            result_type = utf64
+
+        super().__init__(operands=(arg,), result_types=(result_type,))
+
+
+# region Monadic array
+
+
+@irdl_op_definition
+class RangeOp(MonadicArrayOperation):
+    """
+    Make an array of the integers from 0 up to, and excluding, the argument.
+    The argument must be a constant, as it determines the shape of the result.
+
+    https://www.uiua.org/docs/range
+    """
+
+    name = "uiua.range"
+
+
+@irdl_op_definition
+class ReverseOp(MonadicArrayOperation):
+    """
+    Reverse the rows of an array.
+
+    https://www.uiua.org/docs/reverse
+    """
+
+    name = "uiua.reverse"
+
+
+@irdl_op_definition
+class TransposeOp(MonadicArrayOperation):
+    """
+    Rotate the shape of an array, the first axis becoming the last.
+
+    https://www.uiua.org/docs/transpose
+    """
+
+    name = "uiua.transpose"
+
+
+# endregion
+# region Dyadic array
+
+
+@irdl_op_definition
+class ReshapeOp(IRDLOperation):
+    """
+    Change the shape of `arg` to `shape`, the top of the stack.
+    A scalar `shape` repeats `arg` along a new leading axis of that length, and one
+    dimension of a list `shape` may be -1, to be inferred from the others.
+    `shape` must be a constant, as it determines the shape of the result.
+
+    https://www.uiua.org/docs/reshape
+    """
+
+    name = "uiua.reshape"
+
+    arg = operand_def(UIUATensorConstr)
+    shape = operand_def(UIUATensorConstr)
+    res = result_def(UIUATensorConstr)
+
+    traits = frozenset((Pure(), ArrayHasShapeInferencePatternsTrait()))
+
+    def __init__(
+        self, arg: SSAValue, shape: SSAValue, result_type: Attribute | None = None
+    ):
+        if result_type is None:
+            result_type = utf64
+
+        super().__init__(operands=(arg, shape), result_types=(result_type,))
+
+
+@irdl_op_definition
+class JoinOp(IRDLOperation):
+    """
+    Append `lhs` to `rhs`, the top of the stack, so that `⊂1` prepends 1.
+    The operands must have the same rank, or the rank of one must be one less than
+    the other's, in which case it is joined as a single row.
+
+    https://www.uiua.org/docs/join
+    """
+
+    name = "uiua.join"
+
     lhs = operand_def(UIUATensorConstr)
     rhs = operand_def(UIUATensorConstr)
     res = result_def(UIUATensorConstr)
 
-    traits = frozenset(
-        (
-            Pure(),
-            MultiplyOpHasShapeInferencePatternsTrait(),
-        )
-    )
+    traits = frozenset((Pure(), ArrayHasShapeInferencePatternsTrait()))
 
     def __init__(
         self, lhs: SSAValue, rhs: SSAValue, result_type: Attribute | None = None
     ):
         if result_type is None:
-            result_type = lhs.type
+            result_type = utf64
 
         super().__init__(operands=(lhs, rhs), result_types=(result_type,))
 
 
+class SliceRowsOperation(IRDLOperation, ABC):
+    """
+    An operation keeping a range of the rows of `arg`, determined by `count`, the top
+    of the stack.
+    `count` must be a constant, as it determines the shape of the result.
+    """
+
+    arg = operand_def(UIUATensorConstr)
+    count = operand_def(UIUATensorConstr)
+    res = result_def(UIUATensorConstr)
+
+    traits = frozenset((Pure(), ArrayHasShapeInferencePatternsTrait()))
+
+    def __init__(
+        self, arg: SSAValue, count: SSAValue, result_type: Attribute | None = None
+    ):
+        if result_type is None:
+            result_type = utf64
+
+        super().__init__(operands=(arg, count), result_types=(result_type,))
+
+
+@irdl_op_definition
+class TakeOp(SliceRowsOperation):
+    """
+    Take the first `count` rows of `arg`, or the last ones if `count` is negative.
+
+    https://www.uiua.org/docs/take
+    """
+
+    name = "uiua.take"
+
+
+@irdl_op_definition
+class DropOp(SliceRowsOperation):
+    """
+    Drop the first `count` rows of `arg`, or the last ones if `count` is negative.
+
+    https://www.uiua.org/docs/drop
+    """
+
+    name = "uiua.drop"
+
+
+# endregion
+
+
+@irdl_op_definition
+class CastOp(IRDLOperation):
+    name = "uiua.cast"
+    arg = operand_def(UIUATensorConstr)
+    res = result_def(UIUATensorConstr)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(self, arg: SSAValue, res: UIUATensorType | None = None):
+        if res is None:
+            res = utf64
+
+        return super().__init__(
+            operands=[arg],
+            result_types=[res],
+        )
+
+
 class ReduceOpHasShapeInferencePatternsTrait(HasShapeInferencePatternsTrait):
     @classmethod
     def get_shape_inference_patterns(cls):
@@ -155,16 +626,97 @@ class ReduceOp(IRDLOperation):
     """
     Reduces a value left to right pairwise with a specified transform.
 
+    Several values with the same number of rows may be reduced together, with an
+    accumulator each, in a single pass over their rows.
+    The arguments of the block of the body are the accumulators, followed by the
+    rows of the values, and the body yields the next accumulators.
+
     https://www.uiua.org/docs/reduce
     """
 
     name = "uiua.reduce"
 
+    args = var_operand_def(UIUATensorConstr)
+    res = var_result_def(UIUATensorConstr)
+    body = region_def("single_block")
+
+    traits = frozenset((Pure(), ReduceOpHasShapeInferencePatternsTrait()))
+
+    def __init__(
+        self,
+        args: Sequence[SSAValue],
+        result_types: Sequence[Attribute],
+        body: Region,
+    ):
+        super().__init__(
+            operands=(args,), result_types=(result_types,), regions=(body,)
+        )
+
+    def verify_(self) -> None:
+        args = self.body.block.args
+        if not self.args or len(args) != 2 * len(self.args):
+            raise VerifyException(
+                f"Invalid number of operands in reduce region: {len(args)}"
+            )
+        if len(self.res) != len(self.args):
+            raise VerifyException(
+                f"Mismatching number of reduction results: {len(self.res)} != {len(self.args)}"
+            )
+
+        accs, vals = args[: len(self.args)], args[len(self.args) :]
+        lengths: set[int] = set()
+        for arg, acc, val, res in zip(self.args, accs, vals, self.res):
+            # The first args of the region are the accumulators
+            # They should have the same types as the results
+            if acc.type != res.type:
+                raise VerifyException(
+                    f"Mismatching types for reduction accumulator: {acc.type} != {res.type}"
+                )
+
+            # The last args of the region are the iteration elements
+            # They should have one fewer dimension than the args
+            if isattr(arg.type, TTConstr) and isattr(val.type, TTConstr):
+                arg_shape = arg.type.get_shape()
+                val_shape = val.type.get_shape()
+
+                if len(arg_shape) != (len(val_shape) + 1) or arg_shape[1:] != val_shape:
+                    raise VerifyException(
+                        f"Mismatching shapes for reduction value and operand: {arg_shape} != {val_shape}"
+                    )
+                lengths.add(arg_shape[0])
+
+        if len(lengths) > 1:
+            raise VerifyException(
+                f"Mismatching numbers of rows of reduced values: {sorted(lengths)}"
+            )
+
+
+class ScanOpHasShapeInferencePatternsTrait(HasShapeInferencePatternsTrait):
+    @classmethod
+    def get_shape_inference_patterns(cls):
+        from xuiua.shape_inference_patterns import (
+            ScanOpShapeInferencePattern,
+        )
+
+        return (ScanOpShapeInferencePattern(),)
+
+
+@irdl_op_definition
+class ScanOp(IRDLOperation):
+    """
+    Reduces a value left to right pairwise with a specified transform, keeping the
+    intermediate values, so that the last row of the result is the reduction.
+
+    https://www.uiua.org/docs/scan
+    """
+
+    name = "uiua.scan"
+
     arg = operand_def(UIUATensorConstr)
     res = result_def(UIUATensorConstr)
     body = region_def("single_block")
 
-    traits = frozenset((Pure(), ReduceOpHasShapeInferencePatternsTrait()))
+    traits = frozenset((Pure(), ScanOpHasShapeInferencePatternsTrait()))
 
     def __init__(self, arg: SSAValue, result_type: Attribute, body: Region):
         super().__init__(operands=(arg,), result_types=(result_type,), regions=(body,))
@@ -173,53 +725,311 @@ class ReduceOp(IRDLOperation):
         args = self.body.block.args
         if len(args) != 2:
             raise VerifyException(
-                f"Invalid number of operands in reduce region: {len(args)}"
+                f"Invalid number of operands in scan region: {len(args)}"
             )
 
+        # The accumulator and the iteration element are both rows of the arg
         acc, val = args
+        if acc.type != val.type:
+            raise VerifyException(
+                f"Mismatching types for scan accumulator and value: {acc.type} != {val.type}"
+            )
+
+        if isattr(self.arg.type, TTConstr) and isattr(val.type, TTConstr):
+            arg_shape = self.arg.type.get_shape()
+            val_shape = val.type.get_shape()
+
+            if len(arg_shape) != (len(val_shape) + 1) or arg_shape[1:] != val_shape:
+                raise VerifyException(
+                    f"Mismatching shapes for scan value and operand: {arg_shape} != {val_shape}"
+                )
+
+
+class FoldOpHasShapeInferencePatternsTrait(HasShapeInferencePatternsTrait):
+    @classmethod
+    def get_shape_inference_patterns(cls):
+        from xuiua.shape_inference_patterns import (
+            FoldOpShapeInferencePattern,
+        )
+
+        return (FoldOpShapeInferencePattern(),)
+
+
+@irdl_op_definition
+class FoldOp(IRDLOperation):
+    """
+    Applies a specified transform to an accumulator, starting from `init`, and each
+    row of `arg`, the top of the stack, in turn.
+
+    https://www.uiua.org/docs/fold
+    """
+
+    name = "uiua.fold"
+
+    init = operand_def(UIUATensorConstr)
+    arg = operand_def(UIUATensorConstr)
+    res = result_def(UIUATensorConstr)
+    body = region_def("single_block")
+
+    traits = frozenset((Pure(), FoldOpHasShapeInferencePatternsTrait()))
+
+    def __init__(
+        self, init: SSAValue, arg: SSAValue, result_type: Attribute, body: Region
+    ):
+        super().__init__(
+            operands=(init, arg), result_types=(result_type,), regions=(body,)
+        )
+
+    def verify_(self) -> None:
+        args = self.body.block.args
+        if len(args) != 2:
+            raise VerifyException(
+                f"Invalid number of operands in fold region: {len(args)}"
+            )
 
         # The first arg of the region is the accumulator
         # It should have the same type as the result
+        acc, val = args
         if acc.type != self.res.type:
             raise VerifyException(
-                f"Mismatching types for reduction accumulator: {acc.type} != {self.res.type}"
+                f"Mismatching types for fold accumulator: {acc.type} != {self.res.type}"
             )
 
-        # The second arg of the region is the iteration element
-        # It should have one fewer dimension than the arg
+        # The second arg of the region is a row of the arg
         if isattr(self.arg.type, TTConstr) and isattr(val.type, TTConstr):
             arg_shape = self.arg.type.get_shape()
             val_shape = val.type.get_shape()
 
             if len(arg_shape) != (len(val_shape) + 1) or arg_shape[1:] != val_shape:
                 raise VerifyException(
-                    f"Mismatching shapes for reduction value and operand: {arg_shape} != {val_shape}"
+                    f"Mismatching shapes for fold value and operand: {arg_shape} != {val_shape}"
                 )
 
 
+class IteratingModifierHasShapeInferencePatternsTrait(HasShapeInferencePatternsTrait):
+    @classmethod
+    def get_shape_inference_patterns(cls):
+        from xuiua.shape_inference_patterns import (
+            IteratingModifierShapeInferencePattern,
+        )
+
+        return (IteratingModifierShapeInferencePattern(),)
+
+
+class IteratingModifierOperation(IRDLOperation, ABC):
+    """
+    Applies a specified transform to the cells of its inputs at each index of their
+    frame, the leading dimensions iterated over, and stacks the values it yields
+    along these dimensions.
+
+    The arguments of the block of the body are the cells of the inputs, whose frames
+    must be the same.
+    """
+
+    inputs = var_operand_def(UIUATensorConstr)
+    res = var_result_def(UIUATensorConstr)
+    body = region_def("single_block")
+
+    traits = frozenset((Pure(), IteratingModifierHasShapeInferencePatternsTrait()))
+
+    def __init__(
+        self,
+        inputs: Sequence[SSAValue],
+        result_types: Sequence[Attribute],
+        body: Region,
+    ):
+        super().__init__(
+            operands=(inputs,), result_types=(result_types,), regions=(body,)
+        )
+
+    @staticmethod
+    @abstractmethod
+    def frame_rank(rank: int) -> int:
+        """
+        Returns the number of leading dimensions iterated over in an input of the
+        given rank.
+        """
+        raise NotImplementedError()
+
+    def verify_(self) -> None:
+        args = self.body.block.args
+        if not args or len(args) != len(self.inputs):
+            raise VerifyException(
+                f"Invalid number of operands in {self.name} region: {len(args)}"
+            )
+
+        for input, arg in zip(self.inputs, args):
+            if isattr(input.type, TTConstr) and isattr(arg.type, TTConstr):
+                input_shape = input.type.get_shape()
+                arg_shape = arg.type.get_shape()
+
+                if input_shape[self.frame_rank(len(input_shape)) :] != arg_shape:
+                    raise VerifyException(
+                        f"Mismatching shapes for {self.name} input and cell: {input_shape} != {arg_shape}"
+                    )
+
+        yield_op = self.body.block.last_op
+        if isinstance(yield_op, YieldOp) and len(yield_op.arg) != len(self.res):
+            raise VerifyException(
+                f"Mismatching number of {self.name} results: {len(yield_op.arg)} != {len(self.res)}"
+            )
+
+
+@irdl_op_definition
+class RowsOp(IteratingModifierOperation):
+    """
+    Applies a specified transform to each row of its inputs, which must have the same
+    number of rows.
+
+    https://www.uiua.org/docs/rows
+    """
+
+    name = "uiua.rows"
+
+    @staticmethod
+    def frame_rank(rank: int) -> int:
+        return 1
+
+
+@irdl_op_definition
+class EachOp(IteratingModifierOperation):
+    """
+    Applies a specified transform to each element of its inputs, which must have the
+    same shape.
+
+    https://www.uiua.org/docs/each
+    """
+
+    name = "uiua.each"
+
+    @staticmethod
+    def frame_rank(rank: int) -> int:
+        return rank
+
+
+@irdl_op_definition
+class FusedOp(IRDLOperation):
+    """
+    Evaluates a chain of pervasive operations, optionally ending with a reduction, in
+    a single pass over the memory of its inputs.
+
+    The arguments of the block of the body are the inputs, and the values yielded by
+    the body are the results.
+    """
+
+    name = "uiua.fused"
+
+    inputs = var_operand_def(UIUATensorConstr)
+    res = var_result_def(UIUATensorConstr)
+    body = region_def("single_block")
+
+    traits = frozenset((Pure(),))
+
+    def __init__(
+        self,
+        inputs: Sequence[SSAValue],
+        result_types: Sequence[Attribute],
+        body: Region,
+    ):
+        super().__init__(
+            operands=(inputs,), result_types=(result_types,), regions=(body,)
+        )
+
+    def verify_(self) -> None:
+        block = self.body.block
+        arg_types = tuple(arg.type for arg in block.args)
+        input_types = tuple(i.type for i in self.inputs)
+        if arg_types != input_types:
+            raise VerifyException(
+                f"Mismatching types for fused inputs: {arg_types} != {input_types}"
+            )
+
+        yield_op = block.last_op
+        if not isinstance(yield_op, YieldOp):
+            raise VerifyException("Fused body should end with a uiua.yield")
+        yield_types = tuple(arg.type for arg in yield_op.arg)
+        if yield_types != self.res.types:
+            raise VerifyException(
+                f"Mismatching types for fused results: {yield_types} != {self.res.types}"
+            )
+
+
+class YieldOpHasShapeInferencePatternsTrait(HasShapeInferencePatternsTrait):
+    @classmethod
+    def get_shape_inference_patterns(cls):
+        from xuiua.shape_inference_patterns import (
+            YieldOpShapeInferencePattern,
+        )
+
+        return (YieldOpShapeInferencePattern(),)
+
+
 @irdl_op_definition
 class YieldOp(IRDLOperation):
     """
-    Yields a reduction value.
+    Yields the values of a modifier's body, or the results of a fused operation.
     """
 
     name = "uiua.yield"
 
     arg = var_operand_def(UIUATensorConstr)
 
-    traits = frozenset((lambda: HasParent(ReduceOp),))
+    traits = traits_def(
+        lambda: frozenset(
+            (
+                HasParent(ReduceOp, ScanOp, FoldOp, RowsOp, EachOp, FusedOp),
+                IsTerminator(),
+                YieldOpHasShapeInferencePatternsTrait(),
+            )
+        )
+    )
 
     def __init__(self, *args: SSAValue):
-        super().__init__(operands=(args))
+        super().__init__(operands=(args,))
 
 
 UIUA = Dialect(
     "uiua",
     [
+        AbsoluteValueOp,
         AddOp,
+        AtangentOp,
         CastOp,
+        CeilingOp,
+        DivideOp,
+        DropOp,
+        EachOp,
+        EqualsOp,
+        FloorOp,
+        FoldOp,
+        FusedOp,
+        GreaterOrEqualOp,
+        GreaterThanOp,
+        JoinOp,
+        LessOrEqualOp,
+        LessThanOp,
+        LogarithmOp,
+        MaximumOp,
+        MinimumOp,
+        ModulusOp,
         MultiplyOp,
+        NegateOp,
+        NotEqualsOp,
+        NotOp,
+        PowerOp,
+        RangeOp,
         ReduceOp,
+        ReshapeOp,
+        ReverseOp,
+        RoundOp,
+        RowsOp,
+        ScanOp,
+        SignOp,
+        SineOp,
+        SqrtOp,
+        SubtractOp,
+        TakeOp,
+        TransposeOp,
         YieldOp,
     ],
 )
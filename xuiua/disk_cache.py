@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Sequence
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import NamedTuple
+
+STABLEHLO_SUFFIX = ".mlir"
+EXECUTABLE_SUFFIX = ".xla"
+
+
+def package_versions() -> dict[str, str]:
+    """
+    The versions of the packages that influence the compiled output.
+    """
+    versions: dict[str, str] = {}
+    for package in ("xuiua", "xdsl", "jax", "jaxlib"):
+        try:
+            versions[package] = version(package)
+        except PackageNotFoundError:
+            versions[package] = "unknown"
+    return versions
+
+
+class DiskCacheEntry(NamedTuple):
+    stablehlo: str
+    "The textual lowered module."
+    executable: bytes | None
+    "The serialized XLA executable, if the backend supports serialization."
+
+
+class DiskCache:
+    """
+    A content-addressed cache of lowered modules and compiled executables, persisted in
+    a directory and shared between processes.
+
+    Entries are written to temporary files and atomically moved into place, so
+    concurrent writers of the same key never expose partially written entries.
+    When the total size of the directory exceeds `max_bytes`, the least recently used
+    entries are deleted.
+    """
+
+    path: Path
+    max_bytes: int
+
+    def __init__(self, path: Path | str, max_bytes: int = 1 << 30):
+        if max_bytes < 1:
+            raise ValueError(f"Cache size must be positive, got {max_bytes}")
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(
+        source: str,
+        entry: str,
+        shapes: Sequence[Sequence[int]],
+        dtypes: Sequence[str],
+        pipeline: str,
+    ) -> str:
+        """
+        Returns the key for the function `entry` in the source, compiled with the given
+        input shapes, dtypes and pass pipeline, using the versions of the installed
+        packages.
+        """
+        contents = json.dumps(
+            {
+                "source": source,
+                "entry": entry,
+                "shapes": [list(shape) for shape in shapes],
+                "dtypes": list(dtypes),
+                "pipeline": pipeline,
+                "versions": package_versions(),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(contents.encode()).hexdigest()
+
+    def _file(self, key: str, suffix: str) -> Path:
+        return self.path / f"{key}{suffix}"
+
+    def get(self, key: str) -> DiskCacheEntry | None:
+        stablehlo_file = self._file(key, STABLEHLO_SUFFIX)
+        executable_file = self._file(key, EXECUTABLE_SUFFIX)
+        try:
+            stablehlo = stablehlo_file.read_text()
+            os.utime(stablehlo_file)
+        except FileNotFoundError:
+            return None
+
+        try:
+            executable = executable_file.read_bytes()
+            os.utime(executable_file)
+        except FileNotFoundError:
+            executable = None
+
+        return DiskCacheEntry(stablehlo, executable)
+
+    def _write(self, file: Path, contents: bytes) -> None:
+        fd, tmp_name = tempfile.mkstemp(dir=self.path, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(contents)
+            os.replace(tmp_name, file)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def put(self, key: str, entry: DiskCacheEntry) -> None:
+        # The executable is written first, so that readers that find the lowered
+        # module also find the executable, if there is one.
+        if entry.executable is not None:
+            self._write(self._file(key, EXECUTABLE_SUFFIX), entry.executable)
+        self._write(self._file(key, STABLEHLO_SUFFIX), entry.stablehlo.encode())
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Deletes the least recently used entries until the cache fits in `max_bytes`.
+        """
+        files: list[tuple[float, int, Path]] = []
+        for file in self.path.iterdir():
+            if file.suffix not in (STABLEHLO_SUFFIX, EXECUTABLE_SUFFIX):
+                continue
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                # Deleted by a concurrent eviction
+                continue
+            files.append((stat.st_mtime, stat.st_size, file))
+
+        total = sum(size for _, size, _ in files)
+        files.sort()
+        for _, size, file in files:
+            if total <= self.max_bytes:
+                break
+            file.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        for file in self.path.iterdir():
+            if file.suffix in (STABLEHLO_SUFFIX, EXECUTABLE_SUFFIX):
+                file.unlink(missing_ok=True)
@@ -0,0 +1,257 @@
+"""
+Chooses between interpreting a Uiua program with NumPy and compiling it with JAX,
+based on an estimate of the work for the given inputs.
+
+Compiling takes tens of milliseconds, which dominates the evaluation of small inputs,
+while the compiled program is faster for large ones. Programs that are already
+compiled are always reused.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from enum import StrEnum
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from xdsl.dialects.builtin import ModuleOp
+from xdsl.dialects.func import FuncOp
+from xdsl.traits import SymbolTable
+
+from xuiua.disk_cache import package_versions
+from xuiua.frontend.ir_gen import build_module
+from xuiua.frontend.parser import Parser
+from xuiua.interpreter import interpret_module
+
+THRESHOLD_ENV = "XUIUA_DISPATCH_THRESHOLD"
+CALIBRATION_FILE = "dispatch.json"
+
+DEFAULT_THRESHOLD = float(1 << 26)
+"""
+The threshold used unless one is given or calibrated, above the ones measured on
+typical machines, so that programs are only compiled when it clearly pays off.
+"""
+
+
+class Route(StrEnum):
+    INTERPRET = "interpret"
+    "Evaluate with the NumPy interpreter."
+    CACHED = "cached"
+    "Execute the already compiled program."
+    COMPILE = "compile"
+    "Compile the program, then execute it."
+
+
+def estimate_work(module: ModuleOp, entry: str, inputs: Sequence[Any]) -> int:
+    """
+    Estimates the work of evaluating the function as the number of elements of the
+    inputs times the number of operations in the function.
+    """
+    func_op = SymbolTable.lookup_symbol(module, entry)
+    if not isinstance(func_op, FuncOp):
+        raise ValueError(f"No function named {entry}")
+    num_ops = sum(1 for _ in func_op.body.walk())
+    num_elements = sum(int(np.prod(np.shape(i))) for i in inputs)
+    return max(num_elements, 1) * num_ops
+
+
+CALIBRATION_SOURCE = "main ← +1×2+3×4"
+"""
+The program used to calibrate the threshold, whose operations the compiled path can
+fuse while the interpreter computes each intermediate array.
+"""
+
+
+def calibrate(size: int = 1 << 20, repeat: int = 5) -> float:
+    """
+    Returns the work below which interpreting is faster than compiling and executing,
+    measured by evaluating `CALIBRATION_SOURCE` on a vector of the given size both
+    ways.
+    """
+    import jax
+
+    from xuiua.compile import CompiledProgram, compile_executable, lower_source
+
+    module = build_module(Parser(CALIBRATION_SOURCE).parse_items())
+    small = (np.ones(1),)
+    large = (np.ones(size),)
+    work = estimate_work(module, "main", large)
+
+    def best_time(f: Any, *args: Any) -> float:
+        times: list[float] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            jax.block_until_ready(f(*args))
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    interpret_overhead = best_time(interpret_module, module, "main", small)
+    interpret_per_work = (
+        best_time(interpret_module, module, "main", large) - interpret_overhead
+    ) / work
+
+    start = time.perf_counter()
+    lowered = lower_source(CALIBRATION_SOURCE, "main", ((size,),))
+    program = CompiledProgram(lowered, compile_executable(lowered))
+    compile_time = time.perf_counter() - start
+    execute_per_work = best_time(program, *large) / work
+
+    if interpret_per_work <= execute_per_work:
+        # Compiling never pays off
+        return float("inf")
+    return max(compile_time - interpret_overhead, 0) / (
+        interpret_per_work - execute_per_work
+    )
+
+
+def calibration_file() -> Path | None:
+    cache_dir = os.environ.get("XUIUA_CACHE_DIR")
+    return Path(cache_dir) / CALIBRATION_FILE if cache_dir else None
+
+
+def write_atomically(file: Path, contents: str) -> None:
+    """
+    Writes the file through a temporary file replacing it, so that concurrent
+    processes never read a partially written file.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=file.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(contents)
+        os.replace(tmp_name, file)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+@cache
+def calibrated_threshold() -> float:
+    """
+    Returns the calibrated threshold, measured once per process, or once per package
+    versions if the disk cache is enabled.
+    """
+    file = calibration_file()
+    if file is not None:
+        try:
+            contents = json.loads(file.read_text())
+            if contents["versions"] == package_versions():
+                return float(contents["threshold"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    threshold = calibrate()
+
+    if file is not None:
+        file.parent.mkdir(parents=True, exist_ok=True)
+        write_atomically(
+            file, json.dumps({"versions": package_versions(), "threshold": threshold})
+        )
+    return threshold
+
+
+@dataclass(frozen=True)
+class DispatchConfig:
+    threshold: float | None = field(default=None)
+    """
+    The work below which programs are interpreted.
+    Defaults to `XUIUA_DISPATCH_THRESHOLD` if set, to a calibrated value if
+    `calibrate` is set, and to `DEFAULT_THRESHOLD` otherwise.
+    """
+    calibrate: bool = field(default=False)
+    """
+    Whether to calibrate the default threshold, which imports JAX and takes about a
+    second the first time, or once per package versions if the disk cache is enabled.
+    """
+
+    def get_threshold(self) -> float:
+        if self.threshold is not None:
+            return self.threshold
+        if (env_threshold := os.environ.get(THRESHOLD_ENV)) is not None:
+            return float(env_threshold)
+        if self.calibrate:
+            return calibrated_threshold()
+        return DEFAULT_THRESHOLD
+
+
+class Dispatcher:
+    """
+    Evaluates programs with the interpreter or the compiled path, whichever is
+    expected to be faster for the inputs.
+    """
+
+    config: DispatchConfig
+
+    def __init__(self, config: DispatchConfig = DispatchConfig()):
+        self.config = config
+
+    def is_compiled(self, source: str, entry: str, inputs: Sequence[Any]) -> bool:
+        # Nothing can be compiled if the compiler was never imported, which is worth
+        # checking to avoid importing JAX
+        compile_module = sys.modules.get("xuiua.compile")
+        if compile_module is None:
+            return False
+        key = compile_module.CacheKey(
+            source,
+            entry,
+            tuple(tuple(np.shape(i)) for i in inputs),
+            tuple(str(np.asarray(i).dtype) for i in inputs),
+        )
+        return key in compile_module.PROGRAM_CACHE
+
+    def route(
+        self, module: ModuleOp, source: str, entry: str, inputs: Sequence[Any]
+    ) -> Route:
+        if self.is_compiled(source, entry, inputs):
+            return Route.CACHED
+        if estimate_work(module, entry, inputs) < self.config.get_threshold():
+            return Route.INTERPRET
+        return Route.COMPILE
+
+    def run_source(
+        self, source: str, entry: str, inputs: Sequence[Any]
+    ) -> tuple[Any, ...]:
+        """
+        Evaluates the function named `entry` in the source with the given inputs.
+        Programs that the compiler does not support are interpreted whatever the size
+        of the inputs.
+        Inputs are converted to `float64`, the only type that both paths support.
+        """
+        inputs = tuple(
+            i if getattr(i, "dtype", None) == np.float64 else np.asarray(i, np.float64)
+            for i in inputs
+        )
+        module = build_module(Parser(source).parse_items())
+        if self.route(module, source, entry, inputs) == Route.INTERPRET:
+            return interpret_module(module, entry, inputs)
+
+        from xuiua.compile import compile_source
+
+        try:
+            program = compile_source(
+                source,
+                entry,
+                tuple(np.shape(i) for i in inputs),
+                tuple(str(np.asarray(i).dtype) for i in inputs),
+            )
+        except NotImplementedError:
+            return interpret_module(module, entry, inputs)
+        return program(*inputs)
+
+    def run(self, expr: str, inputs: Sequence[Any]) -> tuple[Any, ...]:
+        """
+        Evaluates the expression with the given inputs.
+        """
+        return self.run_source("main ← " + expr, "main", inputs)
+
+
+def run(expr: str, inputs: Sequence[Any]) -> tuple[Any, ...]:
+    """
+    Evaluates the expression with the given inputs, with the default configuration.
+    """
+    return Dispatcher().run(expr, inputs)
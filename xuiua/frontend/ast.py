@@ -249,10 +249,11 @@ class Spaces(NamedTuple):
 class PrimitiveClass(Enum):
     STACK = auto()
     # CONSTANT = auto()
+    MONADIC_PERVASIVE = auto()
     DYADIC_PERVASIVE = auto()
-    # MonadicArray,
-    # DyadicArray,
-    # IteratingModifier,
+    MONADIC_ARRAY = auto()
+    DYADIC_ARRAY = auto()
+    ITERATING_MODIFIER = auto()
     AGGREGATING_MODIFIER = auto()
     # InversionModifier,
     PLANET = auto()
@@ -280,45 +281,131 @@ class PrimitiveSpelling(StrEnum):
     IDENTITY = "∘"
     MULTIPLY = "×"
     REDUCE = "/"
+    SCAN = "\\"
+    FOLD = "∧"
+    ROWS = "≡"
+    EACH = "∵"
+
+    # Monadic pervasive
+    NOT = "¬"
+    SIGN = "±"
+    NEGATE = "¯"
+    ABSOLUTE_VALUE = "⌵"
+    SQRT = "√"
+    SINE = "∿"
+    FLOOR = "⌊"
+    CEILING = "⌈"
+    ROUND = "⁅"
+
+    # Dyadic pervasive
+    EQUALS = "="
+    NOT_EQUALS = "≠"
+    LESS_THAN = "<"
+    LESS_OR_EQUAL = "≤"
+    GREATER_THAN = ">"
+    GREATER_OR_EQUAL = "≥"
+    SUBTRACT = "-"
+    DIVIDE = "÷"
+    MODULUS = "◿"
+    POWER = "ⁿ"
+    LOGARITHM = "ₙ"
+    MINIMUM = "↧"
+    MAXIMUM = "↥"
+    ATANGENT = "∠"
+
+    # Monadic array
+    RANGE = "⇡"
+    REVERSE = "⇌"
+    TRANSPOSE = "⍉"
+
+    # Dyadic array
+    RESHAPE = "↯"
+    JOIN = "⊂"
+    TAKE = "↙"
+    DROP = "↘"
 
     def num_inputs(self) -> int:
-        match self:
-            case PrimitiveSpelling.ADD:
-                return 2
-            case PrimitiveSpelling.DUPLICATE:
-                return 1
-            case PrimitiveSpelling.IDENTITY:
-                return 1
-            case PrimitiveSpelling.MULTIPLY:
+        if self is PrimitiveSpelling.FOLD:
+            # The array and the initial accumulator
+            return 2
+        match self.primitive_class():
+            case PrimitiveClass.DYADIC_PERVASIVE | PrimitiveClass.DYADIC_ARRAY:
                 return 2
-            case PrimitiveSpelling.REDUCE:
+            case (
+                PrimitiveClass.STACK
+                | PrimitiveClass.MONADIC_PERVASIVE
+                | PrimitiveClass.MONADIC_ARRAY
+                | PrimitiveClass.AGGREGATING_MODIFIER
+                | PrimitiveClass.PLANET
+            ):
                 return 1
+            case PrimitiveClass.ITERATING_MODIFIER:
+                # As many as the arguments of the modified function
+                return 0
 
     def num_outputs(self) -> int:
-        match self:
-            case PrimitiveSpelling.ADD:
-                return 1
-            case PrimitiveSpelling.DUPLICATE:
-                return 2
-            case PrimitiveSpelling.IDENTITY:
-                return 1
-            case PrimitiveSpelling.MULTIPLY:
-                return 1
-            case PrimitiveSpelling.REDUCE:
-                return 1
+        if self is PrimitiveSpelling.DUPLICATE:
+            return 2
+        return 1
 
     def primitive_class(self) -> PrimitiveClass:
         match self:
-            case PrimitiveSpelling.ADD:
-                return PrimitiveClass.DYADIC_PERVASIVE
             case PrimitiveSpelling.DUPLICATE:
                 return PrimitiveClass.STACK
             case PrimitiveSpelling.IDENTITY:
                 return PrimitiveClass.PLANET
-            case PrimitiveSpelling.MULTIPLY:
-                return PrimitiveClass.DYADIC_PERVASIVE
-            case PrimitiveSpelling.REDUCE:
+            case (
+                PrimitiveSpelling.REDUCE
+                | PrimitiveSpelling.SCAN
+                | PrimitiveSpelling.FOLD
+            ):
                 return PrimitiveClass.AGGREGATING_MODIFIER
+            case PrimitiveSpelling.ROWS | PrimitiveSpelling.EACH:
+                return PrimitiveClass.ITERATING_MODIFIER
+            case (
+                PrimitiveSpelling.NOT
+                | PrimitiveSpelling.SIGN
+                | PrimitiveSpelling.NEGATE
+                | PrimitiveSpelling.ABSOLUTE_VALUE
+                | PrimitiveSpelling.SQRT
+                | PrimitiveSpelling.SINE
+                | PrimitiveSpelling.FLOOR
+                | PrimitiveSpelling.CEILING
+                | PrimitiveSpelling.ROUND
+            ):
+                return PrimitiveClass.MONADIC_PERVASIVE
+            case (
+                PrimitiveSpelling.ADD
+                | PrimitiveSpelling.MULTIPLY
+                | PrimitiveSpelling.EQUALS
+                | PrimitiveSpelling.NOT_EQUALS
+                | PrimitiveSpelling.LESS_THAN
+                | PrimitiveSpelling.LESS_OR_EQUAL
+                | PrimitiveSpelling.GREATER_THAN
+                | PrimitiveSpelling.GREATER_OR_EQUAL
+                | PrimitiveSpelling.SUBTRACT
+                | PrimitiveSpelling.DIVIDE
+                | PrimitiveSpelling.MODULUS
+                | PrimitiveSpelling.POWER
+                | PrimitiveSpelling.LOGARITHM
+                | PrimitiveSpelling.MINIMUM
+                | PrimitiveSpelling.MAXIMUM
+                | PrimitiveSpelling.ATANGENT
+            ):
+                return PrimitiveClass.DYADIC_PERVASIVE
+            case (
+                PrimitiveSpelling.RANGE
+                | PrimitiveSpelling.REVERSE
+                | PrimitiveSpelling.TRANSPOSE
+            ):
+                return PrimitiveClass.MONADIC_ARRAY
+            case (
+                PrimitiveSpelling.RESHAPE
+                | PrimitiveSpelling.JOIN
+                | PrimitiveSpelling.TAKE
+                | PrimitiveSpelling.DROP
+            ):
+                return PrimitiveClass.DYADIC_ARRAY
 
 
 class Primitive(NamedTuple):
@@ -328,6 +415,15 @@ class Primitive(NamedTuple):
         printer.print(self.spelling.name)
 
 
+class Ref(NamedTuple):
+    "A reference to a binding"
+
+    name: str
+
+    def print(self, printer: Printer):
+        printer.print(f"ref({self.name})")
+
+
 Modifier: TypeAlias = Primitive  # | Ref
 
 
@@ -351,7 +447,7 @@ class Modified(NamedTuple):
         printer.print("\n)")
 
 
-Word: TypeAlias = Number | Array | Comment | Spaces | Primitive | Func | Modified
+Word: TypeAlias = Number | Array | Comment | Spaces | Primitive | Func | Modified | Ref
 
 
 def print_word(word: Word, printer: Printer) -> None:
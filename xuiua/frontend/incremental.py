@@ -0,0 +1,352 @@
+"""
+Incremental parsing and IR generation, for processes that keep a Uiua source up to
+date with the edits made to it.
+
+Top-level items are parsed independently of each other, so an edit only requires
+re-parsing the items around it, and re-building the functions of these items.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from typing import NamedTuple, TypeVar
+
+from xdsl.dialects.builtin import FunctionType, ModuleOp
+from xdsl.dialects.func import Call, FuncOp
+from xdsl.parser import Input, Span
+from xdsl.rewriter import InsertPoint, Rewriter
+
+from xuiua.frontend.ast import BindingItem, Item, Items, WordsItem
+from xuiua.frontend.ir_gen import build_binding_func, build_main_func
+from xuiua.frontend.parser import Parser
+
+T = TypeVar("T")
+
+
+class TextEdit(NamedTuple):
+    "The replacement of the text between two offsets of the source."
+
+    start: int
+    end: int
+    text: str
+
+    def apply(self, content: str) -> str:
+        return content[: self.start] + self.text + content[self.end :]
+
+    @property
+    def delta(self) -> int:
+        "The change in length of the source."
+        return len(self.text) - (self.end - self.start)
+
+    @staticmethod
+    def between(old: str, new: str) -> "TextEdit":
+        """
+        Returns the edit replacing the text between the common prefix and suffix of
+        the contents.
+        """
+        # Binary searches, comparing slices rather than single characters
+        low, high = 0, min(len(old), len(new))
+        while low < high:
+            mid = (low + high + 1) // 2
+            if old[:mid] == new[:mid]:
+                low = mid
+            else:
+                high = mid - 1
+        prefix = low
+
+        low, high = 0, min(len(old), len(new)) - prefix
+        while low < high:
+            mid = (low + high + 1) // 2
+            if old[len(old) - mid :] == new[len(new) - mid :]:
+                low = mid
+            else:
+                high = mid - 1
+        suffix = low
+
+        return TextEdit(prefix, len(old) - suffix, new[prefix : len(new) - suffix])
+
+
+class SourceItem(NamedTuple):
+    "An item with the offsets of the source it was parsed from."
+
+    item: Item
+    start: int
+    end: int
+    shift: int = 0
+    "The offset by which the spans of the item are yet to be shifted."
+
+
+class ItemsEdit(NamedTuple):
+    "The replacement of the items of a source following a text edit."
+
+    first: int
+    "The index of the first replaced item."
+    removed: tuple[Item, ...]
+    inserted: tuple[Item, ...]
+
+
+def shift_spans(node: T, delta: int, input: Input) -> T:
+    """
+    Returns the node with its spans moved by `delta` into the input.
+    """
+    if isinstance(node, Span):
+        return Span(node.start + delta, node.end + delta, input)  # pyright: ignore
+    if isinstance(node, tuple):
+        fields = tuple(shift_spans(field, delta, input) for field in node)
+        if hasattr(node, "_fields"):
+            return type(node)(*fields)
+        return fields  # pyright: ignore
+    return node
+
+
+def parse_source_items(parser: Parser) -> list[SourceItem]:
+    items: list[SourceItem] = []
+    start = parser.pos
+    while (item := parser.parse_optional_item()) is not None:
+        items.append(SourceItem(item, start, parser.pos))
+        start = parser.pos
+    return items
+
+
+class IncrementalParser:
+    """
+    Keeps the items of a source up to date with the edits made to it.
+
+    Only the items around an edit are re-parsed, the items after it being reused with
+    their spans shifted, which is deferred until they are read from `items`.
+    The spans of the items before the edit are kept, and may refer to a previous
+    input, which has the same content up to the edit.
+    """
+
+    input: Input
+    source_items: list[SourceItem]
+    "All the parsed items, including the empty words items filtered out of `items`."
+
+    def __init__(self, input: Input | str):
+        if isinstance(input, str):
+            input = Input(input, "<unknown>")
+        self.input = input
+        self.source_items = parse_source_items(Parser(input))
+
+    @property
+    def items(self) -> Items:
+        source_items = self.source_items
+        for i, source_item in enumerate(source_items):
+            if source_item.shift:
+                source_items[i] = SourceItem(
+                    shift_spans(source_item.item, source_item.shift, self.input),
+                    source_item.start,
+                    source_item.end,
+                )
+        return Items(
+            tuple(
+                source_item.item
+                for source_item in source_items
+                if not isinstance(source_item.item, WordsItem) or source_item.item.lines
+            )
+        )
+
+    def is_boundary(self, pos: int) -> bool:
+        """
+        Whether lexing can start at the offset, which is the case at the start of each
+        line, as no token other than a newline contains one.
+        """
+        content = self.input.content
+        return pos == 0 or pos == len(content) or content[pos - 1] == "\n"
+
+    def affected_range(self, edit: TextEdit) -> tuple[int, int]:
+        """
+        Returns the range of the items to re-parse after the edit.
+
+        These are the items touching the edit, extended so that the range starts and
+        ends at the start of a line, and is not next to a words item that its new
+        items could merge with.
+        """
+        items = self.source_items
+        first = bisect_left(items, edit.start, key=lambda item: item.end)
+        last = bisect_right(items, edit.end, key=lambda item: item.start)
+        while True:
+            if first > 0 and (
+                isinstance(items[first - 1].item, WordsItem)
+                or not self.is_boundary(items[first].start)
+            ):
+                first -= 1
+            elif last < len(items) and (
+                isinstance(items[last].item, WordsItem)
+                or not self.is_boundary(items[last].start)
+            ):
+                last += 1
+            else:
+                return first, last
+
+    def apply_edit(self, edit: TextEdit) -> ItemsEdit:
+        """
+        Updates the items following the edit of the source, and returns the items that
+        changed.
+        Raises a `ParseError` if the edited source does not parse, in which case the
+        items are not updated.
+        """
+        input = Input(edit.apply(self.input.content), self.input.name)
+        items = self.source_items
+        first, last = self.affected_range(edit)
+        start = items[first].start if first < len(items) else 0
+        end = items[last - 1].end + edit.delta if first < last else len(input.content)
+
+        inserted = parse_source_items(Parser(input, start, end))
+
+        delta = edit.delta
+        if delta:
+            items[last:] = (
+                SourceItem(
+                    source_item.item,
+                    source_item.start + delta,
+                    source_item.end + delta,
+                    source_item.shift + delta,
+                )
+                for source_item in items[last:]
+            )
+        removed = items[first:last]
+        items[first:last] = inserted
+        self.input = input
+
+        return ItemsEdit(
+            first,
+            tuple(source_item.item for source_item in removed),
+            tuple(source_item.item for source_item in inserted),
+        )
+
+
+class IncrementalModule:
+    """
+    Keeps the module built from a source up to date with the edits made to it.
+
+    Only the functions of the bindings re-parsed after an edit are rebuilt, with the
+    functions calling the bindings whose signature changed, and the `uiua_main`
+    function if a words item was re-parsed.
+    """
+
+    parser: IncrementalParser
+    module: ModuleOp
+    func_ops: list[FuncOp | None]
+    "The function of each item of the parser, if it is a binding."
+    main_op: FuncOp | None
+
+    def __init__(self, input: Input | str | IncrementalParser):
+        """
+        Builds the module of the source, or of the current items of the parser.
+        """
+        if not isinstance(input, IncrementalParser):
+            input = IncrementalParser(input)
+        self.parser = input
+        self.module = ModuleOp([])
+        self.func_ops = [
+            self.build_item(source_item.item, None)
+            for source_item in self.parser.source_items
+        ]
+        self.main_op = None
+        self.rebuild_main()
+
+    def build_item(self, item: Item, before: FuncOp | None) -> FuncOp | None:
+        if not isinstance(item, BindingItem):
+            return None
+        func_op = build_binding_func(self.module, item)
+        if before is None:
+            insert_point = InsertPoint.at_end(self.module.body.block)
+        else:
+            insert_point = InsertPoint.before(before)
+        Rewriter.insert_op(func_op, insert_point)
+        return func_op
+
+    def rebuild_main(self) -> None:
+        if self.main_op is not None:
+            Rewriter.erase_op(self.main_op)
+        self.main_op = build_main_func(
+            self.module,
+            (
+                source_item.item
+                for source_item in self.parser.source_items
+                if isinstance(source_item.item, WordsItem) and source_item.item.lines
+            ),
+        )
+        if self.main_op is not None:
+            Rewriter.insert_op(self.main_op, InsertPoint.at_end(self.module.body.block))
+
+    def apply_edit(self, edit: TextEdit) -> ModuleOp:
+        """
+        Updates the module following the edit of the source, and returns it.
+        Raises a `ParseError` if the edited source does not parse, in which case the
+        module is not updated.
+        """
+        self.update(self.parser.apply_edit(edit))
+        return self.module
+
+    def update(self, items_edit: ItemsEdit) -> None:
+        """
+        Updates the module following the edit of the items of the parser.
+        If building a function raises an exception, the module is left inconsistent,
+        and should be rebuilt.
+        """
+        index = items_edit.first
+        last = index + len(items_edit.removed)
+
+        old_types = function_types(self.func_ops[index:last])
+        for func_op in self.func_ops[index:last]:
+            if func_op is not None:
+                Rewriter.erase_op(func_op)
+
+        before = next(
+            (func_op for func_op in self.func_ops[last:] if func_op is not None),
+            self.main_op,
+        )
+        self.func_ops[index:last] = (
+            self.build_item(item, before) for item in items_edit.inserted
+        )
+        end = index + len(items_edit.inserted)
+        new_types = function_types(self.func_ops[index:end])
+
+        # The callers of the bindings whose signature changed are rebuilt too
+        changed = {
+            name
+            for name in old_types.keys() | new_types.keys()
+            if old_types.get(name) != new_types.get(name)
+        }
+        if changed:
+            self.rebuild_callers(end, changed)
+
+        if (self.main_op is not None and calls_any(self.main_op, changed)) or any(
+            isinstance(item, WordsItem)
+            for item in items_edit.removed + items_edit.inserted
+        ):
+            self.rebuild_main()
+
+    def rebuild_callers(self, start: int, changed: set[str]) -> None:
+        """
+        Rebuilds the functions from the index onwards that call one of the changed
+        functions, adding the names of those whose signature changes in turn.
+        """
+        source_items = self.parser.source_items
+        for i in range(start, len(self.func_ops)):
+            func_op = self.func_ops[i]
+            if func_op is None or not calls_any(func_op, changed):
+                continue
+            old_type = func_op.function_type
+            new_op = self.build_item(source_items[i].item, func_op)
+            Rewriter.erase_op(func_op)
+            self.func_ops[i] = new_op
+            assert new_op is not None
+            if new_op.function_type != old_type:
+                changed.add(new_op.sym_name.data)
+
+
+def function_types(func_ops: Iterable[FuncOp | None]) -> dict[str, FunctionType]:
+    return {
+        func_op.sym_name.data: func_op.function_type
+        for func_op in func_ops
+        if func_op is not None
+    }
+
+
+def calls_any(func_op: FuncOp, names: set[str]) -> bool:
+    return any(
+        isinstance(op, Call) and op.callee.root_reference.data in names
+        for op in func_op.walk()
+    )
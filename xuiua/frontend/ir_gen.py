@@ -1,15 +1,16 @@
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
 from contextlib import contextmanager
 from typing import Any, Callable, Sequence, cast
 from xdsl.dialects.builtin import ArrayAttr, FunctionType, ModuleOp
 from xdsl.dialects.arith import Constant
-from xdsl.dialects.func import FuncOp, Return
+from xdsl.dialects.func import Call, FuncOp, Return
 
 from xdsl.builder import Builder
 from xdsl.ir import Block, Region, SSAValue
 from xdsl.irdl import IRDLOperation
 from xdsl.parser import DenseIntOrFPElementsAttr
 from xdsl.rewriter import InsertPoint, Rewriter
+from xdsl.traits import SymbolTable
 
 from xuiua.dialect import UIUA, YieldOp, utf64, t64
 
@@ -26,6 +27,7 @@ from xuiua.frontend.ast import (
     Primitive,
     PrimitiveClass,
     PrimitiveSpelling,
+    Ref,
     ScopedModule,
     Spaces,
     Spanned,
@@ -60,13 +62,50 @@ class BlockBuilder:
 
     def build_number(self, number: Number) -> None:
         constant_op = Constant(
-            DenseIntOrFPElementsAttr.from_list(t64(1), (number.float_val,))
+            DenseIntOrFPElementsAttr.from_list(t64(), (number.float_val,))
         )
         self.builder.insert(constant_op)
         self.stack.append(constant_op.result)
 
     def build_array(self, array: Array) -> None:
-        raise NotImplementedError
+        """
+        Builds the array of the values pushed by the words, the first element being
+        the top of the stack, as a single constant.
+        The values must be constants of the same shape, such as numbers and arrays of
+        numbers.
+        """
+        block = Block()
+        inner_builder = BlockBuilder(self.module, block)
+        # The lines are evaluated from the last, so that the elements are in the
+        # order they are written in
+        for line in reversed(array.lines):
+            inner_builder.build_word_line(line)
+        if block.args:
+            raise NotImplementedError("Array literals using values from the stack")
+
+        rows: list[DenseIntOrFPElementsAttr] = []
+        for value in reversed(inner_builder.stack):
+            if not isinstance(value.owner, Constant) or not isinstance(
+                value.owner.value, DenseIntOrFPElementsAttr
+            ):
+                raise NotImplementedError("Array literals of computed values")
+            rows.append(value.owner.value)
+
+        shapes = {tuple(row.get_shape() or ()) for row in rows}
+        if len(shapes) > 1:
+            raise ValueError(
+                f"Array elements have different shapes: {', '.join(map(str, shapes))}"
+            )
+        shape = shapes.pop() if shapes else ()
+
+        constant_op = Constant(
+            DenseIntOrFPElementsAttr.from_list(
+                t64(len(rows), *shape),
+                tuple(element.value.data for row in rows for element in row.data),
+            )
+        )
+        self.builder.insert(constant_op)
+        self.stack.append(constant_op.result)
 
     def build_func(self, func: Func) -> None:
         for line in func.lines:
@@ -104,6 +143,16 @@ class BlockBuilder:
 
         return new_vals + popped
 
+    def build_ref(self, ref: Ref) -> None:
+        callee = SymbolTable.lookup_symbol(self.module, ref.name)
+        if not isinstance(callee, FuncOp):
+            raise ValueError(f"Unknown binding {ref.name}")
+        function_type = callee.function_type
+        operands = self.pop_args(len(function_type.inputs))
+        call_op = Call(ref.name, operands, function_type.outputs.data)
+        self.builder.insert(call_op)
+        self.stack.extend(call_op.results)
+
     def build_word(self, word: Word) -> None:
         WORD_BUILDERS[type(word)](self, word)
 
@@ -113,7 +162,7 @@ class BlockBuilder:
         for spanned_word in reversed(spanned_words):
             self.build_word(spanned_word.value)
 
-    def build_dyadic_pervasive(
+    def build_function(
         self, spelling: PrimitiveSpelling, operands: Sequence[SSAValue]
     ) -> None:
         op = PRIMITIVE_MAP[spelling].build(
@@ -129,7 +178,9 @@ class BlockBuilder:
 
     def build_modified(self, modified: Modified) -> None:
         spelling = modified.modifier.spelling
-        operands = self.pop_args(spelling.num_inputs())
+        iterating = spelling.primitive_class() is PrimitiveClass.ITERATING_MODIFIER
+        # The arguments of iterating modifiers are popped once the body is built
+        operands = () if iterating else self.pop_args(spelling.num_inputs())
 
         block = Block()
         region = Region(block)
@@ -143,11 +194,24 @@ class BlockBuilder:
             InsertPoint.at_end(block),
         )
 
-        op = PRIMITIVE_MAP[spelling].build(
-            operands=operands,
-            result_types=(utf64,) * spelling.num_outputs(),
-            regions=(region,),
-        )
+        if iterating:
+            # Iterates over as many arguments as the modified function takes, and
+            # stacks each of the values it returns
+            if not block.args:
+                raise NotImplementedError(
+                    f"{spelling.name.lower()} of a function without arguments"
+                )
+            op = PRIMITIVE_MAP[spelling].build(
+                operands=(self.pop_args(len(block.args)),),
+                result_types=((utf64,) * len(inner_builder.stack),),
+                regions=(region,),
+            )
+        else:
+            op = PRIMITIVE_MAP[spelling].build(
+                operands=operands,
+                result_types=(utf64,) * spelling.num_outputs(),
+                regions=(region,),
+            )
         self.builder.insert(op)
         self.stack.extend(op.results)
 
@@ -165,8 +229,13 @@ class BlockBuilder:
             return
 
         match primitive.spelling.primitive_class():
-            case PrimitiveClass.DYADIC_PERVASIVE:
-                self.build_dyadic_pervasive(primitive.spelling, operands)
+            case (
+                PrimitiveClass.MONADIC_PERVASIVE
+                | PrimitiveClass.DYADIC_PERVASIVE
+                | PrimitiveClass.MONADIC_ARRAY
+                | PrimitiveClass.DYADIC_ARRAY
+            ):
+                self.build_function(primitive.spelling, operands)
             case PrimitiveClass.AGGREGATING_MODIFIER:
                 self.build_aggregating_modifier(primitive.spelling, operands)
             case not_implemented_class:
@@ -181,6 +250,7 @@ WORD_BUILDERS: dict[type[Word], Callable[[BlockBuilder, Any], None]] = {
     Spaces: BlockBuilder.build_spaces,
     Primitive: BlockBuilder.build_primitive,
     Modified: BlockBuilder.build_modified,
+    Ref: BlockBuilder.build_ref,
 }
 
 
@@ -236,12 +306,10 @@ class ModuleBuilder:
             self.main_builder.build_word_line(line)
 
     def build_binding_item(self, binding_item: BindingItem) -> None:
-        with FunctionBuilder.build_func_op(self.module, binding_item.name) as fb:
-            fb.build_word_line(binding_item.words)
-            Rewriter.insert_op(
-                fb.func_op,
-                InsertPoint.at_end(self.module.body.block),
-            )
+        Rewriter.insert_op(
+            build_binding_func(self.module, binding_item),
+            InsertPoint.at_end(self.module.body.block),
+        )
 
     def build_module_item(self, module_item: ModuleItem) -> None:
         raise NotImplementedError
@@ -274,6 +342,34 @@ ITEM_BUILDERS: dict[type[Item], Callable[[ModuleBuilder, Any], None]] = {
 }
 
 
+def build_binding_func(module: ModuleOp, binding_item: BindingItem) -> FuncOp:
+    """
+    Builds the function of the binding, without inserting it in the module.
+    """
+    with FunctionBuilder.build_func_op(module, binding_item.name) as fb:
+        fb.build_word_line(binding_item.words)
+    return fb.func_op
+
+
+def build_main_func(
+    module: ModuleOp, words_items: Iterable[WordsItem]
+) -> FuncOp | None:
+    """
+    Builds the function of the code outside of bindings, if any, without inserting it
+    in the module.
+    """
+    main_builder = None
+    for words_item in words_items:
+        if main_builder is None:
+            main_builder = FunctionBuilder(module, FuncOp("uiua_main", ((), ())))
+        for line in words_item.lines:
+            main_builder.build_word_line(line)
+    if main_builder is None:
+        return None
+    main_builder.finalize()
+    return main_builder.func_op
+
+
 def build_module(items: Items) -> ModuleOp:
     b = ModuleBuilder()
     b.build_module(items)
@@ -0,0 +1,92 @@
+import re
+from array import array
+from enum import IntEnum
+
+from xuiua.frontend.ast import PrimitiveSpelling
+
+
+class TokenKind(IntEnum):
+    NUMBER = 0
+    PRIMITIVE = 1
+    IDENTIFIER = 2
+    SPACE = 3
+    "A single whitespace character other than a newline."
+    NEWLINE = 4
+    COMMENT = 5
+    ARROW = 6
+    OPEN_BRACKET = 7
+    CLOSE_BRACKET = 8
+    OPEN_PAREN = 9
+    CLOSE_PAREN = 10
+    UNKNOWN = 11
+    "A single character that does not start any other token."
+    END = 12
+    "The end of the input."
+
+
+IDENTIFIER = r"[a-zA-Z]\w+"
+"""
+The pattern of an identifier, currently letter followed by a number of letters or numbers.
+
+This is the actual UIUA impl, eventually would be good to move to it:
+``` rust
+pub fn is_ident_char(c: char) -> bool {
+    c.is_alphabetic() && !"ⁿₙπτηℂλ".contains(c) || SUBSCRIPT_NUMS.contains(&c)
+}
+```
+"""
+
+TOKEN_PATTERNS: dict[TokenKind, str] = {
+    TokenKind.NUMBER: r"¯?\d+(?:\.\d+)?",
+    TokenKind.PRIMITIVE: "|".join(re.escape(p.value) for p in PrimitiveSpelling),
+    TokenKind.IDENTIFIER: IDENTIFIER,
+    TokenKind.SPACE: r"[^\S\n]",
+    TokenKind.NEWLINE: r"\n",
+    TokenKind.COMMENT: r"#[^\n]*",
+    TokenKind.ARROW: "←",
+    TokenKind.OPEN_BRACKET: r"\[",
+    TokenKind.CLOSE_BRACKET: r"\]",
+    TokenKind.OPEN_PAREN: r"\(",
+    TokenKind.CLOSE_PAREN: r"\)",
+    TokenKind.UNKNOWN: r".",
+}
+
+TOKEN = re.compile("|".join(f"({pattern})" for pattern in TOKEN_PATTERNS.values()))
+"""
+Matches any token, the index of the matching group being the token kind plus one.
+"""
+
+
+class Tokens:
+    """
+    The tokens of an input, lexed in a single pass.
+
+    The tokens cover the input from `pos` to `end` without gaps, so the end of each
+    token is the start of the next one, and the last token is an `END` token at `end`.
+    """
+
+    content: str
+    kinds: "array[int]"
+    starts: "array[int]"
+
+    def __init__(self, content: str, pos: int = 0, end: int | None = None):
+        self.content = content
+        if end is None:
+            end = len(content)
+        kinds = array("B")
+        starts = array("L")
+        for match in TOKEN.finditer(content, pos, end):
+            kinds.append(match.lastindex - 1)  # pyright: ignore[reportOptionalOperand]
+            starts.append(match.start())
+        kinds.append(TokenKind.END)
+        starts.append(end)
+        self.kinds = kinds
+        self.starts = starts
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def text(self, index: int) -> str:
+        if self.kinds[index] == TokenKind.END:
+            return ""
+        return self.content[self.starts[index] : self.starts[index + 1]]
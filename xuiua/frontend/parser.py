@@ -1,4 +1,3 @@
-import re
 from typing import Any, Callable, Sequence, TypeVar
 from xdsl.parser import Input, Span
 from xdsl.utils.lexer import Position
@@ -14,12 +13,14 @@ from xuiua.frontend.ast import (
     Primitive,
     PrimitiveClass,
     PrimitiveSpelling,
+    Ref,
     Spaces,
     Word,
     WordsItem,
     Array,
     Spanned,
 )
+from xuiua.frontend.lexer import TokenKind, Tokens
 
 T = TypeVar("T")
 
@@ -37,33 +38,28 @@ class ParseError(Exception):
         super().__init__(f"ParseError at {self.position}: {self.message}")
 
 
-NEWLINE = re.compile(r"\n")
-NOT_NEWLINE = re.compile(r"[^\n]*")
-SPACES = re.compile(r"[^\S\n]")
-NUMBER = re.compile(r"\d+(\.\d+)?")
-PRIMITIVE = re.compile("|".join(re.escape(p.value) for p in PrimitiveSpelling))
-IDENTIFIER = re.compile(r"[a-zA-Z]\w+")
-"""
-A regular expression for an identifier, currently letter followed by a number of letters or numbers.
-
-This is the actual UIUA impl, eventually would be good to move to it:
-``` rust
-pub fn is_ident_char(c: char) -> bool {
-    c.is_alphabetic() && !"ⁿₙπτηℂλ".contains(c) || SUBSCRIPT_NUMS.contains(&c)
-}
-```
-"""
-
-
 class Parser:
+    """
+    Parses Uiua source from the tokens of the input, choosing how to parse each word
+    from the kind of its first token, without backtracking.
+    Only the input up to `end` is parsed, if given.
+    """
+
     input: Input
-    pos: int
+    tokens: Tokens
+    index: int
+    "The index of the next token."
 
-    def __init__(self, input: Input | str, pos: int = 0):
+    def __init__(self, input: Input | str, pos: int = 0, end: int | None = None):
         if isinstance(input, str):
             input = Input(input, "<unknown>")
         self.input = input
-        self.pos = pos
+        self.tokens = Tokens(input.content, pos, end)
+        self.index = 0
+
+    @property
+    def pos(self) -> int:
+        return self.tokens.starts[self.index]
 
     @property
     def remaining(self) -> str:
@@ -71,15 +67,19 @@ class Parser:
 
     # region Base parsing functions
 
-    def parse_optional_chars(self, chars: str):
-        if self.input.content.startswith(chars, self.pos):
-            self.pos += len(chars)
-            return chars
+    def peek(self) -> TokenKind:
+        return TokenKind(self.tokens.kinds[self.index])
 
-    def parse_optional_pattern(self, pattern: re.Pattern[str]):
-        if (match := pattern.match(self.input.content, self.pos)) is not None:
-            self.pos = match.regs[0][1]
-            return self.input.content[match.pos : self.pos]
+    def parse_optional_token(self, kind: TokenKind) -> str | None:
+        """
+        Returns the text of the next token if it is of the given kind, and consumes
+        it.
+        """
+        if self.tokens.kinds[self.index] != kind:
+            return None
+        text = self.tokens.text(self.index)
+        self.index += 1
+        return text
 
     # endregion
     # region: Helpers
@@ -144,15 +144,19 @@ class Parser:
     # region: Words
 
     def parse_optional_number(self) -> Number | None:
-        if (str_val := self.parse_optional_pattern(NUMBER)) is not None:
-            float_val = float(str_val)
+        if (str_val := self.parse_optional_token(TokenKind.NUMBER)) is not None:
+            # Negative numbers start with a high minus
+            float_val = float(str_val.replace("¯", "-"))
             return Number(str_val, float_val)
 
     def parse_optional_primitive(self) -> Primitive | Modified | None:
-        if (prim_val := self.parse_optional_pattern(PRIMITIVE)) is None:
+        if (prim_val := self.parse_optional_token(TokenKind.PRIMITIVE)) is None:
             return None
         prim = PrimitiveSpelling(prim_val)
-        if prim.primitive_class() == PrimitiveClass.AGGREGATING_MODIFIER:
+        if prim.primitive_class() in (
+            PrimitiveClass.ITERATING_MODIFIER,
+            PrimitiveClass.AGGREGATING_MODIFIER,
+        ):
             # Need to peek ahead
             self.parse_optional_spaces()
             word = self.expect("aggregated word", Parser.parse_optional_word)
@@ -160,43 +164,55 @@ class Parser:
         return Primitive(prim)
 
     def parse_optional_array(self) -> Array | None:
-        if self.parse_optional_chars("[") is None:
+        if self.parse_optional_token(TokenKind.OPEN_BRACKET) is None:
             return None
 
         # TODO: signature
         lines = self.parse_word_lines()
         # TODO: boxed (ragged) array
-        self.expect("close array", lambda parser: parser.parse_optional_chars("]"))
+        self.expect(
+            "close array",
+            lambda parser: parser.parse_optional_token(TokenKind.CLOSE_BRACKET),
+        )
 
         return Array(None, lines, False, True)
 
     def parse_optional_func(self) -> Func | None:
-        if self.parse_optional_chars("(") is None:
+        if self.parse_optional_token(TokenKind.OPEN_PAREN) is None:
             return None
 
         # TODO: signature
         lines = self.parse_word_lines()
         # TODO: boxed (ragged) array
-        self.expect("close paren", lambda parser: parser.parse_optional_chars(")"))
+        self.expect(
+            "close paren",
+            lambda parser: parser.parse_optional_token(TokenKind.CLOSE_PAREN),
+        )
 
         return Func(None, lines, True)
 
     def parse_optional_comment(self) -> Comment | None:
-        if self.parse_optional_chars("#") is None:
+        if (value := self.parse_optional_token(TokenKind.COMMENT)) is None:
             return None
 
-        value = self.expect(
-            "comment", lambda parser: parser.parse_optional_pattern(NOT_NEWLINE)
-        )
-        comment = Comment(value)
+        comment = Comment(value[1:])
         return None if SKIP_COMMENT else comment
 
+    def parse_optional_ref(self) -> Ref | None:
+        if self.is_binding_start():
+            return None
+        if (name := self.parse_optional_token(TokenKind.IDENTIFIER)) is not None:
+            return Ref(name)
+
     def parse_optional_spaces(self) -> Spaces | None:
-        if self.parse_optional_pattern(SPACES) is not None:
+        if self.parse_optional_token(TokenKind.SPACE) is not None:
             return Spaces()
 
     def parse_optional_word(self) -> Spanned[Word] | None:
-        return self.spanned(lambda parser: parser.parse_one_of(WORD_PARSERS))
+        word_parser = WORD_PARSERS.get(self.tokens.kinds[self.index])
+        if word_parser is None:
+            return None
+        return self.spanned(word_parser)
 
     def parse_word_line(self) -> tuple[Spanned[Word], ...]:
         """
@@ -209,7 +225,7 @@ class Parser:
     def parse_word_lines(self) -> tuple[tuple[Spanned[Word], ...], ...]:
         lines = self.parse_many_separated(
             Parser.parse_word_line,
-            lambda parser: parser.parse_optional_pattern(NEWLINE),
+            lambda parser: parser.parse_optional_token(TokenKind.NEWLINE),
         )
         # Skip empty lines
         return tuple(line for line in lines if line)
@@ -218,27 +234,46 @@ class Parser:
     # region: Items
 
     def parse_words_item(self) -> WordsItem | None:
-        pos = self.pos
+        index = self.index
         lines = self.parse_word_lines()
-        if pos == self.pos:
+        if index == self.index:
             # did not make progress
             return None
         return WordsItem(lines)
 
-    def parse_binding_item(self) -> BindingItem | None:
-        pos = self.pos
-        if (name := self.parse_optional_pattern(IDENTIFIER)) is None:
+    def binding_arrow_index(self) -> int | None:
+        """
+        Returns the index of the arrow of the binding starting at the next token, if
+        any.
+        """
+        kinds = self.tokens.kinds
+        index = self.index
+        if kinds[index] != TokenKind.IDENTIFIER:
             return None
-        self.parse_optional_spaces()
-        arrow_start_pos = self.pos
-        if self.parse_optional_chars("←") is None:
-            self.pos = pos
+        # The name may be followed by a single space before the arrow
+        arrow_index = index + 1
+        if kinds[arrow_index] == TokenKind.SPACE:
+            arrow_index += 1
+        if kinds[arrow_index] != TokenKind.ARROW:
             return None
+        return arrow_index
+
+    def is_binding_start(self) -> bool:
+        return self.binding_arrow_index() is not None
+
+    def parse_binding_item(self) -> BindingItem | None:
+        index = self.index
+        if (arrow_index := self.binding_arrow_index()) is None:
+            return None
+
+        name = self.tokens.text(index)
+        arrow_start_pos = self.tokens.starts[arrow_index]
+        self.index = arrow_index + 1
         arrow_end_pos = self.pos
 
         words = self.parse_word_line()
 
-        self.parse_optional_pattern(NEWLINE)
+        self.parse_optional_token(TokenKind.NEWLINE)
 
         return BindingItem(
             name,
@@ -250,13 +285,13 @@ class Parser:
         )
 
     def parse_optional_item(self) -> Item | None:
-        if not self.remaining:
+        if self.tokens.kinds[self.index] == TokenKind.END:
             return None
         if (binding := self.parse_binding_item()) is not None:
             return binding
-        pos = self.pos
+        index = self.index
         words_item = self.parse_words_item()
-        if pos == self.pos:
+        if index == self.index:
             raise ParseError(
                 self.pos, f"Could not parse remaining string: {self.remaining}"
             )
@@ -272,11 +307,15 @@ class Parser:
     # endregion
 
 
-WORD_PARSERS = (
-    Parser.parse_optional_array,
-    Parser.parse_optional_func,
-    Parser.parse_optional_comment,
-    Parser.parse_optional_number,
-    Parser.parse_optional_primitive,
-    Parser.parse_optional_spaces,
-)
+WORD_PARSERS: dict[int, Callable[[Parser], Word | None]] = {
+    TokenKind.OPEN_BRACKET: Parser.parse_optional_array,
+    TokenKind.OPEN_PAREN: Parser.parse_optional_func,
+    TokenKind.COMMENT: Parser.parse_optional_comment,
+    TokenKind.NUMBER: Parser.parse_optional_number,
+    TokenKind.PRIMITIVE: Parser.parse_optional_primitive,
+    TokenKind.SPACE: Parser.parse_optional_spaces,
+    TokenKind.IDENTIFIER: Parser.parse_optional_ref,
+}
+"""
+The parsers of the words starting with each kind of token.
+"""
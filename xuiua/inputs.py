@@ -0,0 +1,71 @@
+"""
+Loading of the input arrays of programs from NumPy files.
+"""
+
+import os
+import struct
+import zipfile
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+
+def load_npz(path: Path) -> list[npt.NDArray[Any]]:
+    """
+    Loads the arrays of the `.npz` archive, in order.
+    The arrays stored uncompressed are memory-mapped rather than read into memory,
+    the others being decompressed into memory.
+    """
+    arrays: list[npt.NDArray[Any]] = []
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f, np.load(path) as npz:
+        for info, name in zip(archive.infolist(), npz.files):
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays.append(npz[name])
+                continue
+            # The member data follows its local header, of 30 bytes then the name
+            # and extra field, whose lengths are the last fields of the header
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", f.read(4))
+            f.seek(name_length + extra_length, os.SEEK_CUR)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject or not shape or 0 in shape:
+                arrays.append(npz[name])
+                continue
+            arrays.append(
+                np.memmap(
+                    path,
+                    dtype,
+                    "r",
+                    f.tell(),
+                    shape,
+                    "F" if fortran_order else "C",
+                )
+            )
+    return arrays
+
+
+def load_inputs(paths: Sequence[Path]) -> tuple[npt.NDArray[Any], ...]:
+    """
+    Loads the arrays in the `.npy` and `.npz` files, in order.
+    `.npy` files and the uncompressed arrays of `.npz` files are memory-mapped rather
+    than read into memory.
+    """
+    inputs: list[npt.NDArray[Any]] = []
+    for path in paths:
+        match path.suffix:
+            case ".npy":
+                inputs.append(np.load(path, mmap_mode="r"))
+            case ".npz":
+                inputs.extend(load_npz(path))
+            case unknown:
+                raise ValueError(
+                    f"Cannot load inputs from file with extension {unknown}"
+                )
+    return tuple(inputs)
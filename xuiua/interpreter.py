@@ -0,0 +1,489 @@
+"""
+A NumPy interpreter for the uiua dialect, evaluating modules built from Uiua source
+without compiling them.
+
+It has a lower latency than the compiled path for small inputs, and serves as a
+reference for its results.
+"""
+
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from xdsl.dialects import arith
+from xdsl.dialects.builtin import DenseIntOrFPElementsAttr, ModuleOp
+from xdsl.dialects.func import FuncOp
+from xdsl.ir import OpResult, Operation
+from xdsl.interpreter import (
+    Interpreter,
+    InterpreterFunctions,
+    PythonValues,
+    ReturnedValues,
+    TerminatorValue,
+    impl,
+    impl_terminator,
+    register_impls,
+)
+from xdsl.interpreters.func import FuncFunctions
+
+from xuiua.dialect import (
+    AbsoluteValueOp,
+    AddOp,
+    AtangentOp,
+    CastOp,
+    CeilingOp,
+    DivideOp,
+    DropOp,
+    EachOp,
+    EqualsOp,
+    FloorOp,
+    FoldOp,
+    FusedOp,
+    GreaterOrEqualOp,
+    GreaterThanOp,
+    IteratingModifierOperation,
+    JoinOp,
+    LessOrEqualOp,
+    LessThanOp,
+    LogarithmOp,
+    MaximumOp,
+    MinimumOp,
+    ModulusOp,
+    MultiplyOp,
+    NegateOp,
+    NotEqualsOp,
+    NotOp,
+    PowerOp,
+    RangeOp,
+    ReduceOp,
+    ReshapeOp,
+    ReverseOp,
+    RoundOp,
+    RowsOp,
+    ScanOp,
+    SignOp,
+    SineOp,
+    SliceRowsOperation,
+    SqrtOp,
+    SubtractOp,
+    TakeOp,
+    TransposeOp,
+    YieldOp,
+)
+from xuiua.frontend.ir_gen import build_module
+from xuiua.frontend.parser import Parser
+from xuiua.passes.convert_uiua_to_stablehlo import combining_op, combining_ops
+from xuiua.passes.fuse_pervasive import fuse_block
+from xuiua.shape_inference_patterns import (
+    iteration_frame,
+    joined_shape,
+    range_shape,
+    reshaped_shape,
+    sliced_rows,
+)
+
+
+def pervasive_operands(
+    lhs: npt.NDArray[Any], rhs: npt.NDArray[Any]
+) -> tuple[npt.NDArray[Any], npt.NDArray[Any]]:
+    """
+    Returns the operands with trailing axes added to the one of lower rank, so that
+    NumPy broadcasting repeats its values along the trailing dimensions of the other,
+    following Uiua.
+    """
+    if lhs.shape[: rhs.ndim] != rhs.shape[: lhs.ndim]:
+        raise ValueError(f"Shapes {lhs.shape} and {rhs.shape} do not match")
+    if lhs.ndim < rhs.ndim:
+        lhs = lhs.reshape(lhs.shape + (1,) * (rhs.ndim - lhs.ndim))
+    else:
+        rhs = rhs.reshape(rhs.shape + (1,) * (lhs.ndim - rhs.ndim))
+    return lhs, rhs
+
+
+def round_half_away(x: npt.NDArray[Any]) -> npt.NDArray[Any]:
+    "Rounds to the nearest integer, halves away from zero, unlike `np.round`."
+    return np.copysign(np.floor(np.abs(x) + 0.5), x)
+
+
+def as_number(
+    comparison: Callable[[npt.NDArray[Any], npt.NDArray[Any]], npt.NDArray[Any]],
+) -> Callable[[npt.NDArray[Any], npt.NDArray[Any]], npt.NDArray[Any]]:
+    "Returns the comparison with booleans converted to 1 and 0."
+    return lambda lhs, rhs: comparison(lhs, rhs).astype(np.float64)
+
+
+MONADIC_FUNCTIONS: dict[type[Any], Callable[[npt.NDArray[Any]], npt.NDArray[Any]]] = {
+    NotOp: lambda arg: 1 - arg,
+    SignOp: np.sign,
+    NegateOp: np.negative,
+    AbsoluteValueOp: np.abs,
+    SqrtOp: np.sqrt,
+    SineOp: np.sin,
+    FloorOp: np.floor,
+    CeilingOp: np.ceil,
+    RoundOp: round_half_away,
+}
+
+DYADIC_FUNCTIONS: dict[
+    type[Any], Callable[[npt.NDArray[Any], npt.NDArray[Any]], npt.NDArray[Any]]
+] = {
+    EqualsOp: as_number(np.equal),
+    NotEqualsOp: as_number(np.not_equal),
+    LessThanOp: as_number(np.less),
+    LessOrEqualOp: as_number(np.less_equal),
+    GreaterThanOp: as_number(np.greater),
+    GreaterOrEqualOp: as_number(np.greater_equal),
+    AddOp: np.add,
+    SubtractOp: np.subtract,
+    MultiplyOp: np.multiply,
+    DivideOp: np.divide,
+    # The modulus has the sign of the divisor, like `np.mod`
+    ModulusOp: np.mod,
+    PowerOp: np.power,
+    LogarithmOp: lambda lhs, rhs: np.log(lhs) / np.log(rhs),
+    MinimumOp: np.minimum,
+    MaximumOp: np.maximum,
+    AtangentOp: lambda lhs, rhs: np.arctan2(rhs, lhs),
+}
+"""
+The functions computing the pervasive operations, from operands whose shapes were
+made compatible by `pervasive_operands`.
+"""
+
+REDUCTION_UFUNCS: dict[type[Any], np.ufunc] = {
+    AddOp: np.add,
+    MultiplyOp: np.multiply,
+    MinimumOp: np.minimum,
+    MaximumOp: np.maximum,
+}
+"""
+The ufuncs computing the reductions whose body is a single known operation.
+"""
+
+CHUNK_ELEMENTS = 1 << 15
+"""
+The number of elements of each input evaluated at once by fused operations, so that
+the intermediate arrays of a chunk stay in cache.
+"""
+
+
+def integers(op: Operation, value: npt.NDArray[Any]) -> tuple[int, ...]:
+    """
+    Returns the elements of the value, which the operation expects to be integers.
+    """
+    if not np.all(np.mod(value, 1) == 0):
+        raise ValueError(f"{op.name} expects integers, got {tuple(value.flat)}")
+    return tuple(int(element) for element in value.flat)
+
+
+def as_row(value: npt.NDArray[Any], rank: int) -> npt.NDArray[Any]:
+    "Returns the value with a leading axis of length 1 if it is of lower rank."
+    return value.reshape((1, *value.shape)) if value.ndim < rank else value
+
+
+def chunk_length(args: PythonValues) -> int | None:
+    """
+    Returns the number of rows of the inputs of a fused operation to evaluate at once,
+    or None if they should be evaluated whole.
+    The inputs that are not scalars must have the same number of rows, along which
+    they are split, while the scalars are used whole by each chunk.
+    """
+    arrays = tuple(arg for arg in args if arg.ndim)
+    if not arrays or len({len(arg) for arg in arrays}) != 1:
+        return None
+    rows = len(arrays[0])
+    row_size = max(arg.size // rows for arg in arrays) if rows else 0
+    length = max(CHUNK_ELEMENTS // max(row_size, 1), 1)
+    return length if length < rows else None
+
+
+@register_impls
+class UiuaFunctions(InterpreterFunctions):
+    @impl(arith.Constant)
+    def run_constant(
+        self, interpreter: Interpreter, op: arith.Constant, args: PythonValues
+    ) -> PythonValues:
+        value = op.value
+        interpreter.interpreter_assert(
+            isinstance(value, DenseIntOrFPElementsAttr),
+            f"arith.constant not implemented for {type(value)}",
+        )
+        assert isinstance(value, DenseIntOrFPElementsAttr)
+        elements = np.array(
+            [element.value.data for element in value.data], dtype=np.float64
+        )
+        return (elements.reshape(value.get_shape() or ()),)
+
+    def run_monadic(
+        self, interpreter: Interpreter, op: Operation, args: PythonValues
+    ) -> PythonValues:
+        (arg,) = args
+        return (MONADIC_FUNCTIONS[type(op)](arg),)
+
+    def run_dyadic(
+        self, interpreter: Interpreter, op: Operation, args: PythonValues
+    ) -> PythonValues:
+        lhs, rhs = pervasive_operands(*args)
+        return (DYADIC_FUNCTIONS[type(op)](lhs, rhs),)
+
+    run_not = impl(NotOp)(run_monadic)
+    run_sign = impl(SignOp)(run_monadic)
+    run_negate = impl(NegateOp)(run_monadic)
+    run_absolute_value = impl(AbsoluteValueOp)(run_monadic)
+    run_sqrt = impl(SqrtOp)(run_monadic)
+    run_sine = impl(SineOp)(run_monadic)
+    run_floor = impl(FloorOp)(run_monadic)
+    run_ceiling = impl(CeilingOp)(run_monadic)
+    run_round = impl(RoundOp)(run_monadic)
+
+    run_equals = impl(EqualsOp)(run_dyadic)
+    run_not_equals = impl(NotEqualsOp)(run_dyadic)
+    run_less_than = impl(LessThanOp)(run_dyadic)
+    run_less_or_equal = impl(LessOrEqualOp)(run_dyadic)
+    run_greater_than = impl(GreaterThanOp)(run_dyadic)
+    run_greater_or_equal = impl(GreaterOrEqualOp)(run_dyadic)
+    run_add = impl(AddOp)(run_dyadic)
+    run_subtract = impl(SubtractOp)(run_dyadic)
+    run_multiply = impl(MultiplyOp)(run_dyadic)
+    run_divide = impl(DivideOp)(run_dyadic)
+    run_modulus = impl(ModulusOp)(run_dyadic)
+    run_power = impl(PowerOp)(run_dyadic)
+    run_logarithm = impl(LogarithmOp)(run_dyadic)
+    run_minimum = impl(MinimumOp)(run_dyadic)
+    run_maximum = impl(MaximumOp)(run_dyadic)
+    run_atangent = impl(AtangentOp)(run_dyadic)
+
+    @impl(RangeOp)
+    def run_range(
+        self, interpreter: Interpreter, op: RangeOp, args: PythonValues
+    ) -> PythonValues:
+        (arg,) = args
+        (count,) = range_shape(arg.shape, integers(op, arg))
+        return (np.arange(count, dtype=np.float64),)
+
+    @impl(ReverseOp)
+    def run_reverse(
+        self, interpreter: Interpreter, op: ReverseOp, args: PythonValues
+    ) -> PythonValues:
+        (arg,) = args
+        return (arg[::-1] if arg.ndim else arg,)
+
+    @impl(TransposeOp)
+    def run_transpose(
+        self, interpreter: Interpreter, op: TransposeOp, args: PythonValues
+    ) -> PythonValues:
+        (arg,) = args
+        return (np.moveaxis(arg, 0, -1) if arg.ndim else arg,)
+
+    @impl(ReshapeOp)
+    def run_reshape(
+        self, interpreter: Interpreter, op: ReshapeOp, args: PythonValues
+    ) -> PythonValues:
+        arg, shape = args
+        result_shape = reshaped_shape(arg.shape, shape.shape, integers(op, shape))
+        if not shape.ndim:
+            # Repeated along a new leading axis
+            return (np.broadcast_to(arg, result_shape),)
+        return (arg.reshape(result_shape),)
+
+    @impl(JoinOp)
+    def run_join(
+        self, interpreter: Interpreter, op: JoinOp, args: PythonValues
+    ) -> PythonValues:
+        lhs, rhs = args
+        rank = len(joined_shape(lhs.shape, rhs.shape))
+        # The rows of the top of the stack come first
+        return (np.concatenate((as_row(rhs, rank), as_row(lhs, rank))),)
+
+    def run_slice_rows(
+        self, interpreter: Interpreter, op: SliceRowsOperation, args: PythonValues
+    ) -> PythonValues:
+        arg, count = args
+        if not arg.ndim:
+            raise ValueError(f"{op.name} of a scalar")
+        if count.ndim:
+            raise NotImplementedError(f"{op.name} along several axes")
+        start, stop = sliced_rows(op, len(arg), *integers(op, count))
+        return (arg[start:stop],)
+
+    run_take = impl(TakeOp)(run_slice_rows)
+    run_drop = impl(DropOp)(run_slice_rows)
+
+    @impl(CastOp)
+    def run_cast(
+        self, interpreter: Interpreter, op: CastOp, args: PythonValues
+    ) -> PythonValues:
+        return args
+
+    @impl(ReduceOp)
+    def run_reduce(
+        self, interpreter: Interpreter, op: ReduceOp, args: PythonValues
+    ) -> PythonValues:
+        interpreter.interpreter_assert(
+            all(arg.ndim > 0 for arg in args), "Cannot reduce a scalar"
+        )
+        interpreter.interpreter_assert(
+            len({len(arg) for arg in args}) == 1,
+            "Cannot reduce values of different lengths together",
+        )
+
+        combine_ops = combining_ops(op.body.block) or ()
+        ufuncs = tuple(
+            ufunc
+            for combine_op in combine_ops
+            if (ufunc := REDUCTION_UFUNCS.get(type(combine_op))) is not None
+        )
+        if ufuncs and len(ufuncs) == len(args):
+            return tuple(ufunc.reduce(arg, axis=0) for ufunc, arg in zip(ufuncs, args))
+
+        length = len(args[0])
+        interpreter.interpreter_assert(
+            length > 0, "Cannot reduce an empty array without an identity"
+        )
+        accs = tuple(arg[0] for arg in args)
+        for i in range(1, length):
+            accs = interpreter.run_ssacfg_region(
+                op.body, (*accs, *(arg[i] for arg in args)), "reduce"
+            )
+        return accs
+
+    @impl(ScanOp)
+    def run_scan(
+        self, interpreter: Interpreter, op: ScanOp, args: PythonValues
+    ) -> PythonValues:
+        (arg,) = args
+        interpreter.interpreter_assert(arg.ndim > 0, "Cannot scan a scalar")
+
+        combine_op = combining_op(op.body.block)
+        ufunc = None if combine_op is None else REDUCTION_UFUNCS.get(type(combine_op))
+        if ufunc is not None:
+            return (ufunc.accumulate(arg, axis=0),)
+
+        if not len(arg):
+            return (arg,)
+        values = [arg[0]]
+        for value in arg[1:]:
+            (acc,) = interpreter.run_ssacfg_region(op.body, (values[-1], value), "scan")
+            values.append(acc)
+        return (np.stack(values),)
+
+    @impl(FoldOp)
+    def run_fold(
+        self, interpreter: Interpreter, op: FoldOp, args: PythonValues
+    ) -> PythonValues:
+        acc, arg = args
+        interpreter.interpreter_assert(arg.ndim > 0, "Cannot fold a scalar")
+        for value in arg:
+            (acc,) = interpreter.run_ssacfg_region(op.body, (acc, value), "fold")
+        return (acc,)
+
+    def run_iterating_modifier(
+        self,
+        interpreter: Interpreter,
+        op: IteratingModifierOperation,
+        args: PythonValues,
+    ) -> PythonValues:
+        frame = iteration_frame(op, tuple(arg.shape for arg in args))
+        cells = [
+            interpreter.run_ssacfg_region(
+                op.body, tuple(np.asarray(arg[index]) for arg in args), op.name
+            )
+            for index in np.ndindex(frame)
+        ]
+        if not cells:
+            # The shapes of the results are those of the body applied to zeros
+            results = interpreter.run_ssacfg_region(
+                op.body,
+                tuple(np.zeros(arg.shape[len(frame) :]) for arg in args),
+                op.name,
+            )
+            return tuple(np.zeros((*frame, *np.shape(result))) for result in results)
+        return tuple(
+            np.stack(values).reshape((*frame, *np.shape(values[0])))
+            for values in zip(*cells)
+        )
+
+    run_rows = impl(RowsOp)(run_iterating_modifier)
+    run_each = impl(EachOp)(run_iterating_modifier)
+
+    @impl(FusedOp)
+    def run_fused(
+        self, interpreter: Interpreter, op: FusedOp, args: PythonValues
+    ) -> PythonValues:
+        length = chunk_length(args)
+        if length is None:
+            return interpreter.run_ssacfg_region(op.body, args, "fused")
+
+        partials = [
+            interpreter.run_ssacfg_region(
+                op.body,
+                tuple(arg[start : start + length] if arg.ndim else arg for arg in args),
+                "fused",
+            )
+            for start in range(0, len(next(arg for arg in args if arg.ndim)), length)
+        ]
+
+        yield_op = op.body.block.last_op
+        assert isinstance(yield_op, YieldOp)
+        results: list[npt.NDArray[Any]] = []
+        for i, value in enumerate(yield_op.arg):
+            values = [partial[i] for partial in partials]
+            if isinstance(value, OpResult) and isinstance(value.owner, ReduceOp):
+                # The fused reductions are associative, so the reductions of the
+                # chunks are reduced in turn
+                combine_ops = combining_ops(value.owner.body.block)
+                assert combine_ops is not None
+                ufunc = REDUCTION_UFUNCS[type(combine_ops[value.index])]
+                results.append(ufunc.reduce(np.stack(values), axis=0))
+            elif values[0].ndim:
+                results.append(np.concatenate(values))
+            else:
+                # Computed from the scalar inputs only, so the same for each chunk
+                results.append(values[0])
+        return tuple(results)
+
+    @impl_terminator(YieldOp)
+    def run_yield(
+        self, interpreter: Interpreter, op: YieldOp, args: PythonValues
+    ) -> tuple[TerminatorValue, PythonValues]:
+        return ReturnedValues(args), ()
+
+
+def interpret_module(
+    module: ModuleOp, entry: str, inputs: Sequence[Any]
+) -> tuple[npt.NDArray[Any], ...]:
+    """
+    Evaluates the function named `entry` in the module with the given inputs.
+    The pervasive operations of a copy of the module are fused beforehand, leaving the
+    module unchanged.
+    """
+    module = module.clone()
+    for func_op in module.body.ops:
+        if isinstance(func_op, FuncOp):
+            for block in func_op.body.blocks:
+                fuse_block(block)
+    interpreter = Interpreter(module)
+    interpreter.register_implementations(UiuaFunctions())
+    interpreter.register_implementations(FuncFunctions())
+    outputs = interpreter.call_op(
+        entry, tuple(np.asarray(i, dtype=np.float64) for i in inputs)
+    )
+    return tuple(np.asarray(output) for output in outputs)
+
+
+def interpret_source(
+    source: str, entry: str, inputs: Sequence[Any]
+) -> tuple[npt.NDArray[Any], ...]:
+    """
+    Evaluates the function named `entry` in the source with the given inputs.
+    """
+    module = build_module(Parser(source).parse_items())
+    return interpret_module(module, entry, inputs)
+
+
+def interpret(expr: str, inputs: Sequence[Any]) -> tuple[npt.NDArray[Any], ...]:
+    """
+    Evaluates the expression with the given inputs.
+    """
+    return interpret_source("main ← " + expr, "main", inputs)
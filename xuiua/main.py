@@ -1,15 +1,18 @@
+import argparse
+import sys
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
 from pathlib import Path
 
 from xdsl.parser import Input
 from xdsl.parser import Parser as XDSLParser
-from xdsl.passes import PipelinePass
-from xdsl.utils.parse_pipeline import parse_pipeline
 
-from xuiua.compile import get_ctx
+from xuiua.context import get_ctx
 from xuiua.frontend.ir_gen import build_module
 from xuiua.frontend.parser import Parser as UIUAParser
-from xuiua.passes import AVAILABLE_PASSES
+from xuiua.passes import apply_passes
 from xuiua.printer import Printer
+from xuiua.timings import Timings, stage
 
 
 def run_parse(src: Path):
@@ -36,36 +39,99 @@ def run_lower(src: Path, passes_str: str | None):
     source = open(src).read()
     match src.suffix:
         case ".ua":
-            parser = UIUAParser(Input(source, str(src)))
-            items = parser.parse_items()
-            module = build_module(items)
+            with stage("parse"):
+                parser = UIUAParser(Input(source, str(src)))
+                items = parser.parse_items()
+            with stage("ir-gen"):
+                module = build_module(items)
         case ".mlir":
-            parser = XDSLParser(ctx, source, str(src))
-            module = parser.parse_module()
+            with stage("parse"):
+                parser = XDSLParser(ctx, source, str(src))
+                module = parser.parse_module()
         case unknown:
             raise ValueError(f"Cannot parse file with extension {unknown}")
 
-    if passes_str:
-        pipeline = PipelinePass(
-            tuple(
-                pass_type.from_pass_spec(spec)
-                for pass_type, spec in PipelinePass.build_pipeline_tuples(
-                    AVAILABLE_PASSES, parse_pipeline(passes_str)
-                )
-            ),
-        )
-        pipeline.apply(ctx, module)
+    apply_passes(ctx, module, passes_str)
 
     print(str(module))
 
 
-def run(src: Path):
-    print("Cannot compile and run UIUA yet")
+def run(
+    src: Path,
+    input_paths: Sequence[Path] = (),
+    entry: str = "uiua_main",
+    output_dir: Path | None = None,
+):
+    """
+    Compiles the entry function of the source for the shapes of the inputs, and runs it.
+    Prints the outputs, or writes them to `output_dir` as `.npy` files.
+    """
 
+    # NumPy and the compiler, which imports JAX, are only imported by the commands
+    # that run programs, to keep the startup of the others fast
+    import numpy as np
 
-def main():
-    import argparse
+    from xuiua.compile import compile_source
+    from xuiua.inputs import load_inputs
+
+    source = open(src).read()
+    with stage("load-inputs"):
+        inputs = load_inputs(input_paths)
+
+    program = compile_source(
+        source,
+        entry,
+        tuple(i.shape for i in inputs),
+        tuple(str(i.dtype) for i in inputs),
+    )
+    outputs = program(*inputs)
+
+    if output_dir is None:
+        for output in outputs:
+            print(np.asarray(output))
+        return
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for i, output in enumerate(outputs):
+        np.save(output_dir / f"output_{i}.npy", np.asarray(output))
+
+
+@contextmanager
+def report_timings(timings: bool, trace: Path | None) -> Iterator[None]:
+    """
+    Prints the timings of the stages to stderr and/or writes them as a Chrome trace,
+    if requested.
+    """
+    if not timings and trace is None:
+        yield
+        return
+
+    with Timings(trace_memory=timings) as collected:
+        try:
+            yield
+        finally:
+            # Also reported if a stage fails
+            if timings:
+                print(collected.format(), file=sys.stderr)
+            if trace is not None:
+                collected.write_chrome_trace(trace)
+
+
+def add_timings_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print the time, op counts and peak memory of each stage to stderr",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        help="Write the timings of each stage to this file as Chrome trace JSON",
+    )
 
+
+def main():
     parser = argparse.ArgumentParser(description="XUIUA compiler")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -79,19 +145,55 @@ def main():
     )
     lower_parser.add_argument("src", type=Path, help="Source file to parse")
     lower_parser.add_argument("passes", nargs="?", type=str, default="")
+    add_timings_arguments(lower_parser)
 
     # Run subcommand
     run_parser = subparsers.add_parser("run", help="Compile and run UIUA code")
     run_parser.add_argument("src", type=Path, help="Source file to run")
+    run_parser.add_argument(
+        "inputs", nargs="*", type=Path, help="Input arrays as .npy or .npz files"
+    )
+    run_parser.add_argument(
+        "--entry", default="uiua_main", help="Name of the function to run"
+    )
+    run_parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        default=None,
+        help="Directory to write the outputs to, as output_<i>.npy",
+    )
+    add_timings_arguments(run_parser)
+
+    # Serve subcommand
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Answer JSON-RPC parse, lower and run requests, keeping caches warm",
+    )
+    serve_parser.add_argument(
+        "--socket",
+        type=Path,
+        default=None,
+        help="Unix socket to listen on, instead of stdin and stdout",
+    )
 
     args = parser.parse_args()
 
     if args.command == "parse":
         run_parse(args.src)
     elif args.command == "lower":
-        run_lower(args.src, args.passes)
+        with report_timings(args.timings, args.trace):
+            run_lower(args.src, args.passes)
     elif args.command == "run":
-        run(args.src)
+        with report_timings(args.timings, args.trace):
+            run(args.src, args.inputs, args.entry, args.output_dir)
+    elif args.command == "serve":
+        from xuiua.server import Server, serve_socket, serve_stream
+
+        if args.socket is None:
+            serve_stream(Server(), sys.stdin, sys.stdout)
+        else:
+            serve_socket(Server(), args.socket)
 
 
 if __name__ == "__main__":
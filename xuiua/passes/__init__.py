@@ -2,14 +2,50 @@ from collections.abc import Callable
 
 from xuiua.passes.convert_uiua_to_stablehlo import ConvertUiuaToStableHLOPass
 from .add_shapes import AddShapesPass
+from .batch import BatchPass
+from .canonicalize import CanonicalizePass
+from .dynamic_dims import MaterializeDynamicDimsPass
+from .fuse_pervasive import FusePervasivePass
+from .inline_calls import InlineCallsPass
+from .merge_reductions import MergeReductionsPass
 from .remove_casts import RemoveCastsPass
-from xdsl.passes import ModulePass
+from xdsl.context import MLContext
+from xdsl.dialects.builtin import ModuleOp
+from xdsl.passes import ModulePass, PipelinePass
 from xdsl.transforms.shape_inference import ShapeInferencePass
+from xdsl.utils.parse_pipeline import parse_pipeline
+
+from xuiua.timings import stage
 
 
 AVAILABLE_PASSES: dict[str, Callable[[], type[ModulePass]]] = {
     AddShapesPass.name: lambda: AddShapesPass,
+    BatchPass.name: lambda: BatchPass,
+    CanonicalizePass.name: lambda: CanonicalizePass,
     ConvertUiuaToStableHLOPass.name: lambda: ConvertUiuaToStableHLOPass,
+    FusePervasivePass.name: lambda: FusePervasivePass,
+    InlineCallsPass.name: lambda: InlineCallsPass,
+    MaterializeDynamicDimsPass.name: lambda: MaterializeDynamicDimsPass,
+    MergeReductionsPass.name: lambda: MergeReductionsPass,
     RemoveCastsPass.name: lambda: RemoveCastsPass,
     ShapeInferencePass.name: lambda: ShapeInferencePass,
 }
+
+
+def apply_passes(ctx: MLContext, module: ModuleOp, passes_str: str | None):
+    """
+    Applies the passes of the pipeline specification to the module.
+    """
+    if not passes_str:
+        return
+    pipeline = PipelinePass(
+        tuple(
+            pass_type.from_pass_spec(spec)
+            for pass_type, spec in PipelinePass.build_pipeline_tuples(
+                AVAILABLE_PASSES, parse_pipeline(passes_str)
+            )
+        ),
+    )
+    for p in pipeline.passes:
+        with stage(p.name, module):
+            p.apply(ctx, module)
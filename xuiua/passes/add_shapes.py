@@ -1,6 +1,6 @@
 from collections.abc import Sequence
 from dataclasses import dataclass, field
-from xdsl.dialects.builtin import FunctionType, ArrayAttr, ModuleOp
+from xdsl.dialects.builtin import DYNAMIC_INDEX, FunctionType, ArrayAttr, ModuleOp
 from xdsl.dialects.func import FuncOp, Return
 from xdsl.rewriter import InsertPoint, Rewriter
 from xuiua.dialect import CastOp, t64
@@ -33,10 +33,14 @@ def add_shapes(func_op: FuncOp, shapes: Sequence[Sequence[int]]):
     return_op.operands = tuple(op.res for op in cast_ops)
 
 
+def parse_dim(dim: str) -> int:
+    return DYNAMIC_INDEX if dim == "?" else int(dim)
+
+
 def parse_shapes_encoding(encoding: str) -> dict[str, tuple[tuple[int, ...], ...]]:
     return {
         (components := func.split("="))[0]: tuple(
-            tuple(int(dim) for dim in shape.split("x")) if shape else ()
+            tuple(parse_dim(dim) for dim in shape.split("x")) if shape else ()
             for shape in components[1].split("_")
         )
         if components[1]
@@ -51,6 +55,9 @@ class AddShapesPass(ModulePass):
     Assigns the shapes to specified functions.
 
     Example shapes format: `"Add=2x3_2x3;Id=4x5"`
+
+    Dimensions whose size is only known at runtime are written `?`, as in
+    `"Add=?x3_?x3"`.
     """
 
     name = "add-shapes"
@@ -0,0 +1,286 @@
+from collections.abc import Collection, Sequence
+from dataclasses import dataclass, field
+from xdsl.context import MLContext
+from xdsl.dialects import arith, stablehlo
+from xdsl.dialects.builtin import (
+    ArrayAttr,
+    DenseArrayBase,
+    DenseIntOrFPElementsAttr,
+    FunctionType,
+    IntegerAttr,
+    ModuleOp,
+    TensorType,
+    i64,
+)
+from xdsl.dialects.func import FuncOp, Return
+from xdsl.ir import Attribute, Block, Operation, SSAValue
+from xdsl.passes import ModulePass
+from xdsl.rewriter import InsertPoint, Rewriter
+from xdsl.traits import SymbolTable
+from xdsl.utils.hints import isa
+
+from xuiua.stablehlo_ext import (
+    ELEMENTWISE_OPS,
+    BroadcastInDimOp,
+    ConcatenateOp,
+    DynamicSliceOp,
+    DynamicUpdateSliceOp,
+    ReshapeOp,
+    ReverseOp,
+    SliceOp,
+    WhileOp,
+)
+
+
+def batched_type(
+    type: Attribute, batch_shape: tuple[int, ...]
+) -> TensorType[Attribute]:
+    assert isa(type, TensorType[Attribute])
+    return TensorType(type.element_type, batch_shape + type.get_shape())
+
+
+class Batcher:
+    """
+    Adds leading batch dimensions to the values computed by the StableHLO operations
+    in a block, as if the block was evaluated independently for each index in the
+    batch.
+
+    Values that do not depend on batched values, such as constants, are left unbatched
+    and broadcast when combined with batched ones.
+    """
+
+    batch_shape: tuple[int, ...]
+    batched: set[SSAValue]
+
+    def __init__(self, batch_shape: Sequence[int]):
+        self.batch_shape = tuple(batch_shape)
+        self.batched = set()
+
+    @property
+    def batch_rank(self) -> int:
+        return len(self.batch_shape)
+
+    def batch_value(self, value: SSAValue) -> None:
+        """
+        Marks the value as batched, prepending the batch shape to its type.
+        """
+        value.type = batched_type(value.type, self.batch_shape)
+        self.batched.add(value)
+
+    def broadcast(self, value: SSAValue, before: Operation) -> SSAValue:
+        """
+        Returns the value broadcast along the batch dimensions, inserting a broadcast
+        before the operation if the value is not batched.
+        """
+        if value in self.batched:
+            return value
+        assert isa(value.type, TensorType[Attribute])
+        rank = len(value.type.get_shape())
+        broadcast_op = BroadcastInDimOp(
+            value,
+            range(self.batch_rank, self.batch_rank + rank),
+            batched_type(value.type, self.batch_shape),
+        )
+        Rewriter.insert_op(broadcast_op, InsertPoint.before(before))
+        self.batched.add(broadcast_op.result)
+        return broadcast_op.result
+
+    def uses_batch(self, op: Operation, values: Collection[SSAValue] = ()) -> bool:
+        """
+        Whether the operation, or an operation nested in it, uses a batched value, or
+        one of the given values.
+        """
+        return any(
+            operand in self.batched or operand in values
+            for nested_op in op.walk()
+            for operand in nested_op.operands
+        )
+
+    def dependent_values(
+        self, block: Block, values: Collection[SSAValue]
+    ) -> set[SSAValue]:
+        """
+        Returns the given values, with the values of the block computed from them, or
+        from batched values.
+        """
+        dependent = set(values)
+        for op in block.ops:
+            if self.uses_batch(op, dependent):
+                dependent.update(op.results)
+        return dependent
+
+    def zero_indices(self, before: Operation) -> tuple[SSAValue, ...]:
+        "Returns the start indices of the batch dimensions, inserted before the op."
+        zero_op = arith.Constant(
+            DenseIntOrFPElementsAttr.create_dense_int(TensorType(i64, ()), (0,))
+        )
+        Rewriter.insert_op(zero_op, InsertPoint.before(before))
+        return (zero_op.result,) * self.batch_rank
+
+    def batch_while(self, op: WhileOp) -> None:
+        """
+        Batches the values carried by the loop that depend on the batch, the others,
+        such as the index of the iteration, being left unbatched, so that a single
+        loop evaluates all the indices in the batch.
+        """
+        cond, body = op.cond.block, op.body.block
+        return_op = body.last_op
+        assert isinstance(return_op, stablehlo.ReturnOp)
+
+        # The carried values that depend on the batch, directly or in later iterations
+        carried = {i for i, operand in enumerate(op.operand) if operand in self.batched}
+        while True:
+            dependent = self.dependent_values(body, {body.args[i] for i in carried})
+            returned = {
+                i for i, value in enumerate(return_op.operands) if value in dependent
+            }
+            if returned <= carried:
+                break
+            carried |= returned
+
+        dependent = self.dependent_values(cond, {cond.args[i] for i in carried})
+        cond_return_op = cond.last_op
+        assert isinstance(cond_return_op, stablehlo.ReturnOp)
+        if any(value in dependent for value in cond_return_op.operands):
+            raise NotImplementedError(
+                f"Cannot batch {op.name} whose condition depends on the batch"
+            )
+
+        op.operands = tuple(
+            self.broadcast(operand, op) if i in carried else operand
+            for i, operand in enumerate(op.operands)
+        )
+        for i in sorted(carried):
+            self.batch_value(cond.args[i])
+            self.batch_value(body.args[i])
+        for body_op in tuple(body.ops)[:-1]:
+            self.batch_op(body_op)
+        return_op.operands = tuple(
+            self.broadcast(value, return_op) if i in carried else value
+            for i, value in enumerate(return_op.operands)
+        )
+        for i in sorted(carried):
+            self.batch_value(op.results[i])
+
+    def batch_op(self, op: Operation) -> None:
+        if isinstance(op, Return | stablehlo.ReturnOp):
+            # All results are batched, even if they do not depend on the batch
+            op.operands = tuple(self.broadcast(operand, op) for operand in op.operands)
+            return
+
+        if not self.uses_batch(op):
+            # Does not depend on the batch
+            return
+
+        if isinstance(op, WhileOp):
+            # Only some of the results are batched
+            self.batch_while(op)
+            return
+
+        if isinstance(op, ELEMENTWISE_OPS):
+            op.operands = tuple(self.broadcast(operand, op) for operand in op.operands)
+        elif isinstance(op, BroadcastInDimOp):
+            dimensions = tuple(range(self.batch_rank)) + tuple(
+                dim + self.batch_rank for dim in op.get_broadcast_dimensions()
+            )
+            op.broadcast_dimensions = DenseArrayBase.from_list(i64, dimensions)
+        elif isinstance(op, ReshapeOp):
+            # The result type is batched with the results below
+            pass
+        elif isinstance(op, ConcatenateOp):
+            op.operands = tuple(self.broadcast(operand, op) for operand in op.operands)
+            op.dimension = IntegerAttr(op.dimension.value.data + self.batch_rank, i64)
+        elif isinstance(op, SliceOp):
+            op.start_indices = DenseArrayBase.from_list(
+                i64, (0,) * self.batch_rank + op.start_indices.as_tuple()
+            )
+            op.limit_indices = DenseArrayBase.from_list(
+                i64, self.batch_shape + op.limit_indices.as_tuple()
+            )
+            op.strides = DenseArrayBase.from_list(
+                i64, (1,) * self.batch_rank + op.strides.as_tuple()
+            )
+        elif isinstance(op, ReverseOp):
+            op.dimensions = DenseArrayBase.from_list(
+                i64, tuple(dim + self.batch_rank for dim in op.dimensions.as_tuple())
+            )
+        elif isinstance(op, DynamicSliceOp | DynamicUpdateSliceOp):
+            if any(index in self.batched for index in op.start_indices):
+                raise NotImplementedError(f"Cannot batch {op.name} at batched indices")
+            sliced = op.operands[: len(op.operands) - len(op.start_indices)]
+            op.operands = (
+                *(self.broadcast(operand, op) for operand in sliced),
+                *self.zero_indices(op),
+                *op.start_indices,
+            )
+            if isinstance(op, DynamicSliceOp):
+                op.slice_sizes = DenseArrayBase.from_list(
+                    i64, self.batch_shape + op.slice_sizes.as_tuple()
+                )
+        elif isinstance(op, stablehlo.TransposeOp):
+            op.permutation = DenseArrayBase.from_list(
+                i64,
+                tuple(range(self.batch_rank))
+                + tuple(dim + self.batch_rank for dim in op.get_permutation()),
+            )
+        elif isinstance(op, stablehlo.ReduceOp):
+            # The operands are the inputs followed by the scalar initial values
+            num_inputs = len(op.results)
+            inputs = op.operands[:num_inputs]
+            op.operands = (
+                *(self.broadcast(operand, op) for operand in inputs),
+                *op.operands[num_inputs:],
+            )
+            dimensions = op.attributes["dimensions"]
+            assert isinstance(dimensions, DenseArrayBase)
+            op.attributes["dimensions"] = DenseArrayBase.from_list(
+                i64, tuple(int(dim) + self.batch_rank for dim in dimensions.as_tuple())
+            )
+        else:
+            raise NotImplementedError(f"Cannot batch {op.name}")
+
+        for result in op.results:
+            self.batch_value(result)
+
+    def batch_block(self, block: Block, args: Sequence[SSAValue]) -> None:
+        """
+        Batches the arguments and the operations in the block that depend on them.
+        """
+        for arg in args:
+            self.batch_value(arg)
+        for op in tuple(block.ops):
+            self.batch_op(op)
+
+
+def batch_func(func_op: FuncOp, batch_shape: Sequence[int]) -> None:
+    """
+    Adds leading batch dimensions to all the inputs and outputs of the function.
+    """
+    block = func_op.body.block
+    Batcher(batch_shape).batch_block(block, block.args)
+
+    return_op = block.last_op
+    assert isinstance(return_op, Return), f"{return_op}"
+    func_op.function_type = FunctionType.from_attrs(
+        ArrayAttr(arg.type for arg in block.args),
+        ArrayAttr(operand.type for operand in return_op.operands),
+    )
+
+
+@dataclass(frozen=True)
+class BatchPass(ModulePass):
+    """
+    Adds a leading dimension of the given size to the inputs and outputs of a lowered
+    function, which then evaluates the original function for each index along it.
+    """
+
+    name = "batch"
+
+    size: int = field()
+
+    func: str = field(default="main")
+
+    def apply(self, ctx: MLContext, op: ModuleOp) -> None:
+        func_op = SymbolTable.lookup_symbol(op, self.func)
+        assert isinstance(func_op, FuncOp)
+        batch_func(func_op, (self.size,))
@@ -0,0 +1,134 @@
+import operator
+from collections.abc import Callable
+from dataclasses import dataclass
+from math import prod
+
+from xdsl.context import MLContext
+from xdsl.dialects import arith
+from xdsl.dialects.builtin import DenseIntOrFPElementsAttr, ModuleOp, TensorType
+from xdsl.ir import Operation
+from xdsl.passes import ModulePass
+from xdsl.pattern_rewriter import (
+    PatternRewriter,
+    PatternRewriteWalker,
+    RewritePattern,
+    op_type_rewrite_pattern,
+)
+from xdsl.transforms.common_subexpression_elimination import cse
+from xdsl.transforms.dead_code_elimination import dce
+from xdsl.utils.hints import isa
+
+from xuiua.dialect import (
+    TF64,
+    AddOp,
+    DyadicPervasiveOperation,
+    EqualsOp,
+    GreaterOrEqualOp,
+    GreaterThanOp,
+    LessOrEqualOp,
+    LessThanOp,
+    MaximumOp,
+    MinimumOp,
+    MultiplyOp,
+    NotEqualsOp,
+    SubtractOp,
+)
+
+
+def dense_values(attr: DenseIntOrFPElementsAttr) -> list[float]:
+    return [float(element.value.data) for element in attr.data]
+
+
+def repeat_trailing(
+    values: list[float], shape: tuple[int, ...], result_shape: tuple[int, ...]
+) -> list[float]:
+    """
+    Returns the values of an array repeated along the trailing dimensions of the
+    result, following Uiua pervasive operations.
+    """
+    repeat = prod(result_shape[len(shape) :])
+    return [value for value in values for _ in range(repeat)]
+
+
+FOLDS: dict[type[Operation], Callable[[float, float], float]] = {
+    EqualsOp: lambda lhs, rhs: float(lhs == rhs),
+    NotEqualsOp: lambda lhs, rhs: float(lhs != rhs),
+    LessThanOp: lambda lhs, rhs: float(lhs < rhs),
+    LessOrEqualOp: lambda lhs, rhs: float(lhs <= rhs),
+    GreaterThanOp: lambda lhs, rhs: float(lhs > rhs),
+    GreaterOrEqualOp: lambda lhs, rhs: float(lhs >= rhs),
+    AddOp: operator.add,
+    SubtractOp: operator.sub,
+    MultiplyOp: operator.mul,
+    MinimumOp: min,
+    MaximumOp: max,
+}
+"""
+The functions computing the elements of the pervasive operations that can be folded,
+which cannot raise or differ from the compiled operations.
+"""
+
+
+def fold_dyadic_pervasive(
+    op: DyadicPervasiveOperation,
+    fold: Callable[[float, float], float],
+    rewriter: PatternRewriter,
+):
+    """
+    Replaces the operation with a constant if both operands are dense constants, and
+    its result is shaped.
+    """
+    lhs_op, rhs_op = op.lhs.owner, op.rhs.owner
+    if not isinstance(lhs_op, arith.Constant) or not isinstance(rhs_op, arith.Constant):
+        return
+    lhs, rhs = lhs_op.value, rhs_op.value
+    if not isinstance(lhs, DenseIntOrFPElementsAttr) or not isinstance(
+        rhs, DenseIntOrFPElementsAttr
+    ):
+        return
+    if not isa(op.res.type, TF64):
+        return
+
+    lhs_shape, rhs_shape = tuple(lhs.get_shape() or ()), tuple(rhs.get_shape() or ())
+    result_shape = max(lhs_shape, rhs_shape, key=len)
+    if (
+        lhs_shape[: len(rhs_shape)] != rhs_shape[: len(lhs_shape)]
+        or tuple(op.res.type.get_shape()) != result_shape
+    ):
+        # Left for the error to be raised when evaluated
+        return
+
+    lhs_values = repeat_trailing(dense_values(lhs), lhs_shape, result_shape)
+    rhs_values = repeat_trailing(dense_values(rhs), rhs_shape, result_shape)
+    rewriter.replace_matched_op(
+        arith.Constant(
+            DenseIntOrFPElementsAttr.create_dense_float(
+                TensorType(op.res.type.element_type, result_shape),
+                [fold(l, r) for l, r in zip(lhs_values, rhs_values)],
+            )
+        )
+    )
+
+
+class FoldDyadicPervasivePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(
+        self, op: DyadicPervasiveOperation, rewriter: PatternRewriter
+    ):
+        if (fold := FOLDS.get(type(op))) is not None:
+            fold_dyadic_pervasive(op, fold, rewriter)
+
+
+@dataclass(frozen=True)
+class CanonicalizePass(ModulePass):
+    """
+    Folds the dyadic pervasive operations of shaped constants, then removes the
+    duplicated and unused operations, all of them being pure.
+    """
+
+    name = "canonicalize"
+
+    def apply(self, ctx: MLContext, op: ModuleOp) -> None:
+        PatternRewriteWalker(FoldDyadicPervasivePattern()).rewrite_module(op)
+        cse(op)
+        dce(op)
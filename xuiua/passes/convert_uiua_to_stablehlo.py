@@ -1,9 +1,65 @@
+import math
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass
-from numpy import prod
 from xdsl.dialects.builtin import ModuleOp
+from xdsl.ir import Block, Operation, Region, SSAValue
+from xdsl.irdl import IRDLOperation
+from xdsl.dialects.builtin import DYNAMIC_INDEX, DenseArrayBase, i64
 from xdsl.parser import DenseIntOrFPElementsAttr, TensorType
-from xdsl.rewriter import Rewriter
-from xuiua.dialect import AddOp, TF64, ReduceOp, YieldOp
+from xdsl.rewriter import InsertPoint, Rewriter
+from xuiua.dialect import (
+    TF64,
+    AbsoluteValueOp,
+    AddOp,
+    AtangentOp,
+    CeilingOp,
+    DivideOp,
+    DyadicPervasiveOperation,
+    JoinOp,
+    EqualsOp,
+    FloorOp,
+    FoldOp,
+    FusedOp,
+    IteratingModifierOperation,
+    GreaterOrEqualOp,
+    GreaterThanOp,
+    LessOrEqualOp,
+    LessThanOp,
+    LogarithmOp,
+    MaximumOp,
+    MinimumOp,
+    ModulusOp,
+    MonadicPervasiveOperation,
+    MultiplyOp,
+    NegateOp,
+    NotEqualsOp,
+    NotOp,
+    PowerOp,
+    RangeOp,
+    ReduceOp,
+    ReshapeOp,
+    ReverseOp,
+    RoundOp,
+    ScanOp,
+    SignOp,
+    SineOp,
+    SliceRowsOperation,
+    SqrtOp,
+    SubtractOp,
+    TransposeOp,
+    YieldOp,
+    t64,
+)
+from xuiua import stablehlo_ext
+from xuiua.passes.batch import Batcher
+from xuiua.shape_inference_patterns import (
+    broadcast_shapes,
+    constant_integers,
+    input_shapes,
+    iteration_frame,
+    sliced_rows,
+)
+from xuiua.stablehlo_ext import BroadcastInDimOp, ComparisonDirection
 from xdsl.passes import ModulePass
 from xdsl.context import MLContext
 from xdsl.pattern_rewriter import (
@@ -17,42 +73,675 @@ from xdsl.utils.hints import isa
 from xdsl.dialects import arith, stablehlo
 
 
-class LowerAddPattern(RewritePattern):
+def broadcast_to(
+    value: SSAValue, result_type: TF64, rewriter: PatternRewriter
+) -> SSAValue:
+    """
+    Broadcasts the value along the trailing dimensions of the result type, if needed.
+    """
+    assert isa(value.type, TF64)
+    if value.type == result_type:
+        return value
+    rank = len(value.type.get_shape())
+    broadcast_op = BroadcastInDimOp(value, range(rank), result_type)
+    rewriter.insert_op_before_matched_op(broadcast_op)
+    return broadcast_op.result
+
+
+def scalar_constant(value: float, result_type: TF64) -> arith.Constant:
+    return arith.Constant(
+        DenseIntOrFPElementsAttr.create_dense_float(
+            TensorType(result_type.element_type, ()), (value,)
+        )
+    )
+
+
+MONADIC_LOWERINGS: dict[type[Operation], type[IRDLOperation]] = {
+    SignOp: stablehlo_ext.SignOp,
+    NegateOp: stablehlo_ext.NegateOp,
+    AbsoluteValueOp: stablehlo.AbsOp,
+    SqrtOp: stablehlo_ext.SqrtOp,
+    SineOp: stablehlo_ext.SineOp,
+    FloorOp: stablehlo_ext.FloorOp,
+    CeilingOp: stablehlo_ext.CeilOp,
+    RoundOp: stablehlo_ext.RoundNearestAfzOp,
+}
+"""
+The operations lowered to a single elementwise StableHLO operation.
+"""
+
+
+class LowerMonadicPervasivePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(
+        self, op: MonadicPervasiveOperation, rewriter: PatternRewriter
+    ):
+        assert isa(op.res.type, TF64)
+        if isinstance(op, NotOp):
+            one = scalar_constant(1.0, op.res.type)
+            rewriter.insert_op_before_matched_op(one)
+            one_value = broadcast_to(one.result, op.res.type, rewriter)
+            rewriter.replace_matched_op(stablehlo.SubtractOp(one_value, op.arg))
+            return
+        stablehlo_op_type = MONADIC_LOWERINGS[type(op)]
+        rewriter.replace_matched_op(
+            stablehlo_op_type.build(operands=(op.arg,), result_types=(op.res.type,))
+        )
+
+
+DYADIC_LOWERINGS: dict[type[Operation], type[stablehlo.ElementwiseBinaryOperation]] = {
+    AddOp: stablehlo.AddOp,
+    SubtractOp: stablehlo.SubtractOp,
+    MultiplyOp: stablehlo.MultiplyOp,
+    DivideOp: stablehlo_ext.DivideOp,
+    PowerOp: stablehlo_ext.PowerOp,
+    MinimumOp: stablehlo_ext.MinimumOp,
+    MaximumOp: stablehlo_ext.MaximumOp,
+}
+"""
+The operations lowered to a single elementwise StableHLO operation on the same
+operands.
+"""
+
+COMPARISON_DIRECTIONS: dict[type[Operation], ComparisonDirection] = {
+    EqualsOp: ComparisonDirection.EQ,
+    NotEqualsOp: ComparisonDirection.NE,
+    LessThanOp: ComparisonDirection.LT,
+    LessOrEqualOp: ComparisonDirection.LE,
+    GreaterThanOp: ComparisonDirection.GT,
+    GreaterOrEqualOp: ComparisonDirection.GE,
+}
+
+
+def lower_dyadic_pervasive(
+    op: DyadicPervasiveOperation, lhs: SSAValue, rhs: SSAValue, res_type: TF64
+) -> list[Operation]:
+    """
+    Returns the operations computing the result of the operation from operands of the
+    result type, the last one computing the result.
+    """
+    if (stablehlo_op_type := DYADIC_LOWERINGS.get(type(op))) is not None:
+        return [stablehlo_op_type(lhs, rhs)]
+    if (direction := COMPARISON_DIRECTIONS.get(type(op))) is not None:
+        compare_op = stablehlo_ext.CompareOp(lhs, rhs, direction)
+        return [compare_op, stablehlo_ext.ConvertOp(compare_op.result, res_type)]
+    if isinstance(op, ModulusOp):
+        # The remainder has the sign of the dividend, while the modulus has the sign
+        # of the divisor
+        remainder_op = stablehlo_ext.RemainderOp(lhs, rhs)
+        add_op = stablehlo.AddOp(remainder_op.result, rhs)
+        return [remainder_op, add_op, stablehlo_ext.RemainderOp(add_op.result, rhs)]
+    if isinstance(op, LogarithmOp):
+        lhs_log = stablehlo_ext.LogOp(lhs)
+        rhs_log = stablehlo_ext.LogOp(rhs)
+        return [
+            lhs_log,
+            rhs_log,
+            stablehlo_ext.DivideOp(lhs_log.result, rhs_log.result),
+        ]
+    if isinstance(op, AtangentOp):
+        return [stablehlo_ext.Atan2Op(rhs, lhs)]
+    raise NotImplementedError(f"Cannot lower {op.name}")
+
+
+class LowerDyadicPervasivePattern(RewritePattern):
     @op_type_rewrite_pattern
-    def match_and_rewrite(self, op: AddOp, rewriter: PatternRewriter):
-        assert isa(op.lhs.type, TF64)
-        assert isa(op.rhs.type, TF64)
-        assert op.lhs.type == op.rhs.type
-        rewriter.replace_matched_op(stablehlo.AddOp(op.lhs, op.rhs))
+    def match_and_rewrite(
+        self, op: DyadicPervasiveOperation, rewriter: PatternRewriter
+    ):
+        assert isa((lhs_type := op.lhs.type), TF64)
+        assert isa((rhs_type := op.rhs.type), TF64)
+        # The result type is that of the operands, rather than the one inferred for the
+        # operation, as lowering the body of a reduction changes the types of its
+        # arguments to those of the scalar accumulators
+        res_type = t64(*broadcast_shapes(lhs_type.get_shape(), rhs_type.get_shape()))
+        lhs = broadcast_to(op.lhs, res_type, rewriter)
+        rhs = broadcast_to(op.rhs, res_type, rewriter)
+        rewriter.replace_matched_op(lower_dyadic_pervasive(op, lhs, rhs, res_type))
+
+
+class LowerRangePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: RangeOp, rewriter: PatternRewriter):
+        assert isa(op.res.type, TF64)
+        rewriter.replace_matched_op(stablehlo_ext.IotaOp(0, op.res.type))
+
+
+class LowerReversePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: ReverseOp, rewriter: PatternRewriter):
+        assert isa(op.arg.type, TF64)
+        if not op.arg.type.get_shape():
+            rewriter.replace_matched_op((), (op.arg,))
+            return
+        rewriter.replace_matched_op(stablehlo_ext.ReverseOp(op.arg, (0,)))
+
+
+class LowerTransposePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: TransposeOp, rewriter: PatternRewriter):
+        assert isa(op.arg.type, TF64)
+        assert isa(op.res.type, TF64)
+        rank = len(op.arg.type.get_shape())
+        if rank < 2:
+            rewriter.replace_matched_op((), (op.arg,))
+            return
+        permutation = DenseArrayBase.from_list(i64, (*range(1, rank), 0))
+        rewriter.replace_matched_op(
+            stablehlo.TransposeOp(op.arg, permutation, op.res.type)
+        )
+
+
+class LowerReshapePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: ReshapeOp, rewriter: PatternRewriter):
+        assert isa(op.arg.type, TF64)
+        assert isa(op.res.type, TF64)
+        assert isa(op.shape.type, TF64)
+        if not op.shape.type.get_shape():
+            # Repeated along a new leading axis
+            rank = len(op.arg.type.get_shape())
+            rewriter.replace_matched_op(
+                BroadcastInDimOp(op.arg, range(1, rank + 1), op.res.type)
+            )
+            return
+        rewriter.replace_matched_op(stablehlo_ext.ReshapeOp(op.arg, op.res.type))
+
+
+class LowerJoinPattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: JoinOp, rewriter: PatternRewriter):
+        assert isa(op.res.type, TF64)
+        rank = len(op.res.type.get_shape())
+        rows: list[SSAValue] = []
+        # The rows of the top of the stack come first
+        for operand in (op.rhs, op.lhs):
+            assert isa(operand.type, TF64)
+            shape = operand.type.get_shape()
+            if len(shape) < rank:
+                reshape_op = stablehlo_ext.ReshapeOp(operand, t64(1, *shape))
+                rewriter.insert_op_before_matched_op(reshape_op)
+                operand = reshape_op.result
+            rows.append(operand)
+        rewriter.replace_matched_op(stablehlo_ext.ConcatenateOp(rows, 0, op.res.type))
+
+
+class LowerSliceRowsPattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: SliceRowsOperation, rewriter: PatternRewriter):
+        assert isa(op.arg.type, TF64)
+        assert isa(op.res.type, TF64)
+        shape = op.arg.type.get_shape()
+        _, (count,) = constant_integers(op, op.count)
+        start, stop = sliced_rows(op, shape[0], count)
+        rewriter.replace_matched_op(
+            stablehlo_ext.SliceOp(
+                op.arg,
+                (start, *(0 for _ in shape[1:])),
+                (stop, *shape[1:]),
+                op.res.type,
+            )
+        )
+
+
+REDUCTION_IDENTITIES: dict[type[Operation], float] = {
+    AddOp: 0.0,
+    MultiplyOp: 1.0,
+    MinimumOp: float("inf"),
+    MaximumOp: float("-inf"),
+    stablehlo.AddOp: 0.0,
+    stablehlo.MultiplyOp: 1.0,
+    stablehlo_ext.MinimumOp: float("inf"),
+    stablehlo_ext.MaximumOp: float("-inf"),
+}
+"""
+The identity values of the operations that can be used as reduction bodies.
+The uiua operations may already have been lowered when the reduction is.
+"""
+
+
+def combining_ops(block: Block) -> tuple[Operation, ...] | None:
+    """
+    Returns the operations combining each accumulator with the corresponding value if
+    the block applies a single operation to each pair of them, and yields the results
+    in the order of the accumulators.
+    The arguments of the block are the accumulators, followed by the values.
+    """
+    *combine_ops, yield_op = block.ops
+    args = block.args
+    count = len(args) // 2
+    if len(combine_ops) != count or len(yield_op.operands) != count:
+        return None
+    ordered_ops: list[Operation] = []
+    for i, result in enumerate(yield_op.operands):
+        combine_op = result.owner
+        if not isinstance(combine_op, Operation) or combine_op not in combine_ops:
+            return None
+        if len(combine_op.operands) != 2 or set(combine_op.operands) != {
+            args[i],
+            args[count + i],
+        }:
+            return None
+        ordered_ops.append(combine_op)
+    return tuple(ordered_ops)
+
+
+def combining_op(block: Block) -> Operation | None:
+    """
+    Returns the operation combining the accumulator and the value if the block applies
+    a single operation to them, and yields the result.
+    """
+    combine_ops = combining_ops(block)
+    if combine_ops is None or len(combine_ops) != 1:
+        return None
+    return combine_ops[0]
+
+
+def reduction_identities(block: Block) -> tuple[float, ...] | None:
+    """
+    Returns the identity of each accumulator of the reduction if the block applies a
+    single known operation to each accumulator and value, and yields the results.
+    """
+    combine_ops = combining_ops(block)
+    if combine_ops is None:
+        return None
+    identities: list[float] = []
+    for combine_op in combine_ops:
+        if (identity := REDUCTION_IDENTITIES.get(type(combine_op))) is None:
+            return None
+        identities.append(identity)
+    return tuple(identities)
+
+
+def identity_constant(identity: float, result_type: TF64) -> list[Operation]:
+    """
+    Returns the operations computing the identity as a scalar, the last one computing
+    it.
+    MLIR does not parse infinite float literals, so infinities are computed as the
+    division of 1 or -1 by 0.
+    """
+    if math.isfinite(identity):
+        return [scalar_constant(identity, result_type)]
+    sign_op = scalar_constant(math.copysign(1.0, identity), result_type)
+    zero_op = scalar_constant(0.0, result_type)
+    return [sign_op, zero_op, stablehlo_ext.DivideOp(sign_op.result, zero_op.result)]
 
 
 class LowerReducePattern(RewritePattern):
+    """
+    Lowers reductions to a single StableHLO reduction, which reduces all the values
+    of a reduction with several accumulators in a single pass over their rows.
+    Reductions without a known identity are lowered to a loop over the rows, the
+    accumulators starting from the first ones.
+    """
+
     @op_type_rewrite_pattern
     def match_and_rewrite(self, op: ReduceOp, rewriter: PatternRewriter):
-        assert isa(op.arg.type, TF64)
         body = op.body
         block = body.block
         args = block.args
-        assert isa(args[0].type, TF64)
-        assert isa(args[1].type, TF64)
-        assert isa(op.res.type, TF64)
 
-        new_type = TensorType(op.res.type.element_type, ())
+        identities = reduction_identities(block)
+        if identities is None:
+            self.lower_to_loop(op, rewriter)
+            return
 
-        constant_op = arith.Constant(
-            DenseIntOrFPElementsAttr.create_dense_float(new_type, (0.0,))
-        )
+        init_ops: list[Operation] = []
+        inits: list[SSAValue] = []
+        for res, identity in zip(op.res, identities):
+            assert isa(res.type, TF64)
+            identity_ops = identity_constant(identity, res.type)
+            init_ops += identity_ops
+            inits.append(identity_ops[-1].results[0])
         reduce_op = stablehlo.ReduceOp(
-            (op.arg,),
-            (constant_op.result,),
+            tuple(op.args),
+            tuple(inits),
             (0,),
             Rewriter.move_region_contents_to_new_regions(body),
             op.result_types,
         )
 
-        rewriter.replace_matched_op((constant_op, reduce_op))
-        rewriter.modify_value_type(args[0], new_type)
-        rewriter.modify_value_type(args[1], new_type)
+        rewriter.replace_matched_op((*init_ops, reduce_op))
+        # The accumulators are followed by the values of the same types
+        for i, arg in enumerate(args):
+            rewriter.modify_value_type(arg, inits[i % len(inits)].type)
+
+    @staticmethod
+    def lower_to_loop(op: ReduceOp, rewriter: PatternRewriter) -> None:
+        assert isa((arg_type := op.args[0].type), TF64)
+        length = arg_type.get_shape()[0]
+        if length == DYNAMIC_INDEX:
+            # The padding of the dynamic dimension would be combined with the rows
+            raise NotImplementedError(
+                f"{op.name} without a known identity of a dynamic dimension"
+            )
+        if not length:
+            raise ValueError("Cannot reduce an empty array without an identity")
+
+        # The accumulators start from the first rows, and the loop combines them with
+        # the following ones
+        first_ops: list[Operation] = []
+        first_rows: list[SSAValue] = []
+        for arg in op.args:
+            assert isa(arg.type, TF64)
+            rest = arg.type.get_shape()[1:]
+            slice_op = stablehlo_ext.SliceOp(
+                arg, (0,) * (len(rest) + 1), (1, *rest), t64(1, *rest)
+            )
+            reshape_op = stablehlo_ext.ReshapeOp(slice_op.result, t64(*rest))
+            first_ops += (slice_op, reshape_op)
+            first_rows.append(reshape_op.result)
+
+        def build_body(
+            index: SSAValue, carried: Sequence[SSAValue], block: Block
+        ) -> Sequence[SSAValue]:
+            rows = tuple(row_at(arg, index, block) for arg in op.args)
+            return inline_body(op.body, block, (*carried, *rows), rewriter)
+
+        loop_ops, while_op = while_over_rows(1, length, first_rows, build_body)
+        rewriter.replace_matched_op((*first_ops, *loop_ops), while_op.results[1:])
+
+
+def index_constant(value: int) -> arith.Constant:
+    return arith.Constant(
+        DenseIntOrFPElementsAttr.create_dense_int(TensorType(i64, ()), (value,))
+    )
+
+
+def associative_lowering(
+    block: Block,
+) -> type[stablehlo.ElementwiseBinaryOperation] | None:
+    """
+    Returns the StableHLO operation combining the accumulator and the value if the
+    block applies a single associative operation to them, and yields the result.
+    """
+    combine_op = combining_op(block)
+    if combine_op is None or type(combine_op) not in REDUCTION_IDENTITIES:
+        return None
+    return DYADIC_LOWERINGS.get(type(combine_op), type(combine_op))  # pyright: ignore
+
+
+class PrefixScanBuilder:
+    """
+    Builds the inclusive prefix of the rows of a value combined with an associative
+    operation, in O(n) work and O(log n) depth.
+
+    Adjacent pairs of rows are combined, the prefix of the pairs computed
+    recursively, and the prefix at the remaining rows derived from it, as in the
+    odd/even scan of Ladner and Fischer, which `jax.lax.associative_scan` also uses.
+    """
+
+    combine: type[stablehlo.ElementwiseBinaryOperation]
+    ops: list[Operation]
+
+    def __init__(self, combine: type[stablehlo.ElementwiseBinaryOperation]):
+        self.combine = combine
+        self.ops = []
+
+    def add(self, op: Operation) -> SSAValue:
+        self.ops.append(op)
+        return op.results[0]
+
+    def rows(self, value: SSAValue, start: int, stop: int, step: int = 1) -> SSAValue:
+        assert isa(value.type, TF64)
+        rest = value.type.get_shape()[1:]
+        count = len(range(start, stop, step))
+        return self.add(
+            stablehlo_ext.SliceOp(
+                value,
+                (start, *(0 for _ in rest)),
+                (stop, *rest),
+                t64(count, *rest),
+                (step, *(1 for _ in rest)),
+            )
+        )
+
+    def interleave(self, evens: SSAValue, odds: SSAValue) -> SSAValue:
+        "Returns the rows of both values, alternating, starting with `evens`."
+        assert isa(evens.type, TF64)
+        length, *rest = evens.type.get_shape()
+        pairs = tuple(
+            self.add(stablehlo_ext.ReshapeOp(value, t64(length, 1, *rest)))
+            for value in (evens, odds)
+        )
+        joined = self.add(stablehlo_ext.ConcatenateOp(pairs, 1, t64(length, 2, *rest)))
+        return self.add(stablehlo_ext.ReshapeOp(joined, t64(2 * length, *rest)))
+
+    def scan(self, value: SSAValue) -> SSAValue:
+        assert isa(value.type, TF64)
+        n, *rest = value.type.get_shape()
+        if n < 2:
+            return value
+        half = n // 2
+
+        pairs = self.add(
+            self.combine(
+                self.rows(value, 0, 2 * half - 1, 2), self.rows(value, 1, n, 2)
+            )
+        )
+        # The prefix at the odd rows
+        odds = self.scan(pairs)
+
+        # The prefix at the even rows, from the prefix at the odd row before each
+        evens = self.rows(value, 0, 1)
+        if n > 2:
+            previous = odds if n % 2 else self.rows(odds, 0, half - 1)
+            following = self.add(self.combine(previous, self.rows(value, 2, n, 2)))
+            evens = self.add(
+                stablehlo_ext.ConcatenateOp(
+                    (evens, following),
+                    0,
+                    t64(1 + (n - 1) // 2, *rest),
+                )
+            )
+
+        if n % 2 == 0:
+            return self.interleave(evens, odds)
+        interleaved = self.interleave(self.rows(evens, 0, half), odds)
+        return self.add(
+            stablehlo_ext.ConcatenateOp(
+                (interleaved, self.rows(evens, half, half + 1)), 0, value.type
+            )
+        )
+
+
+def row_at(arg: SSAValue, index: SSAValue, block: Block) -> SSAValue:
+    """
+    Appends the operations extracting the row of the value at the dynamic index to
+    the block, and returns the row.
+    """
+    assert isa(arg.type, TF64)
+    rest = arg.type.get_shape()[1:]
+    zero = index_constant(0)
+    slice_op = stablehlo_ext.DynamicSliceOp(
+        arg, (index, *(zero.result for _ in rest)), (1, *rest), t64(1, *rest)
+    )
+    reshape_op = stablehlo_ext.ReshapeOp(slice_op.result, t64(*rest))
+    block.add_ops((zero, slice_op, reshape_op))
+    return reshape_op.result
+
+
+def inline_body(
+    body: Region,
+    block: Block,
+    args: Sequence[SSAValue],
+    rewriter: PatternRewriter,
+) -> tuple[SSAValue, ...]:
+    """
+    Moves the operations of the body of a modifier to the end of the block, and
+    returns the values it yields.
+    """
+    rewriter.inline_block(body.block, InsertPoint.at_end(block), args)
+    terminator = block.last_op
+    assert isinstance(terminator, YieldOp | stablehlo.ReturnOp)
+    results = tuple(terminator.operands)
+    rewriter.erase_op(terminator)
+    return results
+
+
+def while_over_rows(
+    start: int,
+    stop: int,
+    inits: Sequence[SSAValue],
+    build_body: Callable[[SSAValue, Sequence[SSAValue], Block], Sequence[SSAValue]],
+) -> tuple[list[Operation], stablehlo_ext.WhileOp]:
+    """
+    Returns the operations of a loop over the indices from `start` to `stop`, carrying
+    the values from `inits`.
+    `build_body` appends the operations of an iteration to the block, given the index
+    and the carried values, and returns the next carried values.
+    The results of the loop are the final index, followed by the carried values.
+    """
+    start_op = index_constant(start)
+    types = (start_op.result.type, *(init.type for init in inits))
+
+    cond = Block(arg_types=types)
+    stop_op = index_constant(stop)
+    compare_op = stablehlo_ext.CompareOp(
+        cond.args[0], stop_op.result, ComparisonDirection.LT
+    )
+    cond.add_ops((stop_op, compare_op, stablehlo.ReturnOp([compare_op.result])))
+
+    body = Block(arg_types=types)
+    index, *carried = body.args
+    results = build_body(index, carried, body)
+    one = index_constant(1)
+    next_op = stablehlo.AddOp(index, one.result)
+    body.add_ops((one, next_op, stablehlo.ReturnOp([next_op.result, *results])))
+
+    while_op = stablehlo_ext.WhileOp(
+        (start_op.result, *inits), Region(cond), Region(body)
+    )
+    return [start_op, while_op], while_op
+
+
+def erase_body(body: Region, rewriter: PatternRewriter) -> None:
+    for op in reversed(tuple(body.block.ops)):
+        rewriter.erase_op(op)
+
+
+class LowerScanPattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: ScanOp, rewriter: PatternRewriter):
+        assert isa(op.arg.type, TF64)
+        length, *rest = op.arg.type.get_shape()
+
+        combine = associative_lowering(op.body.block)
+        if 0 <= length < 2:
+            erase_body(op.body, rewriter)
+            rewriter.replace_matched_op((), (op.arg,))
+            return
+        if combine is not None:
+            erase_body(op.body, rewriter)
+            builder = PrefixScanBuilder(combine)
+            result = builder.scan(op.arg)
+            rewriter.replace_matched_op(builder.ops, (result,))
+            return
+
+        # Each iteration combines the accumulator with a row, and writes the result
+        # over that row of the output
+        first_op = stablehlo_ext.SliceOp(
+            op.arg, (0,) * (len(rest) + 1), (1, *rest), t64(1, *rest)
+        )
+        acc_op = stablehlo_ext.ReshapeOp(first_op.result, t64(*rest))
+
+        def build_body(
+            index: SSAValue, carried: Sequence[SSAValue], block: Block
+        ) -> Sequence[SSAValue]:
+            acc, output = carried
+            row = row_at(op.arg, index, block)
+            (next_acc,) = inline_body(op.body, block, (acc, row), rewriter)
+            update_op = stablehlo_ext.ReshapeOp(next_acc, t64(1, *rest))
+            zero = index_constant(0)
+            output_op = stablehlo_ext.DynamicUpdateSliceOp(
+                output, update_op.result, (index, *(zero.result for _ in rest))
+            )
+            block.add_ops((update_op, zero, output_op))
+            return (next_acc, output_op.result)
+
+        loop_ops, while_op = while_over_rows(
+            1, length, (acc_op.result, op.arg), build_body
+        )
+        rewriter.replace_matched_op(
+            [first_op, acc_op, *loop_ops], (while_op.results[2],)
+        )
+
+
+class LowerFoldPattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: FoldOp, rewriter: PatternRewriter):
+        assert isa(op.arg.type, TF64)
+        length = op.arg.type.get_shape()[0]
+        if not length:
+            erase_body(op.body, rewriter)
+            rewriter.replace_matched_op((), (op.init,))
+            return
+
+        def build_body(
+            index: SSAValue, carried: Sequence[SSAValue], block: Block
+        ) -> Sequence[SSAValue]:
+            (acc,) = carried
+            row = row_at(op.arg, index, block)
+            (next_acc,) = inline_body(op.body, block, (acc, row), rewriter)
+            if next_acc.type != acc.type:
+                raise ValueError(
+                    f"Fold body changes the type of the accumulator from {acc.type} "
+                    f"to {next_acc.type}"
+                )
+            return (next_acc,)
+
+        loop_ops, while_op = while_over_rows(0, length, (op.init,), build_body)
+        rewriter.replace_matched_op(loop_ops, (while_op.results[1],))
+
+
+def is_lowered(region: Region) -> bool:
+    return not any(op.dialect_name() == "uiua" for op in region.walk())
+
+
+class LowerIteratingModifierPattern(RewritePattern):
+    """
+    Evaluates the body of the modifier for all the cells of its inputs at once, by
+    adding the frame of the inputs as leading dimensions of the values it computes,
+    rather than looping over the cells.
+    """
+
+    @op_type_rewrite_pattern
+    def match_and_rewrite(
+        self, op: IteratingModifierOperation, rewriter: PatternRewriter
+    ):
+        # The body is walked after the modifier, which is matched again once the
+        # body is lowered, as only StableHLO operations can be batched
+        if not is_lowered(op.body):
+            return
+
+        block = op.body.block
+        frame = iteration_frame(op, input_shapes(op))
+        Batcher(frame).batch_block(block, block.args)
+        rewriter.inline_block(block, InsertPoint.before(op), op.inputs)
+        # The values returned by the body may be its arguments, only replaced by the
+        # inputs once inlined
+        return_op = op.prev_op
+        assert isinstance(return_op, stablehlo.ReturnOp)
+        results = tuple(return_op.operands)
+        rewriter.erase_op(return_op)
+        rewriter.replace_matched_op((), results)
+
+
+class InlineFusedPattern(RewritePattern):
+    """
+    Moves the operations of fused bodies back into their parent block, as XLA fuses
+    operations itself.
+    """
+
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: FusedOp, rewriter: PatternRewriter):
+        block = op.body.block
+        yield_op = block.last_op
+        assert isinstance(yield_op, YieldOp)
+        results = tuple(yield_op.operands)
+        rewriter.erase_op(yield_op)
+        rewriter.inline_block(block, InsertPoint.before(op), op.operands)
+        rewriter.replace_matched_op((), results)
 
 
 class LowerYieldPattern(RewritePattern):
@@ -71,8 +760,19 @@ class ConvertUiuaToStableHLOPass(ModulePass):
         PatternRewriteWalker(
             GreedyRewritePatternApplier(
                 [
-                    LowerAddPattern(),
+                    InlineFusedPattern(),
+                    LowerMonadicPervasivePattern(),
+                    LowerDyadicPervasivePattern(),
+                    LowerRangePattern(),
+                    LowerReversePattern(),
+                    LowerTransposePattern(),
+                    LowerReshapePattern(),
+                    LowerJoinPattern(),
+                    LowerSliceRowsPattern(),
                     LowerReducePattern(),
+                    LowerScanPattern(),
+                    LowerFoldPattern(),
+                    LowerIteratingModifierPattern(),
                     LowerYieldPattern(),
                 ]
             )
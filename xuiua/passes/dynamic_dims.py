@@ -0,0 +1,301 @@
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import cast
+from xdsl.context import MLContext
+from xdsl.dialects import arith, stablehlo
+from xdsl.dialects.builtin import (
+    DYNAMIC_INDEX,
+    ArrayAttr,
+    DenseArrayBase,
+    FunctionType,
+    ModuleOp,
+    TensorType,
+    i64,
+)
+from xdsl.dialects.func import FuncOp, Return
+from xdsl.ir import Attribute, Operation, SSAValue
+from xdsl.passes import ModulePass
+from xdsl.rewriter import InsertPoint, Rewriter
+from xdsl.traits import SymbolTable
+from xdsl.utils.hints import isa
+
+from xuiua.stablehlo_ext import (
+    ELEMENTWISE_OPS,
+    BroadcastInDimOp,
+    CompareOp,
+    ComparisonDirection,
+    IotaOp,
+    SelectOp,
+)
+
+Dim = tuple[SSAValue, int]
+"A dimension of a tensor value, identified by the value and the index of the axis."
+
+
+def get_shape(value: SSAValue) -> tuple[int, ...]:
+    assert isa(value.type, TensorType[Attribute])
+    return value.type.get_shape()
+
+
+class DynamicDims:
+    """
+    Groups the dimensions of the values in a lowered function that must have the same
+    size, so that the sizes of all the dynamic dimensions can be derived from the
+    shapes of the inputs.
+
+    The dynamic dimensions of the inputs are numbered in order of appearance, each
+    group of dimensions that must match counting once.
+    """
+
+    func_op: FuncOp
+    values: list[SSAValue]
+    "The tensor values in the function body, excluding those in nested regions."
+    reductions: list[Operation]
+    "The reductions in the function body."
+    _parents: dict[Dim, Dim]
+    _sizes: dict[Dim, int]
+    "The static sizes of the groups, indexed by their representative dimension."
+    _indices: dict[Dim, int]
+    "The indices of the dynamic groups, indexed by their representative dimension."
+
+    def __init__(self, func_op: FuncOp):
+        self.func_op = func_op
+        self.values = []
+        self.reductions = []
+        self._parents = {}
+        self._sizes = {}
+        self._indices = {}
+
+        block = func_op.body.block
+        for arg in block.args:
+            self.add_value(arg)
+        for op in block.ops:
+            self.add_op(op)
+
+        for arg in block.args:
+            for dim in range(len(get_shape(arg))):
+                root = self.find((arg, dim))
+                if root not in self._sizes and root not in self._indices:
+                    self._indices[root] = len(self._indices)
+
+        for value in self.values:
+            for dim in range(len(get_shape(value))):
+                root = self.find((value, dim))
+                if root not in self._sizes and root not in self._indices:
+                    raise ValueError(
+                        f"Dynamic dimension {dim} of {value} is not determined by the "
+                        "inputs"
+                    )
+
+    @property
+    def num_dynamic(self) -> int:
+        return len(self._indices)
+
+    def find(self, dim: Dim) -> Dim:
+        parent = self._parents[dim]
+        if parent == dim:
+            return dim
+        root = self.find(parent)
+        self._parents[dim] = root
+        return root
+
+    def union(self, lhs: Dim, rhs: Dim) -> None:
+        lhs_root = self.find(lhs)
+        rhs_root = self.find(rhs)
+        if lhs_root == rhs_root:
+            return
+        lhs_size = self._sizes.get(lhs_root)
+        rhs_size = self._sizes.get(rhs_root)
+        if lhs_size is not None and rhs_size is not None and lhs_size != rhs_size:
+            raise ValueError(
+                f"Cannot match dimensions of size {lhs_size} and {rhs_size}"
+            )
+        self._parents[rhs_root] = lhs_root
+        if lhs_size is None and rhs_size is not None:
+            self._sizes[lhs_root] = rhs_size
+
+    def add_value(self, value: SSAValue) -> None:
+        self.values.append(value)
+        for dim, size in enumerate(get_shape(value)):
+            self._parents[(value, dim)] = (value, dim)
+            if size != DYNAMIC_INDEX:
+                self._sizes[(value, dim)] = size
+
+    def add_op(self, op: Operation) -> None:
+        if isinstance(op, Return):
+            return
+
+        for result in op.results:
+            self.add_value(result)
+
+        if isinstance(op, arith.Constant):
+            pass
+        elif isinstance(op, ELEMENTWISE_OPS):
+            (result,) = op.results
+            for operand in op.operands:
+                for dim in range(len(get_shape(operand))):
+                    self.union((result, dim), (operand, dim))
+        elif isinstance(op, BroadcastInDimOp):
+            operand_shape = get_shape(op.operand)
+            result_shape = get_shape(op.result)
+            for operand_dim, result_dim in enumerate(op.get_broadcast_dimensions()):
+                if operand_shape[operand_dim] == 1 and result_shape[result_dim] != 1:
+                    # Expanded along this dimension
+                    continue
+                self.union((op.result, result_dim), (op.operand, operand_dim))
+        elif isinstance(op, stablehlo.ReduceOp):
+            self.reductions.append(op)
+            dimensions = op.attributes["dimensions"]
+            assert isinstance(dimensions, DenseArrayBase)
+            reduced = set(int(dim) for dim in dimensions.as_tuple())
+            for input, result in zip(op.operands, op.results):
+                kept = (
+                    dim for dim in range(len(get_shape(input))) if dim not in reduced
+                )
+                for result_dim, input_dim in enumerate(kept):
+                    self.union((result, result_dim), (input, input_dim))
+        else:
+            raise NotImplementedError(f"Cannot infer dynamic dimensions of {op.name}")
+
+    def dynamic_index(self, dim: Dim) -> int | None:
+        """
+        Returns the index of the group of the dimension, or `None` if its size is
+        static.
+        """
+        return self._indices.get(self.find(dim))
+
+    def resolve(self, shapes: Sequence[Sequence[int]]) -> tuple[int, ...]:
+        """
+        Returns the sizes of the dynamic dimensions for inputs of the given shapes.
+        """
+        args = self.func_op.body.block.args
+        if len(shapes) != len(args):
+            raise ValueError(f"Expected {len(args)} inputs, got {len(shapes)}")
+        sizes: list[int | None] = [None] * self.num_dynamic
+        for i, (arg, shape) in enumerate(zip(args, shapes)):
+            expected = get_shape(arg)
+            if len(shape) != len(expected):
+                raise ValueError(
+                    f"Expected input {i} of rank {len(expected)}, got shape {tuple(shape)}"
+                )
+            for dim, size in enumerate(shape):
+                index = self.dynamic_index((arg, dim))
+                if index is None:
+                    expected_size = self._sizes[self.find((arg, dim))]
+                elif (expected_size := sizes[index]) is None:
+                    sizes[index] = size
+                    continue
+                if size != expected_size:
+                    raise ValueError(
+                        f"Expected dimension {dim} of input {i} to have size "
+                        f"{expected_size}, got {size}"
+                    )
+        # Each group of dynamic dimensions contains an input dimension
+        assert all(size is not None for size in sizes)
+        return cast(tuple[int, ...], tuple(sizes))
+
+    def shape(self, value: SSAValue, sizes: Sequence[int]) -> tuple[int, ...]:
+        """
+        Returns the shape of the value, given the sizes of the dynamic dimensions.
+        """
+        shape: list[int] = []
+        for dim in range(len(get_shape(value))):
+            root = self.find((value, dim))
+            index = self._indices.get(root)
+            shape.append(self._sizes[root] if index is None else sizes[index])
+        return tuple(shape)
+
+
+def mask_input(
+    input: SSAValue,
+    init_value: SSAValue,
+    dim: int,
+    length: SSAValue,
+    before: Operation,
+) -> SSAValue:
+    """
+    Returns the input with the elements at or past `length` along the dimension
+    replaced by the initial value of the reduction.
+    """
+    assert isa(input.type, TensorType[Attribute])
+    shape = input.type.get_shape()
+    iota_op = IotaOp(dim, TensorType(i64, shape))
+    length_op = BroadcastInDimOp(length, (), TensorType(i64, shape))
+    compare_op = CompareOp(iota_op.output, length_op.result, ComparisonDirection.LT)
+    init_op = BroadcastInDimOp(init_value, (), input.type)
+    select_op = SelectOp(compare_op.result, input, init_op.result)
+    Rewriter.insert_op(
+        (iota_op, length_op, compare_op, init_op, select_op), InsertPoint.before(before)
+    )
+    return select_op.result
+
+
+def materialize_dynamic_dims(func_op: FuncOp, sizes: Sequence[int]) -> None:
+    """
+    Replaces the dynamic dimensions of the function by the given static sizes, which
+    must be at least as large as the actual sizes.
+
+    The actual sizes are passed as additional scalar inputs, and the padding elements
+    are excluded from reductions. Other elements computed from the padding are left
+    for the caller to discard.
+    """
+    dynamic_dims = DynamicDims(func_op)
+    if len(sizes) != dynamic_dims.num_dynamic:
+        raise ValueError(
+            f"Expected {dynamic_dims.num_dynamic} dynamic sizes, got {len(sizes)}"
+        )
+
+    for value in dynamic_dims.values:
+        assert isa(value.type, TensorType[Attribute])
+        value.type = TensorType(
+            value.type.element_type, dynamic_dims.shape(value, sizes)
+        )
+
+    block = func_op.body.block
+    lengths = tuple(
+        block.insert_arg(TensorType(i64, ()), len(block.args)) for _ in sizes
+    )
+
+    for op in dynamic_dims.reductions:
+        dimensions = op.attributes["dimensions"]
+        assert isinstance(dimensions, DenseArrayBase)
+        num_inputs = len(op.results)
+        inputs = list(op.operands[:num_inputs])
+        init_values = op.operands[num_inputs:]
+        for i, init_value in enumerate(init_values):
+            for dim in dimensions.as_tuple():
+                index = dynamic_dims.dynamic_index((op.operands[i], int(dim)))
+                if index is not None:
+                    inputs[i] = mask_input(
+                        inputs[i], init_value, int(dim), lengths[index], op
+                    )
+        op.operands = (*inputs, *init_values)
+
+    return_op = block.last_op
+    assert isinstance(return_op, Return), f"{return_op}"
+    func_op.function_type = FunctionType.from_attrs(
+        ArrayAttr(arg.type for arg in block.args),
+        ArrayAttr(operand.type for operand in return_op.operands),
+    )
+
+
+@dataclass(frozen=True)
+class MaterializeDynamicDimsPass(ModulePass):
+    """
+    Replaces the dynamic dimensions of a lowered function by static sizes, adding the
+    actual sizes as scalar inputs after the others.
+
+    The sizes are given for each group of dynamic input dimensions that must match,
+    in order of appearance.
+    """
+
+    name = "materialize-dynamic-dims"
+
+    sizes: tuple[int, ...] = field()
+
+    func: str = field(default="main")
+
+    def apply(self, ctx: MLContext, op: ModuleOp) -> None:
+        func_op = SymbolTable.lookup_symbol(op, self.func)
+        assert isinstance(func_op, FuncOp)
+        materialize_dynamic_dims(func_op, self.sizes)
@@ -0,0 +1,125 @@
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from xdsl.context import MLContext
+from xdsl.dialects.builtin import ModuleOp
+from xdsl.dialects.func import FuncOp
+from xdsl.ir import Block, Operation, Region, SSAValue
+from xdsl.passes import ModulePass
+from xdsl.rewriter import InsertPoint, Rewriter
+
+from xuiua.dialect import (
+    AddOp,
+    FusedOp,
+    MaximumOp,
+    MinimumOp,
+    MultiplyOp,
+    Pervasive,
+    ReduceOp,
+    YieldOp,
+)
+from xuiua.passes.convert_uiua_to_stablehlo import combining_ops
+
+ASSOCIATIVE_OPS: tuple[type[Operation], ...] = (
+    AddOp,
+    MultiplyOp,
+    MinimumOp,
+    MaximumOp,
+)
+"""
+The operations whose reductions can be computed over parts of their argument, and
+the partial results combined, so that they can end a fused chain.
+"""
+
+
+def is_fusible_reduce(op: Operation) -> bool:
+    if not isinstance(op, ReduceOp):
+        return False
+    combine_ops = combining_ops(op.body.block)
+    return combine_ops is not None and all(
+        isinstance(combine_op, ASSOCIATIVE_OPS) for combine_op in combine_ops
+    )
+
+
+def fuse(ops: Sequence[Operation]) -> FusedOp:
+    """
+    Replaces the operations with a fused operation at the position of the last one,
+    whose inputs are the values they use from outside of them, and whose results are
+    the values used outside of them.
+    """
+    fused_ops = set(ops)
+    inputs: list[SSAValue] = []
+    outputs: list[SSAValue] = []
+    for op in ops:
+        for operand in op.operands:
+            if operand.owner not in fused_ops and operand not in inputs:
+                inputs.append(operand)
+        outputs.extend(
+            result
+            for result in op.results
+            if any(use.operation not in fused_ops for use in result.uses)
+        )
+
+    block = Block(arg_types=tuple(i.type for i in inputs))
+    value_mapper: dict[SSAValue, SSAValue] = dict(zip(inputs, block.args))
+    block.add_ops(op.clone(value_mapper) for op in ops)
+    block.add_op(YieldOp(*(value_mapper[output] for output in outputs)))
+
+    fused_op = FusedOp(inputs, tuple(output.type for output in outputs), Region(block))
+    Rewriter.insert_op(fused_op, InsertPoint.after(ops[-1]))
+    for output, result in zip(outputs, fused_op.res):
+        output.replace_by(result)
+    for op in reversed(ops):
+        Rewriter.erase_op(op)
+    return fused_op
+
+
+def fuse_block(block: Block) -> None:
+    """
+    Fuses the chains of pervasive operations of the block, each operation of a chain
+    using the result of a previous one, with the reduction of a result of the chain
+    that may follow it.
+    Operations that do not use the results of a chain may be interleaved with it.
+    """
+    chains: list[list[Operation]] = []
+    chain: list[Operation] = []
+    chain_results: set[SSAValue] = set()
+    for op in block.ops:
+        uses_chain = any(operand in chain_results for operand in op.operands)
+        if chain and uses_chain and is_fusible_reduce(op):
+            chains.append(chain + [op])
+            chain, chain_results = [], set()
+            continue
+        if op.has_trait(Pervasive) and (uses_chain or not chain):
+            chain.append(op)
+            chain_results.update(op.results)
+            continue
+        if uses_chain or op.has_trait(Pervasive):
+            chains.append(chain)
+            chain, chain_results = [], set()
+        if op.has_trait(Pervasive):
+            chain.append(op)
+            chain_results.update(op.results)
+    chains.append(chain)
+
+    for chain in chains:
+        # A single pervasive operation has nothing to fuse with
+        if len(chain) > 1:
+            fuse(chain)
+
+
+@dataclass(frozen=True)
+class FusePervasivePass(ModulePass):
+    """
+    Fuses chains of pervasive operations, so that backends evaluating operations one
+    at a time can evaluate each chain in a single pass over memory, instead of
+    computing an intermediate array per operation.
+    """
+
+    name = "fuse-pervasive"
+
+    def apply(self, ctx: MLContext, op: ModuleOp) -> None:
+        for func_op in op.body.ops:
+            if isinstance(func_op, FuncOp):
+                for block in func_op.body.blocks:
+                    fuse_block(block)
@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+
+from xdsl.context import MLContext
+from xdsl.dialects.builtin import ModuleOp
+from xdsl.dialects.func import Call, FuncOp, Return
+from xdsl.ir import Operation, SSAValue
+from xdsl.passes import ModulePass
+from xdsl.rewriter import InsertPoint, Rewriter
+from xdsl.traits import SymbolTable
+
+
+def inline_call(call_op: Call, callee: FuncOp) -> list[Operation]:
+    """
+    Replaces the call with a copy of the body of the callee, and returns the copied
+    operations.
+    """
+    block = callee.body.block
+    value_mapper: dict[SSAValue, SSAValue] = dict(zip(block.args, call_op.arguments))
+    inlined: list[Operation] = []
+    for op in block.ops:
+        if isinstance(op, Return):
+            results = tuple(value_mapper.get(arg, arg) for arg in op.arguments)
+            Rewriter.insert_op(inlined, InsertPoint.before(call_op))
+            Rewriter.replace_op(call_op, (), results)
+            return inlined
+        inlined.append(op.clone(value_mapper))
+    raise ValueError(f"Function {callee.sym_name.data} does not return")
+
+
+def inline_calls(op: Operation, symbol_table: Operation) -> None:
+    """
+    Inlines the calls in the operation to the functions defined in the symbol table,
+    including the calls of the inlined functions.
+    """
+    calls = [call_op for call_op in op.walk() if isinstance(call_op, Call)]
+    while calls:
+        call_op = calls.pop()
+        callee = SymbolTable.lookup_symbol(symbol_table, call_op.callee)
+        if (
+            not isinstance(callee, FuncOp)
+            or callee.is_declaration
+            or len(callee.body.blocks) != 1
+        ):
+            continue
+        for inlined_op in inline_call(call_op, callee):
+            calls.extend(
+                nested_op
+                for nested_op in inlined_op.walk()
+                if isinstance(nested_op, Call)
+            )
+
+
+@dataclass(frozen=True)
+class InlineCallsPass(ModulePass):
+    """
+    Inlines the calls to the functions of the module, so that each function is
+    compiled as a single computation.
+    """
+
+    name = "inline-calls"
+
+    def apply(self, ctx: MLContext, op: ModuleOp) -> None:
+        for func_op in op.body.ops:
+            if isinstance(func_op, FuncOp):
+                inline_calls(func_op, op)
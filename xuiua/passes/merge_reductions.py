@@ -0,0 +1,107 @@
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from xdsl.context import MLContext
+from xdsl.dialects.builtin import DYNAMIC_INDEX, ModuleOp
+from xdsl.ir import Attribute, Block, Region, SSAValue
+from xdsl.passes import ModulePass
+from xdsl.rewriter import InsertPoint, Rewriter
+from xdsl.utils.hints import isa
+
+from xuiua.dialect import TF64, ReduceOp, YieldOp
+from xuiua.passes.convert_uiua_to_stablehlo import reduction_identities
+
+
+def merge(reduce_ops: Sequence[ReduceOp]) -> ReduceOp:
+    """
+    Replaces the reductions with a single one at the position of the last one, whose
+    accumulators are those of each reduction, and whose body applies each of their
+    bodies to its accumulators and values.
+    """
+    args = tuple(arg for op in reduce_ops for arg in op.args)
+    accs: list[SSAValue] = []
+    vals: list[SSAValue] = []
+    for op in reduce_ops:
+        block_args = op.body.block.args
+        accs.extend(block_args[: len(op.args)])
+        vals.extend(block_args[len(op.args) :])
+
+    block = Block(arg_types=tuple(arg.type for arg in (*accs, *vals)))
+    value_mapper: dict[SSAValue, SSAValue] = dict(zip((*accs, *vals), block.args))
+    outputs: list[SSAValue] = []
+    for op in reduce_ops:
+        *body_ops, yield_op = op.body.block.ops
+        block.add_ops(body_op.clone(value_mapper) for body_op in body_ops)
+        outputs.extend(value_mapper.get(value, value) for value in yield_op.operands)
+    block.add_op(YieldOp(*outputs))
+
+    results = tuple(res for op in reduce_ops for res in op.res)
+    merged_op = ReduceOp(args, tuple(res.type for res in results), Region(block))
+    Rewriter.insert_op(merged_op, InsertPoint.after(reduce_ops[-1]))
+    for res, merged_res in zip(results, merged_op.res):
+        res.replace_by(merged_res)
+    for op in reversed(reduce_ops):
+        Rewriter.erase_op(op)
+    return merged_op
+
+
+def merge_key(op: ReduceOp) -> tuple[Attribute, bool] | None:
+    """
+    Returns the type of the values reduced by the operation, if it is static, as only
+    the reductions of values of the same shape can be evaluated together, and whether
+    the identities of its accumulators are known, as merging a reduction without them
+    would lower the other ones to a loop over the rows too.
+    """
+    arg_type = op.args[0].type
+    if not isa(arg_type, TF64) or DYNAMIC_INDEX in arg_type.get_shape():
+        return None
+    return arg_type, reduction_identities(op.body.block) is not None
+
+
+def merge_block(block: Block) -> None:
+    """
+    Merges the reductions of the block reducing values of the same shape, so that
+    they are evaluated in a single pass over their rows.
+    A reduction is not merged with the reductions whose results it depends on,
+    directly or not, which are only used after the merged reduction.
+    """
+    # The reductions that can be merged with the following ones, by key
+    groups: dict[tuple[Attribute, bool], list[ReduceOp]] = {}
+    merged_groups: list[list[ReduceOp]] = []
+    for op in block.ops:
+        operands = {
+            operand for nested_op in op.walk() for operand in nested_op.operands
+        }
+        for key, group in tuple(groups.items()):
+            if any(res in operands for reduce_op in group for res in reduce_op.res):
+                merged_groups.append(groups.pop(key))
+        if isinstance(op, ReduceOp) and (key := merge_key(op)) is not None:
+            groups.setdefault(key, []).append(op)
+    merged_groups.extend(groups.values())
+
+    for group in merged_groups:
+        # A single reduction has nothing to merge with
+        if len(group) > 1:
+            merge(group)
+
+
+@dataclass(frozen=True)
+class MergeReductionsPass(ModulePass):
+    """
+    Merges the reductions of values of the same shape into reductions with several
+    accumulators, which are lowered to a single StableHLO reduction, so that the
+    values are read in a single pass over memory, rather than one per reduction.
+    """
+
+    name = "merge-reductions"
+
+    def apply(self, ctx: MLContext, op: ModuleOp) -> None:
+        blocks = tuple(
+            block
+            for nested_op in op.walk()
+            for region in nested_op.regions
+            for block in region.blocks
+        )
+        # The nested blocks first, as the bodies of merged reductions are cloned
+        for block in reversed(blocks):
+            merge_block(block)
@@ -0,0 +1,251 @@
+"""
+A long-lived server answering parse, lower and run requests, keeping the context,
+the parsed sources and the compiled programs warm between requests.
+
+Requests and responses are JSON-RPC 2.0 messages, one per line, read from stdin and
+written to stdout, or exchanged over a Unix socket:
+
+```
+{"jsonrpc": "2.0", "id": 1, "method": "lower", "params": {"path": "add.ua"}}
+```
+
+The sources are given either as a `path` to read, or as a `source` with an optional
+`name`. Sources are kept by path or name, and re-parsed incrementally when they
+change.
+
+The `run` method takes the `inputs` as nested lists, and/or the `input_paths` of
+`.npy` and `.npz` files, followed by the former.
+"""
+
+import io
+import json
+import socket
+import socketserver
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, TextIO
+
+from xdsl.context import MLContext
+from xdsl.parser import Input
+
+from xuiua.context import get_ctx
+from xuiua.frontend.incremental import (
+    IncrementalModule,
+    IncrementalParser,
+    TextEdit,
+)
+from xuiua.inputs import load_inputs
+from xuiua.passes import apply_passes
+from xuiua.printer import Printer
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+"The code of the errors raised while handling a valid request."
+
+
+class RequestError(Exception):
+    code: int
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class Document:
+    """
+    A source kept by the server, whose module is only built when it is lowered.
+    """
+
+    parser: IncrementalParser
+    _module: IncrementalModule | None
+
+    def __init__(self, input: Input):
+        self.parser = IncrementalParser(input)
+        self._module = None
+
+    @property
+    def module(self) -> IncrementalModule:
+        if self._module is None:
+            self._module = IncrementalModule(self.parser)
+        return self._module
+
+    def update(self, source: str) -> None:
+        """
+        Re-parses the changed part of the source, and updates the module if built.
+        """
+        if source == self.parser.input.content:
+            return
+        items_edit = self.parser.apply_edit(
+            TextEdit.between(self.parser.input.content, source)
+        )
+        if self._module is not None:
+            try:
+                self._module.update(items_edit)
+            except Exception:
+                # Rebuilt from the items when next lowered
+                self._module = None
+                raise
+
+
+class Server:
+    """
+    Handles requests, keeping the state that makes later requests faster.
+    """
+
+    ctx: MLContext
+    documents: dict[str, Document]
+    "The sources parsed so far, by path or name."
+    stopped: bool
+
+    def __init__(self):
+        self.ctx = get_ctx()
+        self.documents = {}
+        self.stopped = False
+
+    def document(self, params: dict[str, Any]) -> Document:
+        """
+        Returns the document of the source of the request, updated to its current
+        content.
+        """
+        if "source" in params:
+            source = params["source"]
+            name = params.get("name", "<unknown>")
+        elif "path" in params:
+            name = params["path"]
+            source = Path(name).read_text()
+        else:
+            raise RequestError(INVALID_PARAMS, "Expected a path or a source")
+
+        document = self.documents.get(name)
+        if document is None:
+            document = Document(Input(source, name))
+            self.documents[name] = document
+        else:
+            document.update(source)
+        return document
+
+    # region Methods
+
+    def parse(self, params: dict[str, Any]) -> dict[str, Any]:
+        stream = io.StringIO()
+        self.document(params).parser.items.print(Printer(stream))
+        return {"ast": stream.getvalue()}
+
+    def lower(self, params: dict[str, Any]) -> dict[str, Any]:
+        module = self.document(params).module.module.clone()
+        apply_passes(self.ctx, module, params.get("passes"))
+        return {"ir": str(module)}
+
+    def run(self, params: dict[str, Any]) -> dict[str, Any]:
+        import numpy as np
+
+        from xuiua.compile import compile_source
+
+        inputs = tuple(
+            np.asarray(i, dtype=np.float64) for i in params.get("inputs", ())
+        ) + load_inputs(tuple(Path(path) for path in params.get("input_paths", ())))
+        program = compile_source(
+            self.document(params).parser.input.content,
+            params.get("entry", "uiua_main"),
+            tuple(i.shape for i in inputs),
+        )
+        outputs = program(*inputs)
+        return {"outputs": [np.asarray(output).tolist() for output in outputs]}
+
+    def shutdown(self, params: dict[str, Any]) -> None:
+        self.stopped = True
+
+    # endregion
+
+    def handle(self, request: Any) -> dict[str, Any] | None:
+        """
+        Returns the response to the request, or None if it is a notification.
+        """
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or not isinstance(
+                request.get("method"), str
+            ):
+                raise RequestError(INVALID_REQUEST, "Invalid request")
+            method = METHODS.get(request["method"])
+            if method is None:
+                raise RequestError(
+                    METHOD_NOT_FOUND, f"Unknown method {request['method']}"
+                )
+            params = request.get("params", {})
+            if not isinstance(params, dict):
+                raise RequestError(INVALID_PARAMS, "Expected named parameters")
+            result = method(self, params)
+        except RequestError as e:
+            error = {"code": e.code, "message": str(e)}
+        except Exception as e:
+            # Reported rather than raised, to keep serving
+            error = {"code": SERVER_ERROR, "message": f"{type(e).__name__}: {e}"}
+        else:
+            if "id" not in request:
+                return None
+            return {"jsonrpc": "2.0", "id": request_id, "result": result}
+        return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+    def handle_line(self, line: str) -> str | None:
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            response = {
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {"code": PARSE_ERROR, "message": str(e)},
+            }
+        else:
+            response = self.handle(request)
+        return None if response is None else json.dumps(response)
+
+
+METHODS: dict[str, Callable[[Server, dict[str, Any]], Any]] = {
+    "parse": Server.parse,
+    "lower": Server.lower,
+    "run": Server.run,
+    "shutdown": Server.shutdown,
+}
+
+
+def serve_stream(server: Server, input: TextIO, output: TextIO) -> None:
+    """
+    Answers the requests read from the input until it ends or the server is shut
+    down.
+    """
+    for line in input:
+        if not line.strip():
+            continue
+        if (response := server.handle_line(line)) is not None:
+            output.write(response + "\n")
+            output.flush()
+        if server.stopped:
+            return
+
+
+def serve_socket(server: Server, path: Path) -> None:
+    """
+    Answers the requests of the clients connecting to the Unix socket, one at a time,
+    until the server is shut down.
+    """
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            connection: socket.socket = self.request
+            with (
+                connection.makefile("r", encoding="utf-8") as input,
+                connection.makefile("w", encoding="utf-8") as output,
+            ):
+                serve_stream(server, input, output)
+
+    path.unlink(missing_ok=True)
+    with socketserver.UnixStreamServer(str(path), Handler) as socket_server:
+        try:
+            while not server.stopped:
+                socket_server.handle_request()
+        finally:
+            path.unlink(missing_ok=True)
@@ -1,3 +1,9 @@
+from collections.abc import Sequence
+from math import prod
+
+from xdsl.dialects import arith
+from xdsl.dialects.builtin import DYNAMIC_INDEX, DenseIntOrFPElementsAttr
+from xdsl.ir import Operation, SSAValue
 from xdsl.pattern_rewriter import (
     PatternRewriter,
     RewritePattern,
@@ -5,50 +11,386 @@ from xdsl.pattern_rewriter import (
 )
 from xdsl.utils.hints import isa
 
-from xuiua.dialect import TF64, AddOp, MultiplyOp, ReduceOp, t64
+from xuiua.dialect import (
+    TF64,
+    DropOp,
+    DyadicPervasiveOperation,
+    FoldOp,
+    IteratingModifierOperation,
+    JoinOp,
+    MonadicPervasiveOperation,
+    RangeOp,
+    ReduceOp,
+    ReshapeOp,
+    ReverseOp,
+    RowsOp,
+    ScanOp,
+    SliceRowsOperation,
+    TakeOp,
+    TransposeOp,
+    YieldOp,
+    t64,
+)
+
 
+def broadcast_shapes(
+    lhs_shape: tuple[int, ...], rhs_shape: tuple[int, ...]
+) -> tuple[int, ...]:
+    """
+    Returns the shape of the result of a pervasive operation on values with the given
+    shapes.
+    Following Uiua, the shape of one operand must be a prefix of the shape of the
+    other, and the values of the smaller array are repeated along the trailing
+    dimensions.
+    Dynamic dimensions match any size, and take the size of the matching dimension if
+    it is static.
+    """
+    shorter, longer = sorted((lhs_shape, rhs_shape), key=len)
+    prefix: list[int] = []
+    for short_dim, long_dim in zip(shorter, longer):
+        if short_dim == DYNAMIC_INDEX:
+            prefix.append(long_dim)
+        elif long_dim == DYNAMIC_INDEX or short_dim == long_dim:
+            prefix.append(short_dim)
+        else:
+            raise ValueError(f"Shapes {lhs_shape} and {rhs_shape} do not match")
+    return (*prefix, *longer[len(shorter) :])
 
-def rewrite_diadic_same_shapes(op: AddOp | MultiplyOp, rewriter: PatternRewriter):
+
+def rewrite_diadic_pervasive(op: DyadicPervasiveOperation, rewriter: PatternRewriter):
     assert isa((lhs_type := op.lhs.type), TF64)
     assert isa((rhs_type := op.rhs.type), TF64)
 
-    assert lhs_type.get_shape() == rhs_type.get_shape()
+    res_shape = broadcast_shapes(lhs_type.get_shape(), rhs_type.get_shape())
+    res_type = t64(*res_shape)
 
-    if lhs_type != op.res.type:
-        rewriter.modify_value_type(op.res, lhs_type)
+    if res_type != op.res.type:
+        rewriter.modify_value_type(op.res, res_type)
 
 
-class AddOpShapeInferencePattern(RewritePattern):
+class MonadicPervasiveShapeInferencePattern(RewritePattern):
     @op_type_rewrite_pattern
-    def match_and_rewrite(self, op: AddOp, rewriter: PatternRewriter, /):
-        rewrite_diadic_same_shapes(op, rewriter)
+    def match_and_rewrite(
+        self, op: MonadicPervasiveOperation, rewriter: PatternRewriter, /
+    ):
+        assert isa((arg_type := op.arg.type), TF64)
+
+        if arg_type != op.res.type:
+            rewriter.modify_value_type(op.res, arg_type)
 
 
-class MultiplyOpShapeInferencePattern(RewritePattern):
+class DyadicPervasiveShapeInferencePattern(RewritePattern):
     @op_type_rewrite_pattern
-    def match_and_rewrite(self, op: MultiplyOp, rewriter: PatternRewriter, /):
-        rewrite_diadic_same_shapes(op, rewriter)
+    def match_and_rewrite(
+        self, op: DyadicPervasiveOperation, rewriter: PatternRewriter, /
+    ):
+        rewrite_diadic_pervasive(op, rewriter)
 
 
 class ReduceOpShapeInferencePattern(RewritePattern):
     @op_type_rewrite_pattern
     def match_and_rewrite(self, op: ReduceOp, rewriter: PatternRewriter, /):
+        if all(isa(res.type, TF64) for res in op.res):
+            return
+
+        block_args = op.body.block.args
+        assert len(block_args) == 2 * len(op.args)
+        accs, vals = block_args[: len(op.args)], block_args[len(op.args) :]
+
+        for arg, acc_arg, val_arg, res in zip(op.args, accs, vals, op.res):
+            assert isa((arg_type := arg.type), TF64)
+            arg_shape = arg_type.get_shape()
+
+            assert len(arg_shape)
+
+            inner_shape = arg_shape[1:]
+            inner_type = t64(*inner_shape)
+
+            rewriter.modify_value_type(acc_arg, inner_type)
+            rewriter.modify_value_type(val_arg, inner_type)
+            rewriter.modify_value_type(res, inner_type)
+
+
+class ScanOpShapeInferencePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: ScanOp, rewriter: PatternRewriter, /):
         if isa(op.res.type, TF64):
             return
 
         assert isa((arg_type := op.arg.type), TF64)
         arg_shape = arg_type.get_shape()
+        if not arg_shape:
+            raise ValueError("Cannot scan a scalar")
+        if arg_shape[0] == DYNAMIC_INDEX:
+            raise NotImplementedError(f"{op.name} of a dynamic dimension")
 
-        assert len(arg_shape)
+        inner_type = t64(*arg_shape[1:])
+        acc_arg, val_arg = op.body.block.args
 
-        block_args = op.body.block.args
-        assert len(block_args) == 2
+        rewriter.modify_value_type(acc_arg, inner_type)
+        rewriter.modify_value_type(val_arg, inner_type)
+        rewriter.modify_value_type(op.res, arg_type)
 
-        inner_shape = arg_shape[1:]
-        inner_type = t64(*inner_shape)
 
-        acc_arg, val_arg = block_args
+class FoldOpShapeInferencePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: FoldOp, rewriter: PatternRewriter, /):
+        if isa(op.res.type, TF64):
+            return
 
-        rewriter.modify_value_type(acc_arg, inner_type)
-        rewriter.modify_value_type(val_arg, inner_type)
-        rewriter.modify_value_type(op.res, inner_type)
+        assert isa((init_type := op.init.type), TF64)
+        assert isa((arg_type := op.arg.type), TF64)
+        arg_shape = arg_type.get_shape()
+        if not arg_shape:
+            raise ValueError("Cannot fold a scalar")
+
+        acc_arg, val_arg = op.body.block.args
+
+        rewriter.modify_value_type(acc_arg, init_type)
+        rewriter.modify_value_type(val_arg, t64(*arg_shape[1:]))
+        rewriter.modify_value_type(op.res, init_type)
+
+
+def iteration_frame(
+    op: IteratingModifierOperation, shapes: Sequence[tuple[int, ...]]
+) -> tuple[int, ...]:
+    """
+    Returns the frame iterated over by the operation, given the shapes of its inputs,
+    which must all have the same frame.
+    """
+    frames = {shape[: op.frame_rank(len(shape))] for shape in shapes}
+    if len(frames) != 1:
+        raise ValueError(
+            f"Cannot apply {op.name} to arrays of shapes {', '.join(map(str, shapes))}"
+        )
+    frame = frames.pop()
+    if isinstance(op, RowsOp) and not frame:
+        raise ValueError(f"Cannot apply {op.name} to scalars")
+    return frame
+
+
+def input_shapes(op: Operation) -> tuple[tuple[int, ...], ...]:
+    shapes: list[tuple[int, ...]] = []
+    for operand in op.operands:
+        assert isa((operand_type := operand.type), TF64)
+        shapes.append(operand_type.get_shape())
+    return tuple(shapes)
+
+
+class IteratingModifierShapeInferencePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(
+        self, op: IteratingModifierOperation, rewriter: PatternRewriter, /
+    ):
+        shapes = input_shapes(op)
+        frame = iteration_frame(op, shapes)
+        for shape, arg in zip(shapes, op.body.block.args):
+            cell_type = t64(*shape[len(frame) :])
+            if arg.type != cell_type:
+                rewriter.modify_value_type(arg, cell_type)
+
+
+class YieldOpShapeInferencePattern(RewritePattern):
+    """
+    Infers the results of the iterating modifiers from the values yielded by their
+    bodies, once these are inferred.
+    """
+
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: YieldOp, rewriter: PatternRewriter, /):
+        parent = op.parent_op()
+        if not isinstance(parent, IteratingModifierOperation):
+            return
+        if not all(isa(value.type, TF64) for value in op.arg):
+            return
+
+        frame = iteration_frame(parent, input_shapes(parent))
+        for value, res in zip(op.arg, parent.res):
+            assert isa((value_type := value.type), TF64)
+            res_type = t64(*frame, *value_type.get_shape())
+            if res.type != res_type:
+                rewriter.modify_value_type(res, res_type)
+
+
+# region Array
+
+
+def constant_integers(
+    op: Operation, value: SSAValue
+) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """
+    Returns the shape and the elements of the value, which must be a constant of
+    integers, as the shape of the result of the operation depends on them.
+    """
+    constant_op = value.owner
+    if not isinstance(constant_op, arith.Constant) or not isinstance(
+        attr := constant_op.value, DenseIntOrFPElementsAttr
+    ):
+        raise NotImplementedError(
+            f"The shape of {op.name} depends on a value computed at runtime"
+        )
+    values = tuple(float(element.value.data) for element in attr.data)
+    if not all(value.is_integer() for value in values):
+        raise ValueError(f"{op.name} expects integers, got {values}")
+    return tuple(attr.get_shape() or ()), tuple(int(value) for value in values)
+
+
+def range_shape(count_shape: tuple[int, ...], counts: tuple[int, ...]) -> tuple[int]:
+    if count_shape:
+        raise NotImplementedError("Range of a list of dimensions")
+    (count,) = counts
+    if count < 0:
+        raise ValueError(f"Cannot take the range of negative {count}")
+    return (count,)
+
+
+def reshaped_shape(
+    arg_shape: tuple[int, ...], shape_shape: tuple[int, ...], dims: tuple[int, ...]
+) -> tuple[int, ...]:
+    """
+    Returns the shape of `arg` reshaped to the elements of `shape`.
+    """
+    if not shape_shape:
+        (count,) = dims
+        if count < 0:
+            raise ValueError(f"Cannot reshape to negative {count}")
+        return (count, *arg_shape)
+    if len(shape_shape) != 1:
+        raise ValueError(f"Shape should be a scalar or a list, got shape {shape_shape}")
+
+    size = prod(arg_shape)
+    if dims.count(-1) == 1:
+        known = prod(dim for dim in dims if dim != -1)
+        if known and not size % known:
+            dims = tuple(size // known if dim == -1 else dim for dim in dims)
+    if any(dim < 0 for dim in dims):
+        raise ValueError(f"Cannot reshape to {dims}")
+    if prod(dims) != size:
+        raise NotImplementedError(
+            f"Reshaping {arg_shape} to {dims}, which has a different number of elements"
+        )
+    return dims
+
+
+def joined_shape(
+    lhs_shape: tuple[int, ...], rhs_shape: tuple[int, ...]
+) -> tuple[int, ...]:
+    """
+    Returns the shape of the rows of `rhs` followed by the rows of `lhs`, an operand
+    of lower rank being a single row.
+    """
+    if len(lhs_shape) == len(rhs_shape):
+        lhs_rows = (lhs_shape[0], lhs_shape[1:]) if lhs_shape else (1, ())
+        rhs_rows = (rhs_shape[0], rhs_shape[1:]) if rhs_shape else (1, ())
+    elif len(lhs_shape) == len(rhs_shape) + 1:
+        lhs_rows, rhs_rows = (lhs_shape[0], lhs_shape[1:]), (1, rhs_shape)
+    elif len(rhs_shape) == len(lhs_shape) + 1:
+        lhs_rows, rhs_rows = (1, lhs_shape), (rhs_shape[0], rhs_shape[1:])
+    else:
+        lhs_rows = rhs_rows = None
+
+    if lhs_rows is None or rhs_rows is None or lhs_rows[1] != rhs_rows[1]:
+        raise ValueError(f"Cannot join arrays of shapes {rhs_shape} and {lhs_shape}")
+    if DYNAMIC_INDEX in (lhs_rows[0], rhs_rows[0]):
+        return (DYNAMIC_INDEX, *lhs_rows[1])
+    return (lhs_rows[0] + rhs_rows[0], *lhs_rows[1])
+
+
+def taken_rows(length: int, count: int) -> tuple[int, int]:
+    "Returns the range of the rows taken from an array with `length` rows."
+    if abs(count) > length:
+        raise ValueError(f"Cannot take {count} rows from an array of {length} rows")
+    return (0, count) if count >= 0 else (length + count, length)
+
+
+def dropped_rows(length: int, count: int) -> tuple[int, int]:
+    "Returns the range of the rows kept when dropping from an array with `length` rows."
+    if count >= 0:
+        return (min(count, length), length)
+    return (0, max(length + count, 0))
+
+
+def sliced_rows(op: SliceRowsOperation, length: int, count: int) -> tuple[int, int]:
+    if isinstance(op, TakeOp):
+        return taken_rows(length, count)
+    assert isinstance(op, DropOp)
+    return dropped_rows(length, count)
+
+
+def set_result_shape(
+    op: Operation, shape: tuple[int, ...], rewriter: PatternRewriter
+) -> None:
+    (res,) = op.results
+    res_type = t64(*shape)
+    if res_type != res.type:
+        rewriter.modify_value_type(res, res_type)
+
+
+class RangeOpShapeInferencePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: RangeOp, rewriter: PatternRewriter, /):
+        set_result_shape(op, range_shape(*constant_integers(op, op.arg)), rewriter)
+
+
+class ReverseOpShapeInferencePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: ReverseOp, rewriter: PatternRewriter, /):
+        assert isa((arg_type := op.arg.type), TF64)
+        set_result_shape(op, arg_type.get_shape(), rewriter)
+
+
+class TransposeOpShapeInferencePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: TransposeOp, rewriter: PatternRewriter, /):
+        assert isa((arg_type := op.arg.type), TF64)
+        shape = arg_type.get_shape()
+        set_result_shape(op, (*shape[1:], *shape[:1]), rewriter)
+
+
+class ReshapeOpShapeInferencePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: ReshapeOp, rewriter: PatternRewriter, /):
+        assert isa((arg_type := op.arg.type), TF64)
+        arg_shape = arg_type.get_shape()
+        if DYNAMIC_INDEX in arg_shape:
+            raise NotImplementedError(f"{op.name} of a dynamic dimension")
+        shape = reshaped_shape(arg_shape, *constant_integers(op, op.shape))
+        set_result_shape(op, shape, rewriter)
+
+
+class JoinOpShapeInferencePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: JoinOp, rewriter: PatternRewriter, /):
+        assert isa((lhs_type := op.lhs.type), TF64)
+        assert isa((rhs_type := op.rhs.type), TF64)
+        shape = joined_shape(lhs_type.get_shape(), rhs_type.get_shape())
+        set_result_shape(op, shape, rewriter)
+
+
+class SliceRowsShapeInferencePattern(RewritePattern):
+    @op_type_rewrite_pattern
+    def match_and_rewrite(self, op: SliceRowsOperation, rewriter: PatternRewriter, /):
+        assert isa((arg_type := op.arg.type), TF64)
+        arg_shape = arg_type.get_shape()
+        if not arg_shape:
+            raise ValueError(f"{op.name} of a scalar")
+        if arg_shape[0] == DYNAMIC_INDEX:
+            raise NotImplementedError(f"{op.name} of a dynamic dimension")
+        count_shape, counts = constant_integers(op, op.count)
+        if count_shape:
+            raise NotImplementedError(f"{op.name} along several axes")
+        (count,) = counts
+        start, stop = sliced_rows(op, arg_shape[0], count)
+        set_result_shape(op, (stop - start, *arg_shape[1:]), rewriter)
+
+
+ARRAY_SHAPE_INFERENCE_PATTERNS = (
+    RangeOpShapeInferencePattern(),
+    ReverseOpShapeInferencePattern(),
+    TransposeOpShapeInferencePattern(),
+    ReshapeOpShapeInferencePattern(),
+    JoinOpShapeInferencePattern(),
+    SliceRowsShapeInferencePattern(),
+)
+
+# endregion
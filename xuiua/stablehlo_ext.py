@@ -0,0 +1,698 @@
+"""
+StableHLO operations used when lowering Uiua that are not (yet) available in xDSL's
+stablehlo dialect.
+
+https://github.com/openxla/stablehlo/blob/main/docs/spec.md
+"""
+
+import abc
+from collections.abc import Sequence
+from math import prod
+from typing import cast
+
+from xdsl.dialects import stablehlo
+from xdsl.dialects.builtin import (
+    DYNAMIC_INDEX,
+    AnyTensorType,
+    DenseArrayBase,
+    IntegerAttr,
+    TensorType,
+    i1,
+    i64,
+)
+from xdsl.ir import (
+    Attribute,
+    Dialect,
+    EnumAttribute,
+    Operation,
+    Region,
+    SpacedOpaqueSyntaxAttribute,
+    SSAValue,
+    StrEnum,
+)
+from xdsl.irdl import (
+    IRDLOperation,
+    VarConstraint,
+    attr_def,
+    base,
+    irdl_attr_definition,
+    irdl_op_definition,
+    operand_def,
+    region_def,
+    result_def,
+    var_operand_def,
+    var_result_def,
+)
+from xdsl.traits import Pure
+from xdsl.utils.exceptions import VerifyException
+
+
+@irdl_op_definition
+class BroadcastInDimOp(IRDLOperation):
+    """
+    Expands the dimensions and/or rank of an input tensor by duplicating the data in
+    the `operand` tensor and produces a `result` tensor.
+    Dimension `i` of the operand is mapped to dimension `broadcast_dimensions[i]` of
+    the result.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#broadcast_in_dim
+    """
+
+    name = "stablehlo.broadcast_in_dim"
+
+    operand = operand_def(AnyTensorType)
+    result = result_def(AnyTensorType)
+    broadcast_dimensions = attr_def(DenseArrayBase)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(
+        self,
+        operand: SSAValue,
+        broadcast_dimensions: Sequence[int],
+        result_type: Attribute,
+    ):
+        super().__init__(
+            operands=(operand,),
+            result_types=(result_type,),
+            attributes={
+                "broadcast_dimensions": DenseArrayBase.from_list(
+                    i64, broadcast_dimensions
+                )
+            },
+        )
+
+    def get_broadcast_dimensions(self) -> tuple[int, ...]:
+        return cast(tuple[int, ...], self.broadcast_dimensions.as_tuple())
+
+    def verify_(self) -> None:
+        o_type = cast(TensorType[Attribute], self.operand.type)
+        r_type = cast(TensorType[Attribute], self.result.type)
+
+        o_shape = o_type.get_shape()
+        r_shape = r_type.get_shape()
+
+        dimensions = self.get_broadcast_dimensions()
+        if len(dimensions) != len(o_shape):
+            raise VerifyException(
+                f"Expected {len(o_shape)} broadcast dimensions, got {len(dimensions)}"
+            )
+        for o_dim, r_index in zip(o_shape, dimensions):
+            if not 0 <= r_index < len(r_shape):
+                raise VerifyException(
+                    f"Broadcast dimension {r_index} out of range for result of rank "
+                    f"{len(r_shape)}"
+                )
+            if DYNAMIC_INDEX in (o_dim, r_shape[r_index]):
+                continue
+            if o_dim != 1 and o_dim != r_shape[r_index]:
+                raise VerifyException(
+                    f"Cannot broadcast dimension of size {o_dim} to {r_shape[r_index]}"
+                )
+
+
+class ComparisonDirection(StrEnum):
+    """
+    The comparison performed by `stablehlo.compare`.
+    """
+
+    EQ = "EQ"
+    NE = "NE"
+    GE = "GE"
+    GT = "GT"
+    LE = "LE"
+    LT = "LT"
+
+
+@irdl_attr_definition
+class ComparisonDirectionAttr(
+    EnumAttribute[ComparisonDirection], SpacedOpaqueSyntaxAttribute
+):
+    """
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#compare
+    """
+
+    name = "stablehlo.comparison_direction"
+
+
+@irdl_op_definition
+class CompareOp(IRDLOperation):
+    """
+    Performs element-wise comparison of `lhs` and `rhs` tensors according to
+    `comparison_direction`, and produces a tensor of booleans.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#compare
+    """
+
+    name = "stablehlo.compare"
+
+    lhs = operand_def(AnyTensorType)
+    rhs = operand_def(AnyTensorType)
+    result = result_def(AnyTensorType)
+    comparison_direction = attr_def(ComparisonDirectionAttr)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(
+        self, lhs: SSAValue, rhs: SSAValue, comparison_direction: ComparisonDirection
+    ):
+        lhs_type = cast(TensorType[Attribute], lhs.type)
+        super().__init__(
+            operands=(lhs, rhs),
+            result_types=(TensorType(i1, lhs_type.get_shape()),),
+            attributes={
+                "comparison_direction": ComparisonDirectionAttr(comparison_direction)
+            },
+        )
+
+
+ElementwiseT = VarConstraint("T", base(AnyTensorType))
+"The type of the operand and result of an elementwise unary operation."
+
+
+class ElementwiseUnaryOperation(IRDLOperation, abc.ABC):
+    operand = operand_def(ElementwiseT)
+    result = result_def(ElementwiseT)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(self, operand: SSAValue, result_type: Attribute | None = None):
+        if result_type is None:
+            result_type = operand.type
+        super().__init__(operands=(operand,), result_types=(result_type,))
+
+
+@irdl_op_definition
+class NegateOp(ElementwiseUnaryOperation):
+    """
+    Performs element-wise negation of `operand` tensor and produces a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#negate
+    """
+
+    name = "stablehlo.negate"
+
+
+@irdl_op_definition
+class SignOp(ElementwiseUnaryOperation):
+    """
+    Returns the sign of the `operand` element-wise and produces a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#sign
+    """
+
+    name = "stablehlo.sign"
+
+
+@irdl_op_definition
+class SqrtOp(ElementwiseUnaryOperation):
+    """
+    Performs element-wise square root operation on `operand` tensor and produces a
+    `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#sqrt
+    """
+
+    name = "stablehlo.sqrt"
+
+
+@irdl_op_definition
+class SineOp(ElementwiseUnaryOperation):
+    """
+    Performs element-wise sine operation on `operand` tensor and produces a `result`
+    tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#sine
+    """
+
+    name = "stablehlo.sine"
+
+
+@irdl_op_definition
+class FloorOp(ElementwiseUnaryOperation):
+    """
+    Performs element-wise floor of `operand` tensor and produces a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#floor
+    """
+
+    name = "stablehlo.floor"
+
+
+@irdl_op_definition
+class CeilOp(ElementwiseUnaryOperation):
+    """
+    Performs element-wise ceil of `operand` tensor and produces a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#ceil
+    """
+
+    name = "stablehlo.ceil"
+
+
+@irdl_op_definition
+class RoundNearestAfzOp(ElementwiseUnaryOperation):
+    """
+    Performs element-wise rounding towards the nearest integer, breaking ties away
+    from zero, on the `operand` tensor and produces a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#round_nearest_afz
+    """
+
+    name = "stablehlo.round_nearest_afz"
+
+
+@irdl_op_definition
+class LogOp(ElementwiseUnaryOperation):
+    """
+    Performs element-wise logarithm operation on `operand` tensor and produces a
+    `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#log
+    """
+
+    name = "stablehlo.log"
+
+
+@irdl_op_definition
+class DivideOp(stablehlo.ElementwiseBinaryOperation):
+    """
+    Performs element-wise division of dividend `lhs` and divisor `rhs` tensors and
+    produces a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#divide
+    """
+
+    name = "stablehlo.divide"
+
+    traits = frozenset((Pure(),))
+
+
+@irdl_op_definition
+class RemainderOp(stablehlo.ElementwiseBinaryOperation):
+    """
+    Performs element-wise remainder of dividend `lhs` and divisor `rhs` tensors and
+    produces a `result` tensor, with the sign of the dividend.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#remainder
+    """
+
+    name = "stablehlo.remainder"
+
+    traits = frozenset((Pure(),))
+
+
+@irdl_op_definition
+class PowerOp(stablehlo.ElementwiseBinaryOperation):
+    """
+    Performs element-wise exponentiation of `lhs` tensor by `rhs` tensor and produces
+    a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#power
+    """
+
+    name = "stablehlo.power"
+
+    traits = frozenset((Pure(),))
+
+
+@irdl_op_definition
+class MaximumOp(stablehlo.ElementwiseBinaryOperation):
+    """
+    Performs element-wise max operation on tensors `lhs` and `rhs` and produces a
+    `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#maximum
+    """
+
+    name = "stablehlo.maximum"
+
+    traits = frozenset((Pure(),))
+
+
+@irdl_op_definition
+class MinimumOp(stablehlo.ElementwiseBinaryOperation):
+    """
+    Performs element-wise min operation on tensors `lhs` and `rhs` and produces a
+    `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#minimum
+    """
+
+    name = "stablehlo.minimum"
+
+    traits = frozenset((Pure(),))
+
+
+@irdl_op_definition
+class Atan2Op(stablehlo.ElementwiseBinaryOperation):
+    """
+    Performs element-wise atan2 operation on `lhs` and `rhs` tensor and produces a
+    `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#atan2
+    """
+
+    name = "stablehlo.atan2"
+
+    traits = frozenset((Pure(),))
+
+
+@irdl_op_definition
+class ConvertOp(IRDLOperation):
+    """
+    Performs an element-wise conversion from one element type to another on
+    `operand` tensor and produces a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#convert
+    """
+
+    name = "stablehlo.convert"
+
+    operand = operand_def(AnyTensorType)
+    result = result_def(AnyTensorType)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(self, operand: SSAValue, result_type: Attribute):
+        super().__init__(operands=(operand,), result_types=(result_type,))
+
+
+@irdl_op_definition
+class IotaOp(IRDLOperation):
+    """
+    Fills an `output` tensor with values in increasing order starting from zero along
+    the `iota_dimension` dimension.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#iota
+    """
+
+    name = "stablehlo.iota"
+
+    output = result_def(AnyTensorType)
+    iota_dimension = attr_def(IntegerAttr)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(self, iota_dimension: int, result_type: Attribute):
+        super().__init__(
+            result_types=(result_type,),
+            attributes={"iota_dimension": IntegerAttr(iota_dimension, i64)},
+        )
+
+    def verify_(self) -> None:
+        r_type = cast(TensorType[Attribute], self.output.type)
+        if not 0 <= self.iota_dimension.value.data < len(r_type.get_shape()):
+            raise VerifyException(
+                f"Iota dimension {self.iota_dimension.value.data} out of range for "
+                f"result of rank {len(r_type.get_shape())}"
+            )
+
+
+@irdl_op_definition
+class SelectOp(IRDLOperation):
+    """
+    Produces a `result` tensor where each element is selected from `on_true` or
+    `on_false` tensor based on the value of the corresponding element of `pred`.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#select
+    """
+
+    name = "stablehlo.select"
+
+    pred = operand_def(AnyTensorType)
+    on_true = operand_def(AnyTensorType)
+    on_false = operand_def(AnyTensorType)
+    result = result_def(AnyTensorType)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(self, pred: SSAValue, on_true: SSAValue, on_false: SSAValue):
+        super().__init__(
+            operands=(pred, on_true, on_false), result_types=(on_true.type,)
+        )
+
+
+@irdl_op_definition
+class ReshapeOp(IRDLOperation):
+    """
+    Performs reshape of `operand` tensor to a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#reshape
+    """
+
+    name = "stablehlo.reshape"
+
+    operand = operand_def(AnyTensorType)
+    result = result_def(AnyTensorType)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(self, operand: SSAValue, result_type: Attribute):
+        super().__init__(operands=(operand,), result_types=(result_type,))
+
+    def verify_(self) -> None:
+        o_shape = cast(TensorType[Attribute], self.operand.type).get_shape()
+        r_shape = cast(TensorType[Attribute], self.result.type).get_shape()
+        if DYNAMIC_INDEX not in o_shape + r_shape and prod(o_shape) != prod(r_shape):
+            raise VerifyException(
+                f"Cannot reshape tensor of shape {o_shape} to {r_shape}"
+            )
+
+
+@irdl_op_definition
+class ConcatenateOp(IRDLOperation):
+    """
+    Concatenates a variadic number of tensors in `inputs` along `dimension` dimension
+    in the same order as the given arguments and produces a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#concatenate
+    """
+
+    name = "stablehlo.concatenate"
+
+    inputs = var_operand_def(AnyTensorType)
+    result = result_def(AnyTensorType)
+    dimension = attr_def(IntegerAttr)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(
+        self, inputs: Sequence[SSAValue], dimension: int, result_type: Attribute
+    ):
+        super().__init__(
+            operands=(inputs,),
+            result_types=(result_type,),
+            attributes={"dimension": IntegerAttr(dimension, i64)},
+        )
+
+
+@irdl_op_definition
+class SliceOp(IRDLOperation):
+    """
+    Extracts a slice from the `operand` using statically-computed starting indices
+    and produces a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#slice
+    """
+
+    name = "stablehlo.slice"
+
+    operand = operand_def(AnyTensorType)
+    result = result_def(AnyTensorType)
+    start_indices = attr_def(DenseArrayBase)
+    limit_indices = attr_def(DenseArrayBase)
+    strides = attr_def(DenseArrayBase)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(
+        self,
+        operand: SSAValue,
+        start_indices: Sequence[int],
+        limit_indices: Sequence[int],
+        result_type: Attribute,
+        strides: Sequence[int] | None = None,
+    ):
+        if strides is None:
+            strides = (1,) * len(start_indices)
+        super().__init__(
+            operands=(operand,),
+            result_types=(result_type,),
+            attributes={
+                "start_indices": DenseArrayBase.from_list(i64, start_indices),
+                "limit_indices": DenseArrayBase.from_list(i64, limit_indices),
+                "strides": DenseArrayBase.from_list(i64, strides),
+            },
+        )
+
+
+@irdl_op_definition
+class DynamicSliceOp(IRDLOperation):
+    """
+    Extracts a slice from the `operand` using dynamically-computed starting indices
+    and produces a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#dynamic_slice
+    """
+
+    name = "stablehlo.dynamic_slice"
+
+    operand = operand_def(AnyTensorType)
+    start_indices = var_operand_def(AnyTensorType)
+    result = result_def(AnyTensorType)
+    slice_sizes = attr_def(DenseArrayBase)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(
+        self,
+        operand: SSAValue,
+        start_indices: Sequence[SSAValue],
+        slice_sizes: Sequence[int],
+        result_type: Attribute,
+    ):
+        super().__init__(
+            operands=(operand, start_indices),
+            result_types=(result_type,),
+            attributes={"slice_sizes": DenseArrayBase.from_list(i64, slice_sizes)},
+        )
+
+
+@irdl_op_definition
+class DynamicUpdateSliceOp(IRDLOperation):
+    """
+    Produces a `result` tensor which is equal to the `operand` tensor except that the
+    slice starting at `start_indices` is updated with the values in `update`.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#dynamic_update_slice
+    """
+
+    name = "stablehlo.dynamic_update_slice"
+
+    operand = operand_def(AnyTensorType)
+    update = operand_def(AnyTensorType)
+    start_indices = var_operand_def(AnyTensorType)
+    result = result_def(AnyTensorType)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(
+        self, operand: SSAValue, update: SSAValue, start_indices: Sequence[SSAValue]
+    ):
+        super().__init__(
+            operands=(operand, update, start_indices), result_types=(operand.type,)
+        )
+
+
+@irdl_op_definition
+class WhileOp(IRDLOperation):
+    """
+    Produces the output from executing `body` function 0 or more times while the
+    `cond` function outputs `true`.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#while
+    """
+
+    name = "stablehlo.while"
+
+    operand = var_operand_def(AnyTensorType)
+    results_ = var_result_def(AnyTensorType)
+    cond = region_def("single_block")
+    body = region_def("single_block")
+
+    def __init__(self, operand: Sequence[SSAValue], cond: Region, body: Region):
+        super().__init__(
+            operands=(operand,),
+            result_types=(tuple(o.type for o in operand),),
+            regions=(cond, body),
+        )
+
+    def verify_(self) -> None:
+        operand_types = tuple(o.type for o in self.operand)
+        for region in (self.cond, self.body):
+            arg_types = tuple(arg.type for arg in region.block.args)
+            if arg_types != operand_types:
+                raise VerifyException(
+                    f"Mismatching types for while region arguments: {arg_types} != "
+                    f"{operand_types}"
+                )
+
+
+@irdl_op_definition
+class ReverseOp(IRDLOperation):
+    """
+    Reverses the order of elements in the `operand` along the specified `dimensions`
+    and produces a `result` tensor.
+
+    https://github.com/openxla/stablehlo/blob/main/docs/spec.md#reverse
+    """
+
+    name = "stablehlo.reverse"
+
+    operand = operand_def(AnyTensorType)
+    result = result_def(AnyTensorType)
+    dimensions = attr_def(DenseArrayBase)
+
+    traits = frozenset((Pure(),))
+
+    def __init__(self, operand: SSAValue, dimensions: Sequence[int]):
+        super().__init__(
+            operands=(operand,),
+            result_types=(operand.type,),
+            attributes={"dimensions": DenseArrayBase.from_list(i64, dimensions)},
+        )
+
+
+ELEMENTWISE_OPS: tuple[type[Operation], ...] = (
+    stablehlo.ElementwiseBinaryOperation,
+    stablehlo.AbsOp,
+    ElementwiseUnaryOperation,
+    CompareOp,
+    ConvertOp,
+    SelectOp,
+)
+"""
+The operations computing each element of their result from the elements at the same
+index of their operands, which all have the same shape.
+"""
+
+STABLEHLO = Dialect(
+    "stablehlo",
+    [
+        *stablehlo.StableHLO.operations,
+        Atan2Op,
+        BroadcastInDimOp,
+        CeilOp,
+        CompareOp,
+        ConcatenateOp,
+        ConvertOp,
+        DivideOp,
+        DynamicSliceOp,
+        DynamicUpdateSliceOp,
+        FloorOp,
+        IotaOp,
+        LogOp,
+        MaximumOp,
+        MinimumOp,
+        NegateOp,
+        PowerOp,
+        RemainderOp,
+        ReshapeOp,
+        ReverseOp,
+        RoundNearestAfzOp,
+        SelectOp,
+        SignOp,
+        SineOp,
+        SliceOp,
+        SqrtOp,
+        WhileOp,
+    ],
+    [
+        *stablehlo.StableHLO.attributes,
+        ComparisonDirectionAttr,
+    ],
+)
+"""
+xDSL's stablehlo dialect, extended with the operations defined here.
+"""
@@ -0,0 +1,185 @@
+"""
+Instrumentation of the stages of the compiler.
+
+The compiler reports each stage to the active `Timings`:
+
+```python
+with Timings() as timings:
+    compile("/+", ((1000,),))
+print(timings.format())
+```
+"""
+
+import json
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from xdsl.ir import Operation
+
+
+class StageTiming(NamedTuple):
+    name: str
+    start: float
+    "The start time, in seconds since the collection started."
+    duration: float
+    "The wall time, in seconds."
+    ops_before: int | None
+    "The number of operations in the module before the stage, if any."
+    ops_after: int | None
+    "The number of operations in the module after the stage, if any."
+    peak_memory: int | None
+    "The peak memory allocated by Python during the stage, in bytes, if traced."
+
+
+class Timings:
+    """
+    Collects the timings of the stages run while it is active.
+
+    If `trace_memory` is set, the peak memory allocated by Python objects in each
+    stage is recorded with `tracemalloc`, which slows down the compiler. Memory
+    allocated by XLA is not included.
+    """
+
+    stages: list[StageTiming]
+    trace_memory: bool
+    callback: Callable[[StageTiming], None] | None
+    "Called with each stage when it ends."
+    origin: float
+    _token: "Token[tuple[Timings, ...]] | None"
+
+    def __init__(
+        self,
+        trace_memory: bool = False,
+        callback: Callable[[StageTiming], None] | None = None,
+    ):
+        self.stages = []
+        self.trace_memory = trace_memory
+        self.callback = callback
+        self.origin = time.perf_counter()
+        self._started_tracemalloc = False
+        self._token = None
+
+    def __enter__(self) -> "Timings":
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._token = _ACTIVE.set((*_ACTIVE.get(), self))
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        assert self._token is not None
+        _ACTIVE.reset(self._token)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def record(self, timing: StageTiming) -> None:
+        self.stages.append(timing)
+        if self.callback is not None:
+            self.callback(timing)
+
+    def format(self) -> str:
+        """
+        Returns a table of the stages, with the total time.
+        """
+        lines = [
+            f"{'stage':<30} {'time (ms)':>12} {'ops before':>11} {'ops after':>10} "
+            f"{'peak (KiB)':>11}"
+        ]
+        for stage in self.stages:
+            peak = (
+                "" if stage.peak_memory is None else f"{stage.peak_memory / 1024:.1f}"
+            )
+            ops_before = "" if stage.ops_before is None else str(stage.ops_before)
+            ops_after = "" if stage.ops_after is None else str(stage.ops_after)
+            lines.append(
+                f"{stage.name:<30} {stage.duration * 1e3:12.3f} {ops_before:>11} "
+                f"{ops_after:>10} {peak:>11}"
+            )
+        total = sum(stage.duration for stage in self.stages)
+        lines.append(f"{'total':<30} {total * 1e3:12.3f}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """
+        Returns the stages in the Chrome trace event format, viewable in
+        `chrome://tracing` or Perfetto.
+        """
+        events: list[dict[str, Any]] = []
+        for stage in self.stages:
+            args = {
+                key: value
+                for key, value in (
+                    ("ops_before", stage.ops_before),
+                    ("ops_after", stage.ops_after),
+                    ("peak_memory", stage.peak_memory),
+                )
+                if value is not None
+            }
+            events.append(
+                {
+                    "name": stage.name,
+                    "cat": "xuiua",
+                    "ph": "X",
+                    "ts": stage.start * 1e6,
+                    "dur": stage.duration * 1e6,
+                    "pid": 0,
+                    "tid": 0,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path | str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+_ACTIVE: ContextVar[tuple[Timings, ...]] = ContextVar("timings", default=())
+
+
+def count_ops(op: Operation) -> int:
+    return sum(1 for _ in op.walk())
+
+
+@contextmanager
+def stage(name: str, module: Operation | None = None) -> Iterator[None]:
+    """
+    Reports the stage to the active timings, if any, counting the operations in the
+    module before and after it.
+    """
+    active = _ACTIVE.get()
+    if not active:
+        yield
+        return
+
+    ops_before = None if module is None else count_ops(module)
+    memory_before = None
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        peak_memory = None
+        if memory_before is not None:
+            peak_memory = max(tracemalloc.get_traced_memory()[1] - memory_before, 0)
+        ops_after = None if module is None else count_ops(module)
+        for timings in active:
+            timings.record(
+                StageTiming(
+                    name,
+                    start - timings.origin,
+                    end - start,
+                    ops_before,
+                    ops_after,
+                    peak_memory if timings.trace_memory else None,
+                )
+            )